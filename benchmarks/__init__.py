@@ -0,0 +1,5 @@
+"""
+Benchmarks for the quiz tools.
+
+Each module can be run with ``python -m benchmarks.<name>`` from the repository root.
+"""
@@ -0,0 +1,44 @@
+"""
+Synthetic decks for the benchmarks.
+
+Cards follow schemas/card.yaml and schemas/answers.yaml and are modeled on
+decks/fun-math: ten options, sources, a URL and an embedded video, with the
+question and answer types cycling through the schema's values.
+"""
+
+from pathlib import Path
+from typing import List
+
+import yaml
+
+QUESTION_TYPES = ('short', 'extended')
+ANSWER_TYPES = ('binary', 'ordering_number', 'date', 'free_text')
+
+Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def create_deck(path: Path, cards: int, name: str = 'benchmark') -> List[Path]:
+    """Write a deck of cards and return its card YAML files (content.yaml and answers.yaml of each card)."""
+    (path / "cards").mkdir(parents=True)
+    (path / "index.yaml").write_text(yaml.dump({'title': 'Benchmark deck'}, Dumper=Dumper), encoding='utf-8')
+    files = []
+    for i in range(1, cards + 1):
+        card_id = f"{i:05d}"
+        card_dir = path / "cards" / card_id
+        card_dir.mkdir()
+        options = [f"Paso {n}" for n in range(1, 11)]
+        content = {
+            'card_id': card_id,
+            'question_type': QUESTION_TYPES[i % len(QUESTION_TYPES)],
+            'question_content': f'Sigue el video y decide si cada paso es correcto ({card_id})',
+            'options': options,
+            'sources': ['https://es.khanacademy.org/math/problem-solving'],
+            'url': f'https://blog.session.it/quiz/decks/{name}/cards/{card_id}',
+            'answer_type': ANSWER_TYPES[i % len(ANSWER_TYPES)],
+            'embedded_contents': [{'type': 'iframe', 'url': 'https://www.youtube.com/embed/kX4FdtUNPDg'}],
+        }
+        answers = [{'order': n, 'option': option, 'answer': str(n % 2 == 0)} for n, option in enumerate(options, 1)]
+        (card_dir / "content.yaml").write_text(yaml.dump(content, Dumper=Dumper, allow_unicode=True), encoding='utf-8')
+        (card_dir / "answers.yaml").write_text(yaml.dump(answers, Dumper=Dumper, allow_unicode=True), encoding='utf-8')
+        files.extend([card_dir / "content.yaml", card_dir / "answers.yaml"])
+    return files
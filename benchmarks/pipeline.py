@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Time every stage of the card pipeline on generated decks.
+
+Synthesizes decks of 10, 1k and 10k cards by default (see benchmarks.decks)
+and times, per deck size: deck discovery (get_deck_folders and
+get_question_folders), YAML loading, create_svg_card, generate_qr_code,
+convert_svg_to_pdf and card_to_markdown. Each stage runs over every card, in
+a single process and without build caches; PDF conversion, by far the
+slowest stage, is timed on a sample of the cards and reported per card.
+
+Results are printed, or written with --output, as JSON, so that runs on two
+commits can be compared:
+
+    python -m benchmarks.pipeline --cards 10 1000 --output before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.decks import create_deck
+from src.file_utils import Card, get_deck_folders, get_question_folders
+from src.file_utils.yaml_loader import SafeLoader
+
+STAGES = ("discovery", "yaml_load", "svg", "qr", "pdf", "markdown")
+DEFAULT_PDF_SAMPLE = 100
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest of repeat runs of function, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def stage_result(seconds: float, items: int) -> Dict[str, float]:
+    return {
+        'seconds': round(seconds, 6),
+        'items': items,
+        'per_item_ms': round(seconds * 1000 / items, 4) if items else 0.0,
+    }
+
+
+def run(cards: int, stages: List[str], repeat: int = 1, pdf_sample: int = DEFAULT_PDF_SAMPLE) -> Dict[str, Any]:
+    """
+    Time the selected stages on a generated deck.
+
+    Returns:
+        Dict[str, Any]: Per stage, the best time in seconds, the number of
+        items processed and the time per item; or the error if a stage could not run
+    """
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        create_deck(root / "benchmark", cards)
+
+        def discover() -> List[str]:
+            return get_question_folders(get_deck_folders([str(root)]))
+
+        folders = discover()
+        if "discovery" in stages:
+            results['discovery'] = stage_result(best_time(discover, repeat), len(folders))
+
+        def load_cards() -> List[Card]:
+            loaded = [Card.load(folder) for folder in folders]
+            for card in loaded:
+                card.answers
+            return loaded
+
+        loaded = load_cards()
+        if "yaml_load" in stages:
+            results['yaml_load'] = stage_result(best_time(load_cards, repeat), len(folders))
+
+        def timed(stage: str, body: Callable[[], Any], items: int) -> None:
+            if stage not in stages:
+                return
+            try:
+                results[stage] = stage_result(best_time(body, repeat), items)
+            except Exception as e:
+                # e.g. cairosvg without a native cairo library; keep the first line of the message
+                message = str(e).splitlines()[0] if str(e) else ''
+                results[stage] = {'error': f"{type(e).__name__}: {message}"}
+
+        def render_svgs() -> None:
+            from src.yaml_to_svg.generate_svg import YAMLToSVG
+            svg_generator = YAMLToSVG(input_paths=[str(root / "benchmark")])
+            for card in loaded:
+                svg_generator.create_svg_card(card, card.id)
+
+        def generate_qrs() -> None:
+            from src.qr_generator import generate_qr_code
+            for card in loaded:
+                if generate_qr_code(str(card.url), str(Path(str(card.folder)) / "qr.png")) is None:
+                    raise RuntimeError(f"QR code generation failed for card {card.id}")
+
+        sample = loaded[:pdf_sample] if pdf_sample > 0 else loaded
+
+        def convert_pdfs() -> None:
+            from src.svg_to_pdf.converter import SVGToPDFConverter
+            converter = SVGToPDFConverter()
+            for card in sample:
+                folder = Path(str(card.folder))
+                if not converter.convert_svg_to_pdf(str(folder / "content.svg"), str(folder / "content.pdf")):
+                    raise RuntimeError(f"PDF conversion failed for card {card.id}")
+
+        def render_markdown() -> None:
+            from src.yaml_to_markdown.generate_markdown import MarkdownGenerator
+            for card in loaded:
+                MarkdownGenerator.card_to_markdown(card)
+
+        timed('svg', render_svgs, len(loaded))
+        timed('qr', generate_qrs, len(loaded))
+        if "pdf" in stages and "svg" not in stages:
+            # PDFs are converted from the card SVGs
+            render_svgs()
+        timed('pdf', convert_pdfs, len(sample))
+        timed('markdown', render_markdown, len(loaded))
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Return the commit being benchmarked, if run from a git checkout."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        ).stdout
+        return output.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every card pipeline stage on generated decks.")
+    parser.add_argument("--cards", type=int, nargs="+", default=[10, 1000, 10000],
+                        help="Deck sizes to benchmark (default: 10 1000 10000)")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to time (default: {','.join(STAGES)})")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per stage; the fastest is reported (default: 1)")
+    parser.add_argument("--pdf-sample", type=int, default=DEFAULT_PDF_SAMPLE,
+                        help=f"Cards converted to PDF per deck (default: {DEFAULT_PDF_SAMPLE}, 0 = all)")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'yaml_loader': SafeLoader.__name__,
+        'repeat': args.repeat,
+        'results': {str(cards): run(cards, stages, args.repeat, args.pdf_sample) for cards in args.cards},
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Time the startup of every command-line entry point.
+
+For each entry point, runs ``python -X importtime -c "import <module>"`` to
+get the import time of the module and which heavy third-party packages
+(cairosvg, PIL, qrcode, ...) it pulls in, and times ``python -m <module>
+--help`` end to end, which is what short-lived per-file invocations such as
+the ones in scripts/*.sh pay before doing any work. Every measurement runs in
+a fresh interpreter; the fastest of --repeat runs is reported:
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.pipeline import git_revision
+
+ENTRY_POINTS = (
+    "src.build",
+    "src.qr_generator",
+    "src.svg_to_pdf.converter",
+    "src.yaml_to_svg.generate_svg",
+    "src.yaml_to_markdown.generate_markdown",
+)
+# Packages that should only be imported once a card is actually rendered
+HEAVY_MODULES = ("cairosvg", "cairocffi", "tinycss2", "PIL", "qrcode", "svgwrite")
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """Return (module, self µs, cumulative µs) for every module imported by importing module."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def help_time(module: str) -> float:
+    """Return the wall time in seconds of ``python -m module --help``."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", module, "--help"], cwd=PROJECT_ROOT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def interpreter_time() -> float:
+    """Return the wall time in seconds of an interpreter that imports nothing, for reference."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def run(module: str, repeat: int = 1, slowest: int = 5) -> Dict[str, Any]:
+    """
+    Measure the startup of one entry point.
+
+    Returns:
+        Dict[str, Any]: The best import time of the module and its dependencies
+        in milliseconds, the heavy packages it imports, the slowest imports
+        by self time, and the best ``--help`` wall time in milliseconds
+    """
+    best: List[Tuple[str, int, int]] = []
+    for _ in range(repeat):
+        rows = import_times(module)
+        if not best or sum(row[1] for row in rows) < sum(row[1] for row in best):
+            best = rows
+    imported = {name.split(".")[0] for name, _, _ in best}
+    return {
+        'import_ms': round(sum(row[1] for row in best) / 1000, 3),
+        'modules': len(best),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in imported],
+        'slowest': [
+            {'module': name, 'self_ms': round(self_us / 1000, 3)}
+            for name, self_us, _ in sorted(best, key=lambda row: row[1], reverse=True)[:slowest]
+        ],
+        'help_ms': round(min(help_time(module) for _ in range(repeat)) * 1000, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of the command-line entry points.")
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_POINTS),
+                        help=f"Entry points to time (default: {' '.join(ENTRY_POINTS)})")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per measurement; the fastest is reported (default: 3)")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'interpreter_ms': round(min(interpreter_time() for _ in range(args.repeat)) * 1000, 3),
+        'results': {module: run(module, args.repeat) for module in args.modules},
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
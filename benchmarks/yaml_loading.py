@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compare card YAML load times on generated decks.
+
+Times the pure-Python ``yaml.safe_load`` used before, the shared ``load_yaml``
+(libyaml's CSafeLoader when available) and ``YAMLLoader`` with a cold and a
+warm parsed-data cache, on decks of 1k and 10k cards by default:
+
+    python -m benchmarks.yaml_loading --cards 1000 10000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import yaml
+
+from benchmarks.decks import create_deck
+from src.file_utils import YAMLLoader, load_yaml
+from src.file_utils.yaml_loader import SafeLoader
+
+
+def time_loads(files: List[Path], load: Callable[[Path], object]) -> float:
+    start = time.perf_counter()
+    for path in files:
+        load(path)
+    return time.perf_counter() - start
+
+
+def run(cards: int) -> Dict[str, float]:
+    """Return the load time in seconds of each strategy over a deck of the given size."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = create_deck(Path(temp_dir) / "benchmark", cards)
+
+        def safe_load(path: Path) -> object:
+            with open(path, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f)
+
+        results = {
+            'safe_load': time_loads(files, safe_load),
+            'load_yaml': time_loads(files, load_yaml),
+        }
+        cold = YAMLLoader()
+        results['cache_cold'] = time_loads(files, cold.load)
+        start = time.perf_counter()
+        cold.save()
+        results['cache_save'] = time.perf_counter() - start
+        warm = YAMLLoader()
+        results['cache_warm'] = time_loads(files, warm.load)
+        assert warm.misses == 0
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark card YAML loading on generated decks.")
+    parser.add_argument("--cards", type=int, nargs="+", default=[1000, 10000],
+                        help="Deck sizes to benchmark (default: 1000 10000)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {str(cards): run(cards) for cards in args.cards}
+    if args.json:
+        print(json.dumps({'loader': SafeLoader.__name__, 'results': results}, indent=2))
+        return 0
+    print(f"YAML loader: {SafeLoader.__name__}")
+    print(f"{'cards':>8} " + " ".join(f"{name:>11}" for name in next(iter(results.values()))))
+    for cards, timings in results.items():
+        print(f"{cards:>8} " + " ".join(f"{seconds:>10.3f}s" for seconds in timings.values()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+#!/bin/bash
+
+# build.sh - Run the QR, SVG, PDF and Markdown stages for the given decks in one process
+# Usage: ./scripts/build.sh <input_path> [<input_path> ...] [--stages qr,svg,pdf,markdown]
+
+if [ "$#" -eq 0 ]; then
+    echo "Usage: $0 <input_path> [<input_path> ...] [--stages qr,svg,pdf,markdown]"
+    exit 1
+fi
+
+# Get the script directory and project root
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+PROJECT_ROOT="$( cd "$SCRIPT_DIR/.." && pwd )"
+
+# Set up Python environment
+cd "$PROJECT_ROOT"
+poetry install
+
+# Add src directory to PYTHONPATH
+export PYTHONPATH="$PROJECT_ROOT:$PYTHONPATH"
+
+poetry run python -m src.build "$@" || exit $?
+
+echo "Build completed"
@@ -0,0 +1,39 @@
+#!/bin/bash
+
+# render_card.sh - Render one card through a running render daemon (see render_server.sh)
+# Usage: ./scripts/render_card.sh <deck> <card_id> [svg|pdf|png] > output
+#        ./scripts/render_card.sh <content.yaml> [svg|pdf] > output
+#
+# The daemon is reached on $RENDER_SOCKET if set, or else on $RENDER_URL
+# (default: http://127.0.0.1:8765). No Python is started, so a render takes
+# only as long as the daemon needs for the card.
+
+if [ "$#" -lt 1 ]; then
+    echo "Usage: $0 <deck> <card_id> [svg|pdf|png]" >&2
+    echo "       $0 <content.yaml> [svg|pdf]" >&2
+    exit 1
+fi
+
+RENDER_URL="${RENDER_URL:-http://127.0.0.1:8765}"
+CURL=(curl --silent --show-error --fail)
+if [ -n "$RENDER_SOCKET" ]; then
+    CURL+=(--unix-socket "$RENDER_SOCKET")
+    RENDER_URL="http://localhost"
+fi
+
+if [ -f "$1" ]; then
+    # Raw card YAML, with the answers under an 'answers' key
+    FORMAT="${2:-svg}"
+    exec "${CURL[@]}" --data-binary "@$1" -H "Content-Type: application/yaml" "$RENDER_URL/render?format=$FORMAT"
+fi
+
+if [ "$#" -lt 2 ]; then
+    echo "Usage: $0 <deck> <card_id> [svg|pdf|png]" >&2
+    exit 1
+fi
+
+case "${3:-svg}" in
+    png) FILE="qr.png" ;;
+    *) FILE="content.${3:-svg}" ;;
+esac
+exec "${CURL[@]}" "$RENDER_URL/decks/$1/cards/$2/$FILE"
@@ -0,0 +1,22 @@
+#!/bin/bash
+
+# render_server.sh - Start the render daemon, which keeps the SVG, PDF and QR renderers warm
+# Usage: ./scripts/render_server.sh <input_path> [<input_path> ...] [--port PORT | --socket PATH]
+
+if [ "$#" -eq 0 ]; then
+    echo "Usage: $0 <input_path> [<input_path> ...] [--port PORT | --socket PATH]"
+    exit 1
+fi
+
+# Get the script directory and project root
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+PROJECT_ROOT="$( cd "$SCRIPT_DIR/.." && pwd )"
+
+# Set up Python environment
+cd "$PROJECT_ROOT"
+poetry install
+
+# Add src directory to PYTHONPATH
+export PYTHONPATH="$PROJECT_ROOT:$PYTHONPATH"
+
+exec poetry run python -m src.server "$@"
@@ -5,17 +5,15 @@
 # - Go case by case and update the script to make sure the folder structure is unique
 # - Create a common bash script to handle manual and workflow events
 
-# Function to get SVG files based on event type
-get_svg_files() {
-    find $1 -name '*.svg'
-}
-
 # Main script
 if [ "$#" -lt 1 ]; then
-    echo "Usage: $0 <input_paths>"
+    echo "Usage: [JOBS=N] $0 <input_paths>"
     exit 1
 fi
 
+# Number of parallel conversion processes (0 = all CPUs)
+JOBS="${JOBS:-0}"
+
 # Get the script directory and project root
 SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 PROJECT_ROOT="$( cd "$SCRIPT_DIR/.." && pwd )"
@@ -27,31 +25,22 @@ poetry install
 # Add src directory to PYTHONPATH
 export PYTHONPATH="$PROJECT_ROOT:$PYTHONPATH"
 
-# Process each SVG file
+# Process each input path in a single converter process
 failed_files=()
 
 # Iterate over all input paths
 for input_path in "$@"; do
     echo "Processing $input_path"
-    for svg_file in $(get_svg_files "$input_path"); do
-        echo "Processing $svg_file"
-        if [ -f "$svg_file" ] && [[ "$svg_file" == *.svg ]]; then
-        echo "Converting $svg_file to PDF"
-        output_file="${svg_file%.svg}.pdf"
-        # TODO - why width and height is not working?
-        # if ! poetry run python -m src.svg_to_pdf.converter "$svg_file" --width 11 --height 11; then
-        if ! poetry run python -m src.svg_to_pdf.converter "$svg_file"; then
-            failed_files+=("$svg_file")
-        fi
-        else
-            echo "Warning: $svg_file not found or not an SVG file"
-        fi
-    done
+    # TODO - why width and height is not working?
+    # if ! poetry run python -m src.svg_to_pdf.converter "$input_path" --width 11 --height 11; then
+    if ! poetry run python -m src.svg_to_pdf.converter "$input_path" --jobs "$JOBS"; then
+        failed_files+=("$input_path")
+    fi
 done
 
 # Fail the script if any conversions failed
 if [ ${#failed_files[@]} -ne 0 ]; then
-    echo "Error: Failed to convert the following files:"
+    echo "Error: Failed to convert files in the following paths:"
     printf '%s\n' "${failed_files[@]}"
     exit 1
 fi
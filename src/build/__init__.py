@@ -0,0 +1,10 @@
+"""
+Unified build pipeline for quiz decks.
+
+Runs QR, SVG, PDF and Markdown generation, and optional print-sheet
+imposition, as stages of a single process.
+"""
+
+from src.build.pipeline import DEFAULT_STAGES, STAGES, BuildPipeline, BuildResult
+
+__all__ = ["DEFAULT_STAGES", "STAGES", "BuildPipeline", "BuildResult"]
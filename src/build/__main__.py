@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import sys
+
+from src.build.pipeline import DEFAULT_STAGES, DEFAULT_URL_PREFIX, STAGES, BuildPipeline
+from src.build.watch import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL, DeckWatcher
+from src.file_utils.log import add_logging_arguments, configure_logging
+from src.file_utils.profiling import add_profile_arguments, profile_session
+from src.yaml_to_markdown.generate_markdown import DEFAULT_PAGE_SIZE, SEARCH_INDEX_NAME
+from src.svg_to_pdf.imposition import PAGE_SIZES, SheetLayout
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    """
+    Command-line interface for the unified build pipeline.
+
+    Returns:
+        int: Exit code (0 for success, 1 if any card failed a stage of the
+        initial build, also when watching)
+    """
+    parser = argparse.ArgumentParser(description="Build QR codes, SVGs, PDFs and Markdown for quiz decks.")
+    parser.add_argument("input_paths", nargs="+", help="Paths to deck folders or folders containing decks")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                        help=f"Comma-separated stages to run, out of {','.join(STAGES)} "
+                             f"(default: {','.join(DEFAULT_STAGES)})")
+    parser.add_argument("--url-prefix", default=DEFAULT_URL_PREFIX, help="URL prefix for QR codes")
+    parser.add_argument("--card-width", type=float, default=210, help="Card width in millimeters (default: 210)")
+    parser.add_argument("--card-height", type=float, default=297, help="Card height in millimeters (default: 297)")
+    parser.add_argument("--font-size", type=int, default=12, help="Font size for card text (default: 12)")
+    parser.add_argument("--font-family", default="Arial", help="Font family for card text (default: Arial)")
+    parser.add_argument("--dpi", type=int, default=254,
+                        help="DPI for PDF generation (default: 254, which is ~100px per cm)")
+    parser.add_argument("--force", action="store_true", help="Rebuild every artifact, ignoring the build cache")
+    parser.add_argument("--sheet-grid", default="2x2",
+                        help="Cards per print sheet as COLUMNSxROWS, for the print stage (default: 2x2)")
+    parser.add_argument("--page-size", default="A4", choices=sorted(PAGE_SIZES),
+                        help="Print sheet page size (default: A4)")
+    parser.add_argument("--no-duplex", action="store_true",
+                        help="Print fronts only, without answer back sheets")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write minified SVG with shared CSS styles and no hidden option text")
+    parser.add_argument("--embed-qr", action="store_true",
+                        help="Draw each card's QR code into its SVG as a vector path")
+    parser.add_argument("--index-page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Cards per deck index page (default: {DEFAULT_PAGE_SIZE}; 0 lists every card on index.md)")
+    parser.add_argument("--search-index", action="store_true",
+                        help=f"Also write a JSON search index ({SEARCH_INDEX_NAME}) next to each index.md")
+    parser.add_argument("--watch", action="store_true",
+                        help="After building, keep rebuilding the cards and decks whose YAML files change")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between checks for changes in watch mode (default: {DEFAULT_INTERVAL})")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"Seconds without further changes before rebuilding (default: {DEFAULT_DEBOUNCE})")
+    add_profile_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging(args.quiet, args.verbose)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    try:
+        pipeline = BuildPipeline(
+            args.input_paths,
+            stages=stages,
+            url_prefix=args.url_prefix,
+            card_size=(args.card_width, args.card_height),
+            font_size=args.font_size,
+            font_family=args.font_family,
+            dpi=args.dpi,
+            use_cache=not args.force,
+            sheet_layout=SheetLayout.parse(args.sheet_grid, args.page_size),
+            duplex=not args.no_duplex,
+            compact=args.compact,
+            embed_qr=args.embed_qr,
+            page_size=args.index_page_size,
+            search_index=args.search_index,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    with profile_session(args.profile_out, args.profile_format):
+        result = pipeline.run()
+    if result.errors:
+        logger.error("Errors:")
+        for folder, stage, error in result.errors:
+            logger.error("  [%s] %s: %s", stage, folder, error)
+    if args.watch:
+        try:
+            DeckWatcher(pipeline, args.watch_interval, args.debounce).watch()
+        except KeyboardInterrupt:
+            pass
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Unified build pipeline.
+
+Discovers decks once, loads each card's YAML once and runs the
+QR -> SVG -> PDF -> Markdown stages for every card in a single process,
+instead of invoking each tool's CLI separately. The optional print stage
+imposes a whole deck onto N-up print sheets (<deck>/print.pdf).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from src.file_utils import CacheRegistry, Card, DeckIndex, YAMLLoader, extract_deck_and_card_id, hash_inputs
+from src.file_utils.profiling import span
+from src.qr_generator.generator import DEFAULT_URL_PREFIX, get_encoder, question_url
+from src.svg_to_pdf.converter import SVGToPDFConverter
+from src.svg_to_pdf.imposition import DeckImposer, ImposedCard, SheetLayout
+from src.yaml_to_markdown.generate_markdown import DEFAULT_PAGE_SIZE, YAMLToMarkdown
+from src.yaml_to_svg.generate_svg import YAMLToSVG
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("qr", "svg", "pdf", "markdown", "print")
+DEFAULT_STAGES = ("qr", "svg", "pdf", "markdown")
+
+
+@dataclass
+class BuildResult:
+    """Outcome of a pipeline run: generated files, cache hits and per-card stage errors."""
+    decks: List[str] = field(default_factory=list)
+    generated: Dict[str, List[str]] = field(default_factory=lambda: {stage: [] for stage in STAGES})
+    skipped: Dict[str, int] = field(default_factory=lambda: {stage: 0 for stage in STAGES})
+    errors: List[Tuple[str, str, str]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class BuildPipeline:
+    """Run every generation stage over a set of decks in one process."""
+
+    def __init__(
+        self,
+        input_paths: List[str],
+        stages: Optional[Sequence[str]] = None,
+        url_prefix: str = DEFAULT_URL_PREFIX,
+        card_size: Tuple[float, float] = (210, 297),
+        font_size: int = 12,
+        font_family: str = 'Arial',
+        dpi: int = 254,
+        use_cache: bool = True,
+        sheet_layout: Optional[SheetLayout] = None,
+        duplex: bool = True,
+        compact: bool = False,
+        embed_qr: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        search_index: bool = False,
+    ) -> None:
+        self.input_paths = input_paths
+        self.stages = tuple(stages) if stages is not None else DEFAULT_STAGES
+        unknown = [stage for stage in self.stages if stage not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+        self.url_prefix = url_prefix
+        self.card_size = card_size
+        self.font_size = font_size
+        self.font_family = font_family
+        self.dpi = dpi
+        self.use_cache = use_cache
+        self.caches = CacheRegistry()
+        self.yaml_loader = YAMLLoader()
+        self.qr_encoder = get_encoder()
+        self.pdf_converter = SVGToPDFConverter(dpi=dpi) if "pdf" in self.stages else None
+        self.sheet_layout = sheet_layout or SheetLayout()
+        self.duplex = duplex
+        self.compact = compact
+        self.embed_qr = embed_qr
+        self.page_size = page_size
+        self.search_index = search_index
+
+    def run(self) -> BuildResult:
+        """Discover decks and build every card through the selected stages."""
+        result = BuildResult()
+        deck_index = DeckIndex.discover(self.input_paths, use_cache=self.use_cache)
+        result.decks = deck_index.decks
+        if not result.decks:
+            logger.warning("No deck folders found in the provided input paths.")
+            return result
+        svg_generator, markdown = self.generators(deck_index)
+        for deck in result.decks:
+            logger.debug("Building deck: %s", deck)
+            errors = len(result.errors)
+            cards = []
+            for folder in deck_index.question_folders([deck]):
+                card = self.build_card(folder, svg_generator, markdown, result)
+                if card is not None:
+                    cards.append(card)
+            self.build_deck(deck, cards, svg_generator, markdown, result)
+            logger.info("Built deck %s: %d cards, %d errors", deck, len(cards), len(result.errors) - errors)
+        self.log_summary(result)
+        return result
+
+    def rebuild(self, deck_index: DeckIndex, card_folders: Set[str], decks: Set[str]) -> BuildResult:
+        """
+        Build only what a set of changed files affects, e.g. after edits seen in watch mode.
+
+        Args:
+            deck_index: Current index of the input paths
+            card_folders: Cards whose YAML changed; they go through every per-card stage
+            decks: Decks whose index pages and print sheets must be checked again, with
+                all their cards (because index.yaml changed or cards were added or removed)
+
+        Returns:
+            BuildResult: Outputs of the rebuilt cards and decks
+        """
+        result = BuildResult()
+        result.decks = deck_index.decks
+        if not result.decks:
+            return result
+        svg_generator, markdown = self.generators(deck_index)
+        for deck in result.decks:
+            folders = deck_index.question_folders([deck])
+            built = {}
+            for folder in folders:
+                if folder in card_folders:
+                    built[folder] = self.build_card(folder, svg_generator, markdown, result)
+            if deck in decks:
+                cards = [built[folder] if folder in built else self.load_card(folder, result) for folder in folders]
+                self.build_deck(deck, [card for card in cards if card is not None], svg_generator, markdown, result)
+            elif built:
+                self.caches.save()
+                self.yaml_loader.save()
+        self.log_summary(result)
+        return result
+
+    def generators(self, deck_index: DeckIndex) -> Tuple[YAMLToSVG, Optional[YAMLToMarkdown]]:
+        """The SVG renderer, and the Markdown generator if the markdown stage runs, for the indexed decks."""
+        svg_generator = YAMLToSVG(
+            input_paths=deck_index.decks,
+            card_size=self.card_size,
+            font_size=self.font_size,
+            font_family=self.font_family,
+            use_cache=self.use_cache,
+            compact=self.compact,
+            embed_qr=self.embed_qr,
+            url_prefix=self.url_prefix,
+        )
+        markdown = (YAMLToMarkdown(deck_index.decks, use_cache=self.use_cache, deck_index=deck_index,
+                                   page_size=self.page_size, search_index=self.search_index)
+                    if "markdown" in self.stages else None)
+        return svg_generator, markdown
+
+    def build_deck(
+        self,
+        deck: str,
+        cards: List[Card],
+        svg_generator: YAMLToSVG,
+        markdown: Optional[YAMLToMarkdown],
+        result: BuildResult,
+    ) -> None:
+        """Write a deck's index pages and print sheets from its loaded cards, then save the caches."""
+        if markdown is not None:
+            index_file = Path(deck) / "index.md"
+            digest = markdown.index_digest(deck, cards)
+            cache = self.caches.for_root(deck)
+            try:
+                if self.use_cache and cache.is_fresh(index_file, digest):
+                    result.skipped["markdown"] += 1
+                else:
+                    markdown.process_index(deck, cards)
+                    cache.update(index_file, digest)
+                    result.generated["markdown"].append(str(index_file))
+            except Exception as e:
+                logger.error("Failed to write index for deck %s: %s", deck, e)
+                result.errors.append((deck, "markdown", str(e)))
+        if "print" in self.stages:
+            self.build_print_sheets(deck, cards, svg_generator, result)
+        self.caches.save()
+        self.yaml_loader.save()
+
+    def log_summary(self, result: BuildResult) -> None:
+        logger.info(
+            "Build summary: %s, %d errors.",
+            ", ".join(
+                f"{len(result.generated[stage])} {stage} ({result.skipped[stage]} unchanged)"
+                for stage in self.stages
+            ),
+            len(result.errors)
+        )
+
+    def is_fresh(self, stage: str, output: Path, digest: str, result: BuildResult) -> bool:
+        """Check the build cache for output, counting a hit as skipped for stage."""
+        if self.use_cache and self.caches.for_card(output.parent).is_fresh(output, digest):
+            result.skipped[stage] += 1
+            return True
+        return False
+
+    def load_card(self, folder: str, result: BuildResult) -> Optional[Card]:
+        """Load a card through the shared YAML loader, recording a load error in result on failure."""
+        try:
+            return Card.load(folder, self.yaml_loader)
+        except Exception as e:
+            logger.error("Failed to load card %s: %s", folder, e)
+            result.errors.append((folder, "load", str(e)))
+            return None
+
+    def build_card(
+        self,
+        folder: str,
+        svg_generator: YAMLToSVG,
+        markdown: Optional[YAMLToMarkdown],
+        result: BuildResult,
+    ) -> Optional[Card]:
+        """Load a card once and run it through each selected stage."""
+        deck_name, card_id = extract_deck_and_card_id(folder)
+        if not deck_name or not card_id:
+            result.errors.append((folder, "load", "could not extract deck_name/card_id"))
+            return None
+        card = self.load_card(folder, result)
+        if card is None:
+            return None
+
+        folder_path = Path(folder)
+        cache = self.caches.for_card(folder)
+        if "qr" in self.stages:
+            qr_file = folder_path / "qr.png"
+            url = question_url(deck_name, card_id, self.url_prefix)
+            digest = self.qr_encoder.digest(url)
+            if not self.is_fresh("qr", qr_file, digest, result):
+                qr_path = self.qr_encoder.save(url, str(qr_file))
+                if qr_path:
+                    cache.update(qr_path, digest)
+                    result.generated["qr"].append(qr_path)
+                else:
+                    result.errors.append((folder, "qr", "QR code generation failed"))
+
+        # content.svg is a side output: the PDF is rendered from the in-memory document
+        svg_file = folder_path / "content.svg"
+        pdf_file = folder_path / "content.pdf"
+        svg_digest = svg_generator.card_digest(folder)
+        pdf_digest = svg_generator.card_digest(folder, {'dpi': self.dpi})
+        write_svg = "svg" in self.stages and not self.is_fresh("svg", svg_file, svg_digest, result)
+        write_pdf = self.pdf_converter is not None and not self.is_fresh("pdf", pdf_file, pdf_digest, result)
+        if write_svg or write_pdf:
+            try:
+                svg = svg_generator.create_svg_card(card, card_id, write_svg=write_svg)
+            except Exception as e:
+                logger.error("Failed to create SVG for %s: %s", folder, e)
+                result.errors.append((folder, "svg" if write_svg else "pdf", str(e)))
+            else:
+                if write_svg:
+                    cache.update(svg_file, svg_digest)
+                    result.generated["svg"].append(str(svg_file))
+                if write_pdf and self.pdf_converter is not None:
+                    if self.pdf_converter.convert_svg(svg, str(pdf_file), base_dir=folder):
+                        cache.update(pdf_file, pdf_digest)
+                        result.generated["pdf"].append(str(pdf_file))
+                    else:
+                        result.errors.append((folder, "pdf", "PDF conversion failed"))
+
+        if markdown is not None:
+            md_file = folder_path / "content.md"
+            digest = markdown.card_digest(folder)
+            if not self.is_fresh("markdown", md_file, digest, result):
+                if markdown.process_card(card):
+                    cache.update(md_file, digest)
+                    result.generated["markdown"].append(str(md_file))
+                else:
+                    result.errors.append((folder, "markdown", "Markdown generation failed"))
+
+        return card
+
+    def build_print_sheets(
+        self,
+        deck: str,
+        cards: List[Card],
+        svg_generator: YAMLToSVG,
+        result: BuildResult,
+    ) -> None:
+        """Impose every card of a deck, with answer backs when duplex, into <deck>/print.pdf."""
+        print_file = Path(deck) / "print.pdf"
+        inputs: List[Path] = []
+        for card in cards:
+            folder = Path(str(card.folder))
+            inputs.extend([folder / "content.yaml", folder / "answers.yaml", folder / "qr.png"])
+        layout = self.sheet_layout
+        digest = hash_inputs(inputs, {
+            'cards': [card.id for card in cards],
+            'render': svg_generator.render_options,
+            'dpi': self.dpi,
+            'page_size': layout.page_size,
+            'grid': [layout.columns, layout.rows],
+            'duplex': self.duplex,
+        })
+        cache = self.caches.for_root(deck)
+        if self.use_cache and cache.is_fresh(print_file, digest):
+            result.skipped["print"] += 1
+            return
+        try:
+            imposed = []
+            for card in cards:
+                front = svg_generator.create_svg_card(card, card.id, write_svg=False)
+                back = svg_generator.create_svg_back(card, card.id) if self.duplex else None
+                imposed.append(ImposedCard(front=front, back=back, base_dir=card.folder))
+            with span("print"):
+                pages = DeckImposer(layout, dpi=self.dpi).impose(imposed, str(print_file), duplex=self.duplex)
+            if pages:
+                cache.update(print_file, digest)
+                result.generated["print"].append(str(print_file))
+        except Exception as e:
+            logger.error("Failed to impose print sheets for deck %s: %s", deck, e)
+            result.errors.append((deck, "print", str(e)))
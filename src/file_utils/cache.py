@@ -0,0 +1,138 @@
+"""
+Content-hash build cache.
+
+Keeps a manifest per deck (``<deck>/.quiz-cache/manifest.json``) that maps each
+generated artifact to a digest of the inputs it was built from: the input file
+contents, the render options and the tool version. Generators consult it to
+skip cards whose inputs have not changed since the last run.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from src import __version__
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = ".quiz-cache"
+MANIFEST_NAME = "manifest.json"
+
+PathLike = Union[str, Path]
+
+
+def hash_inputs(inputs: Iterable[PathLike], options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Compute a digest of input files, render options and the tool version.
+
+    Args:
+        inputs: Files the artifact is generated from (missing files hash as absent)
+        options: Render options that affect the output, e.g. card size or DPI
+
+    Returns:
+        str: Hex digest identifying this exact set of inputs
+    """
+    digest = hashlib.sha256()
+    digest.update(f"quiz-tools {__version__}\0".encode('utf-8'))
+    for path in inputs:
+        p = Path(path)
+        digest.update(f"{p.name}\0".encode('utf-8'))
+        try:
+            digest.update(hashlib.sha256(p.read_bytes()).digest())
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+    digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Manifest of artifact digests for a single deck (or any output root)."""
+
+    def __init__(self, root: PathLike):
+        self.root = Path(root)
+        self.manifest_path = self.root / CACHE_DIR / MANIFEST_NAME
+        self.entries: Dict[str, str] = {}
+        self.changed: Dict[str, Optional[str]] = {}
+        self.entries = self._read()
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable build cache %s: %s", self.manifest_path, e)
+            return {}
+        if not isinstance(data, dict) or data.get('version') != __version__:
+            return {}
+        entries = data.get('entries', {})
+        return entries if isinstance(entries, dict) else {}
+
+    def _key(self, output: PathLike) -> str:
+        path = Path(output)
+        try:
+            return path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(path.resolve())
+
+    def is_fresh(self, output: PathLike, digest: str) -> bool:
+        """Return True if output exists and was last built from inputs with this digest."""
+        return self.entries.get(self._key(output)) == digest and Path(output).exists()
+
+    def update(self, output: PathLike, digest: str) -> None:
+        """Record that output has been built from inputs with this digest."""
+        key = self._key(output)
+        if self.entries.get(key) != digest:
+            self.entries[key] = digest
+            self.changed[key] = digest
+
+    def invalidate(self, output: PathLike) -> None:
+        """Forget output, so that it is rebuilt on the next run."""
+        key = self._key(output)
+        if key in self.entries:
+            del self.entries[key]
+            self.changed[key] = None
+
+    def save(self) -> None:
+        """Merge the entries changed in this run into the manifest on disk."""
+        if not self.changed:
+            return
+        entries = self._read()
+        for key, digest in self.changed.items():
+            if digest is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = digest
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(
+            json.dumps({'version': __version__, 'entries': entries}, indent=2, sort_keys=True),
+            encoding='utf-8'
+        )
+        os.replace(tmp_path, self.manifest_path)
+        self.entries = entries
+        self.changed = {}
+
+
+class CacheRegistry:
+    """Lazily opens one BuildCache per deck and saves them all at the end of a run."""
+
+    def __init__(self) -> None:
+        self.caches: Dict[Path, BuildCache] = {}
+
+    def for_root(self, root: PathLike) -> BuildCache:
+        key = Path(root).resolve()
+        if key not in self.caches:
+            self.caches[key] = BuildCache(key)
+        return self.caches[key]
+
+    def for_card(self, card_folder: PathLike) -> BuildCache:
+        """Return the cache of the deck that owns card_folder (<deck>/cards/<id>)."""
+        return self.for_root(Path(card_folder).parent.parent)
+
+    def save(self) -> None:
+        for cache in self.caches.values():
+            cache.save()
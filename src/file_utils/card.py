@@ -0,0 +1,146 @@
+"""
+Card model shared by the QR, SVG, PDF and Markdown generators.
+
+A card is loaded once from its folder (``content.yaml`` plus ``answers.yaml``)
+and passed to every stage. Optional fields are only converted to their typed
+form when first accessed, and answers.yaml is only read when the answers are.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.file_utils.yaml_loader import YAMLLoader, load_yaml
+
+
+class Answer:
+    """One entry of answers.yaml: the answer to the option at position order."""
+    __slots__ = ('order', 'option', 'answer')
+
+    def __init__(self, order: int, option: str, answer: str) -> None:
+        self.order = order
+        self.option = option
+        self.answer = answer
+
+    @classmethod
+    def parse(cls, value: Any, index: int, options: List[str]) -> "Answer":
+        """Build an answer from an answers.yaml entry, a mapping or a bare value."""
+        default_option = options[index] if index < len(options) else ''
+        if isinstance(value, dict):
+            return cls(
+                int(value.get('order', index + 1)),
+                str(value.get('option', default_option)),
+                str(value.get('answer', '')),
+            )
+        return cls(index + 1, default_option, str(value))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Answer):
+            return NotImplemented
+        return (self.order, self.option, self.answer) == (other.order, other.option, other.answer)
+
+    def __repr__(self) -> str:
+        return f"Answer(order={self.order!r}, option={self.option!r}, answer={self.answer!r})"
+
+
+def _answers_list(data: Any) -> List[Any]:
+    """Return the answers whether answers.yaml holds a list or an {'answers': [...]} mapping."""
+    if isinstance(data, dict):
+        data = data.get('answers')
+    return data if isinstance(data, list) else []
+
+
+class Card:
+    """Represents a quiz card with its content and metadata."""
+    __slots__ = ('id', 'content', 'folder', '_loader', '_answers', '_sources', '_embedded_contents')
+
+    def __init__(
+        self,
+        id: str,
+        content: Dict[str, Any],
+        folder: Optional[str] = None,
+        loader: Optional[YAMLLoader] = None,
+    ) -> None:
+        self.id = id
+        self.content = content
+        self.folder = folder if folder is not None else content.get('question_folder')
+        self._loader = loader
+        self._answers: Optional[Tuple[Answer, ...]] = None
+        self._sources: Optional[Tuple[str, ...]] = None
+        self._embedded_contents: Optional[Tuple[Dict[str, Any], ...]] = None
+
+    @classmethod
+    def load(cls, folder: Union[str, Path], loader: Optional[YAMLLoader] = None) -> "Card":
+        """
+        Load a card from its folder.
+
+        Args:
+            folder: Card folder holding content.yaml and answers.yaml
+            loader: Loader whose parsed-data cache is used for both files (default: no cache)
+
+        Returns:
+            Card: The card, identified by the folder name
+
+        Raises:
+            FileNotFoundError: If content.yaml does not exist
+            ValueError: If content.yaml does not hold a mapping
+        """
+        card_file = Path(folder) / "content.yaml"
+        content = loader.load(card_file) if loader is not None else load_yaml(card_file)
+        if not isinstance(content, dict):
+            raise ValueError(f"YAML file {card_file} did not return a dict")
+        content['question_folder'] = str(folder)
+        content['id'] = Path(folder).name
+        return cls(Path(folder).name, content, str(folder), loader)
+
+    @property
+    def question_text(self) -> str:
+        value = self.content.get('question_content',
+                  self.content.get('question',
+                  self.content.get('content', 'No question content')))
+        return str(value)
+
+    @property
+    def options(self) -> List[str]:
+        return [str(option) for option in self.content.get('options') or []]
+
+    @property
+    def url(self) -> Optional[str]:
+        url = self.content.get('url')
+        return str(url) if url else None
+
+    @property
+    def answers(self) -> Tuple[Answer, ...]:
+        """Answers from the content's 'answers' key, or else from answers.yaml in the card folder."""
+        if self._answers is None:
+            if 'answers' in self.content:
+                data = self.content['answers']
+            elif self.folder is not None and (Path(self.folder) / "answers.yaml").exists():
+                answers_file = Path(self.folder) / "answers.yaml"
+                data = self._loader.load(answers_file) if self._loader is not None else load_yaml(answers_file)
+            else:
+                data = None
+            options = self.options
+            self._answers = tuple(Answer.parse(value, i, options) for i, value in enumerate(_answers_list(data)))
+        return self._answers
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        if self._sources is None:
+            self._sources = tuple(str(source) for source in self.content.get('sources') or [])
+        return self._sources
+
+    @property
+    def embedded_contents(self) -> Tuple[Dict[str, Any], ...]:
+        if self._embedded_contents is None:
+            self._embedded_contents = tuple(
+                item for item in self.content.get('embedded_contents') or [] if isinstance(item, dict)
+            )
+        return self._embedded_contents
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Card):
+            return NotImplemented
+        return (self.id, self.content) == (other.id, other.content)
+
+    def __repr__(self) -> str:
+        return f"Card(id={self.id!r}, content={self.content!r})"
@@ -0,0 +1,256 @@
+"""
+Deck and card discovery index.
+
+Walks the input paths once with ``os.scandir`` and records, for every directory
+visited, its mtime, its subdirectories and the mtimes of the deck YAML files it
+holds. The index can be saved to ``<path>/.quiz-cache/deck-index.json``; on the
+next run a directory whose mtime is unchanged is not listed again, so discovery
+on a large, mostly unchanged tree costs one stat call per directory.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src import __version__
+from src.file_utils.cache import CACHE_DIR
+from src.file_utils.profiling import span
+
+logger = logging.getLogger(__name__)
+
+DECK_INDEX_NAME = "deck-index.json"
+TRACKED_FILES = ("index.yaml", "content.yaml", "answers.yaml")
+
+PathLike = Union[str, Path]
+# {'mtime': int, 'entries': int, 'dirs': [name, ...], 'files': {name: mtime_ns}}
+Node = Dict[str, Any]
+
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+
+class DeckIndex:
+    """
+    Decks, cards and YAML file mtimes found under a set of input paths.
+
+    A directory containing index.yaml is a deck; its cards are the folders in
+    <deck>/cards holding both content.yaml and answers.yaml. Other directories
+    are searched recursively, skipping hidden ones such as .git and .quiz-cache.
+    Symlinked directories are not followed, except for the input paths themselves.
+    """
+
+    def __init__(self) -> None:
+        # Input path -> directory path relative to it ('' for the input path) -> node
+        self.trees: Dict[str, Dict[str, Node]] = {}
+        # Directories listed with scandir, and reused from a previous index, by the last scan
+        self.listed = 0
+        self.reused = 0
+
+    @classmethod
+    def scan(
+        cls,
+        input_paths: Iterable[PathLike],
+        previous: Optional["DeckIndex"] = None,
+        seen: Optional[Set[str]] = None,
+        decks: bool = False,
+    ) -> "DeckIndex":
+        """
+        Walk input_paths, listing only the directories that changed since previous.
+
+        Args:
+            input_paths: Deck folders or folders containing decks
+            previous: Index of an earlier scan whose unchanged directories are reused
+            seen: Resolved input paths to skip; paths scanned here are added to it
+            decks: Treat every input path as a deck, even without an index.yaml
+
+        Returns:
+            DeckIndex: The refreshed index
+        """
+        index = cls()
+        seen = set() if seen is None else seen
+        for path in input_paths:
+            root = str(Path(path))
+            resolved = os.path.realpath(root)
+            if resolved == os.sep or resolved in seen or not os.path.isdir(root):
+                continue
+            seen.add(resolved)
+            old = previous.trees.get(root, {}) if previous is not None else {}
+            tree: Dict[str, Node] = {}
+            index._walk(root, "", old, tree, deck=decks)
+            index.trees[root] = tree
+        return index
+
+    @classmethod
+    def discover(cls, input_paths: Iterable[PathLike], use_cache: bool = True) -> "DeckIndex":
+        """
+        Scan input_paths, reusing and refreshing the index saved in each <path>/.quiz-cache.
+
+        Args:
+            input_paths: Deck folders or folders containing decks
+            use_cache: Load and save the on-disk index (default: True)
+
+        Returns:
+            DeckIndex: Index of all input paths
+        """
+        input_paths = list(input_paths)
+        index = cls()
+        seen: Set[str] = set()
+        with span("discovery"):
+            for path in input_paths:
+                cache_file = Path(path) / CACHE_DIR / DECK_INDEX_NAME
+                previous = cls.load(cache_file) if use_cache else None
+                part = cls.scan([path], previous, seen)
+                index.trees.update(part.trees)
+                index.listed += part.listed
+                index.reused += part.reused
+                if use_cache and part.trees and (previous is None or part.trees != previous.trees):
+                    try:
+                        part.save(cache_file)
+                    except OSError as e:
+                        logger.warning("Could not save deck index %s: %s", cache_file, e)
+        logger.info(
+            "Found %d decks in %s (%d directories listed, %d unchanged)",
+            len(index.decks), list(map(str, input_paths)), index.listed, index.reused
+        )
+        return index
+
+    def _walk(self, root: str, rel: str, old: Dict[str, Node], tree: Dict[str, Node], deck: bool = False) -> None:
+        node = self._list(os.path.join(root, rel) if rel else root, old.get(rel))
+        if node is None:
+            return
+        tree[rel] = node
+        if deck or "index.yaml" in node['files']:
+            if "cards" in node['dirs']:
+                cards_rel = _join(rel, "cards")
+                cards = self._list(os.path.join(root, cards_rel), old.get(cards_rel))
+                if cards is not None:
+                    tree[cards_rel] = cards
+                    for name in cards['dirs']:
+                        card_rel = _join(cards_rel, name)
+                        card = self._list(os.path.join(root, card_rel), old.get(card_rel))
+                        if card is not None:
+                            tree[card_rel] = card
+            return
+        for name in node['dirs']:
+            self._walk(root, _join(rel, name), old, tree)
+
+    def _list(self, path: str, previous: Optional[Node]) -> Optional[Node]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        if previous is not None and previous.get('mtime') == mtime:
+            self.reused += 1
+            return previous
+        self.listed += 1
+        dirs = []
+        files = {}
+        entries = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    entries += 1
+                    if entry.name in TRACKED_FILES and entry.is_file():
+                        files[entry.name] = entry.stat().st_mtime_ns
+                    elif not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+        except OSError as e:
+            logger.warning("Could not list %s: %s", path, e)
+            return None
+        return {'mtime': mtime, 'entries': entries, 'dirs': sorted(dirs), 'files': files}
+
+    def _locate(self, path: PathLike) -> Optional[Tuple[str, str]]:
+        """Return the (input path, relative path) of an indexed directory."""
+        for root, tree in self.trees.items():
+            rel = os.path.relpath(path, root)
+            if rel == os.curdir:
+                rel = ""
+            rel = Path(rel).as_posix() if rel else rel
+            if rel in tree:
+                return root, rel
+        return None
+
+    @property
+    def decks(self) -> List[str]:
+        """Deck folders with a non-empty cards folder, in walk order."""
+        decks = []
+        for root, tree in self.trees.items():
+            for rel, node in tree.items():
+                cards = tree.get(_join(rel, "cards"))
+                if "index.yaml" in node['files'] and cards is not None and cards['entries'] > 0:
+                    decks.append(os.path.join(root, rel) if rel else root)
+        return decks
+
+    def question_folders(self, deck_paths: Optional[Iterable[PathLike]] = None) -> List[str]:
+        """
+        Return the card folders of the given decks (default: all indexed decks).
+
+        Args:
+            deck_paths: Deck folders as returned by decks
+
+        Returns:
+            List[str]: Folders holding both content.yaml and answers.yaml, sorted by card id
+        """
+        folders = []
+        for deck in (self.decks if deck_paths is None else deck_paths):
+            location = self._locate(deck)
+            if location is None:
+                continue
+            root, rel = location
+            tree = self.trees[root]
+            cards_rel = _join(rel, "cards")
+            cards = tree.get(cards_rel)
+            if cards is None:
+                continue
+            for name in cards['dirs']:
+                card = tree.get(_join(cards_rel, name))
+                if card is not None and "content.yaml" in card['files'] and "answers.yaml" in card['files']:
+                    folders.append(str(Path(deck) / "cards" / name))
+        return folders
+
+    def file_mtime(self, path: PathLike) -> Optional[int]:
+        """
+        Return the recorded mtime (ns) of a deck YAML file, or None if it is not indexed.
+
+        The mtime is the one seen when the file's directory was last listed: a file
+        rewritten in place, without being replaced, does not change its directory's mtime.
+        """
+        p = Path(path)
+        location = self._locate(p.parent)
+        if location is None:
+            return None
+        root, rel = location
+        mtime = self.trees[root][rel]['files'].get(p.name)
+        return int(mtime) if mtime is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': __version__, 'trees': self.trees}
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "DeckIndex":
+        index = cls()
+        if isinstance(data, dict) and data.get('version') == __version__ and isinstance(data.get('trees'), dict):
+            index.trees = data['trees']
+        return index
+
+    def save(self, path: PathLike) -> None:
+        """Write the index to path atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.to_dict(), sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "DeckIndex":
+        """Read an index saved by save, returning an empty index if it is missing or unreadable."""
+        try:
+            return cls.from_dict(json.loads(Path(path).read_text(encoding='utf-8')))
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable deck index %s: %s", path, e)
+            return cls()
@@ -0,0 +1,50 @@
+"""
+Logging setup shared by the command-line entry points.
+
+Library modules only create their loggers; the handler and level are set by
+``configure_logging``, called from each entry point after parsing its
+arguments. Per-deck summaries are logged at INFO and per-card detail at
+DEBUG, so ``--quiet`` (warnings and errors only) keeps CI logs short and
+``--verbose`` shows every card.
+"""
+
+import argparse
+import logging
+import sys
+from typing import Optional, TextIO
+
+LOG_FORMAT = '%(levelname)s: %(message)s'
+
+
+def log_level(quiet: bool = False, verbose: bool = False) -> int:
+    """Return the root log level for the --quiet and --verbose options."""
+    if quiet:
+        return logging.WARNING
+    if verbose:
+        return logging.DEBUG
+    return logging.INFO
+
+
+def configure_logging(quiet: bool = False, verbose: bool = False, stream: Optional[TextIO] = None) -> None:
+    """
+    Send log records to stream (stderr by default) at the level set by --quiet or --verbose.
+
+    Replaces handlers installed by an earlier call, so entry points that call
+    each other do not log every record twice.
+
+    Args:
+        quiet: Only log warnings and errors
+        verbose: Also log per-card detail
+        stream: Stream to write records to
+    """
+    logging.basicConfig(level=log_level(quiet, verbose), stream=stream or sys.stderr,
+                        format=LOG_FORMAT, force=True)
+
+
+def add_logging_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the mutually exclusive -q/--quiet and -v/--verbose options shared by every entry point."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-q', '--quiet', action='store_true',
+                       help='Only log warnings and errors')
+    group.add_argument('-v', '--verbose', action='store_true',
+                       help='Also log per-card detail')
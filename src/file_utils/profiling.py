@@ -0,0 +1,196 @@
+"""
+Stage instrumentation.
+
+Generators wrap each unit of work in ``span(stage, card)``, which records its
+wall time, the CPU time of the calling thread and, where ``/proc/self/io`` is
+available (Linux), the bytes read and written through system calls. Recording
+is off unless an entry point was run with ``--profile-out``; a disabled span
+costs one attribute lookup. Recorded spans are written either as JSON, with
+per-stage totals, or as a Chrome trace that chrome://tracing and Perfetto
+can open.
+
+Spans are recorded per process: with ``--jobs`` greater than 1, the work done
+in worker processes is not included. Byte counts are process-wide, so they
+are only exact for spans that do not overlap with other threads.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple, Union
+
+PROFILE_FORMATS = ("json", "chrome")
+
+IO_COUNTERS_FILE = "/proc/self/io"
+
+_NULL_SPAN: ContextManager[None] = nullcontext()
+
+
+def _io_counters() -> Optional[Tuple[int, int, int]]:
+    """Return the process's (bytes read, bytes written, size of this read) or None if unsupported."""
+    try:
+        with open(IO_COUNTERS_FILE, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    values = dict(line.split(b': ', 1) for line in data.splitlines() if b': ' in line)
+    return int(values.get(b'rchar', 0)), int(values.get(b'wchar', 0)), len(data)
+
+
+class Profiler:
+    """Collect timing and I/O spans for the stages of one run."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: List[Dict[str, Any]] = []
+        self.origin = time.perf_counter()
+        self.track_io = os.path.exists(IO_COUNTERS_FILE)
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording, discarding spans recorded before."""
+        self.spans = []
+        self.origin = time.perf_counter()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    @contextmanager
+    def span(self, stage: str, card: Optional[str] = None) -> Iterator[None]:
+        """Record the wall time, CPU time and I/O of the enclosed block as one span of stage."""
+        io_start = _io_counters() if self.track_io else None
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            cpu = time.thread_time() - cpu_start
+            end = time.perf_counter()
+            io_end = _io_counters() if io_start is not None else None
+            record: Dict[str, Any] = {
+                'stage': stage,
+                'card': card,
+                'start': start - self.origin,
+                'wall': end - start,
+                'cpu': cpu,
+                'bytes_read': None,
+                'bytes_written': None,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            }
+            if io_start is not None and io_end is not None:
+                # The first counters read itself is counted in the second one
+                record['bytes_read'] = max(0, io_end[0] - io_start[0] - io_start[2])
+                record['bytes_written'] = io_end[1] - io_start[1]
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per stage: span count, wall and CPU seconds, bytes read and written, cards."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for record in self.spans:
+            totals = stages.setdefault(record['stage'], {
+                'count': 0, 'wall': 0.0, 'cpu': 0.0, 'bytes_read': 0, 'bytes_written': 0, 'cards': set(),
+            })
+            totals['count'] += 1
+            totals['wall'] += record['wall']
+            totals['cpu'] += record['cpu']
+            totals['bytes_read'] += record['bytes_read'] or 0
+            totals['bytes_written'] += record['bytes_written'] or 0
+            if record['card'] is not None:
+                totals['cards'].add(record['card'])
+        for totals in stages.values():
+            totals['cards'] = len(totals['cards'])
+        return stages
+
+    def to_json(self) -> Dict[str, Any]:
+        """Per-stage totals plus every span, with times in seconds from the start of recording."""
+        return {
+            'io_counters': self.track_io,
+            'stages': self.summary(),
+            'spans': self.spans,
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Spans as complete ("X") events of the Chrome trace event format, in microseconds."""
+        events = []
+        for record in self.spans:
+            events.append({
+                'name': f"{record['stage']} {record['card']}" if record['card'] is not None else record['stage'],
+                'cat': record['stage'],
+                'ph': 'X',
+                'ts': round(record['start'] * 1e6, 3),
+                'dur': round(record['wall'] * 1e6, 3),
+                'pid': record['pid'],
+                'tid': record['tid'],
+                'args': {
+                    'card': record['card'],
+                    'cpu_ms': round(record['cpu'] * 1e3, 3),
+                    'bytes_read': record['bytes_read'],
+                    'bytes_written': record['bytes_written'],
+                },
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: Union[str, Path], format: str = "json") -> None:
+        """
+        Write the recorded spans to path.
+
+        Args:
+            path: Output file
+            format: "json" for per-stage totals and spans, "chrome" for a Chrome trace
+
+        Raises:
+            ValueError: If format is not one of PROFILE_FORMATS
+        """
+        if format not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format: {format}")
+        data = self.to_chrome_trace() if format == "chrome" else self.to_json()
+        Path(path).write_text(json.dumps(data, indent=1), encoding='utf-8')
+
+
+PROFILER = Profiler()
+
+
+def span(stage: str, card: Optional[str] = None) -> ContextManager[None]:
+    """Record the enclosed block as a span of stage (for card, if given) when profiling is enabled."""
+    if not PROFILER.enabled:
+        return _NULL_SPAN
+    return PROFILER.span(stage, card)
+
+
+def card_of(path: Union[str, Path]) -> Optional[str]:
+    """Card id of a file in a card folder (<deck>/cards/<id>/<file>), or None."""
+    p = Path(path)
+    return p.parent.name if p.parent.parent.name == "cards" else None
+
+
+@contextmanager
+def profile_session(path: Optional[str], format: str = "json") -> Iterator[Profiler]:
+    """
+    Record spans for the enclosed block and write them to path, if path is given.
+
+    The profile is written even if the block raises.
+    """
+    if not path:
+        yield PROFILER
+        return
+    PROFILER.enable()
+    try:
+        yield PROFILER
+    finally:
+        PROFILER.disable()
+        PROFILER.write(path, format)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --profile-out and --profile-format options shared by every entry point."""
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help='Write per-stage and per-card timings and I/O to FILE')
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default='json',
+                        help='Profile format: JSON totals and spans, or a Chrome trace (default: json)')
@@ -0,0 +1,59 @@
+"""
+Content-aware file writes.
+
+``write_if_changed`` leaves a file alone when it already holds the content to
+be written, so regenerating a site does not touch the mtimes of unchanged
+pages or add them to the next gh-pages commit, and replaces it atomically
+(temp file plus rename) when it does not, so readers never see a partially
+written page.
+"""
+
+import os
+import stat
+import tempfile
+from pathlib import Path
+from typing import Union
+
+PathLike = Union[str, Path]
+
+# Permissions of newly created files; existing files keep theirs
+DEFAULT_MODE = 0o644
+
+
+def write_if_changed(path: PathLike, content: Union[str, bytes], encoding: str = 'utf-8') -> bool:
+    """
+    Write content to path unless the file already holds exactly that content.
+
+    Args:
+        path: File to write; its parent directory must exist
+        content: Text (encoded with encoding) or bytes to write
+        encoding: Encoding of text content
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date
+    """
+    data = content.encode(encoding) if isinstance(content, str) else content
+    p = Path(path)
+    mode = DEFAULT_MODE
+    try:
+        st = p.stat()
+        # Only read files of the right size back for comparison
+        if st.st_size == len(data) and p.read_bytes() == data:
+            return False
+        mode = stat.S_IMODE(st.st_mode)
+    except FileNotFoundError:
+        pass
+    fd, tmp_path = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates the file private to the user; give it the usual permissions
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, p)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
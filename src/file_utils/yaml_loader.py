@@ -0,0 +1,150 @@
+"""
+Shared YAML loading.
+
+Parses YAML with libyaml's ``CSafeLoader`` when PyYAML was built with it,
+falling back to the pure-Python ``SafeLoader``. ``YAMLLoader`` additionally
+keeps the parsed data of each deck's YAML files in
+``<deck>/.quiz-cache/parsed.json``, together with the hash of the file
+content it was parsed from, so that builds over unchanged cards skip YAML
+parsing entirely. The cache is JSON rather than pickle because deck trees
+are published: loading it must not be able to run code. Files holding values
+JSON cannot represent (dates, binary data, non-string keys) are not cached.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Set, Tuple, Union
+
+import yaml
+
+from src import __version__
+from src.file_utils.cache import CACHE_DIR
+from src.file_utils.profiling import card_of, span
+
+logger = logging.getLogger(__name__)
+
+PARSED_CACHE_NAME = "parsed.json"
+
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+PathLike = Union[str, Path]
+
+
+def load_yaml(path: PathLike) -> Any:
+    """Parse a YAML file with the fastest available safe loader."""
+    with span("yaml_load", card_of(path)), open(path, 'rb') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+def cache_root(path: PathLike) -> Path:
+    """Return the deck folder whose cache holds path (<deck>/index.yaml or <deck>/cards/<id>/*.yaml)."""
+    p = Path(path)
+    if p.parent.parent.name == "cards":
+        return p.parent.parent.parent
+    return p.parent
+
+
+class YAMLLoader:
+    """Parse YAML files, reusing the parsed data of unchanged files from the per-deck cache."""
+
+    def __init__(self, use_cache: bool = True) -> None:
+        self.use_cache = use_cache
+        # Deck folder -> file path relative to it -> (content hash, parsed data as JSON text)
+        self.entries: Dict[Path, Dict[str, Tuple[str, str]]] = {}
+        self.changed: Set[Path] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_file(self, root: Path) -> Path:
+        return root / CACHE_DIR / PARSED_CACHE_NAME
+
+    def _read(self, cache_file: Path) -> Dict[str, Tuple[str, str]]:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != __version__:
+            return {}
+        return {
+            key: (entry[0], entry[1])
+            for key, entry in data.get('entries', {}).items()
+            if isinstance(entry, list) and len(entry) == 2
+            and isinstance(entry[0], str) and isinstance(entry[1], str)
+        }
+
+    def _entries(self, root: Path) -> Dict[str, Tuple[str, str]]:
+        if root not in self.entries:
+            entries: Dict[str, Tuple[str, str]] = {}
+            try:
+                entries = self._read(self._cache_file(root))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("Ignoring unreadable YAML cache %s: %s", self._cache_file(root), e)
+            self.entries[root] = entries
+        return self.entries[root]
+
+    def load(self, path: PathLike) -> Any:
+        """
+        Parse a YAML file, or return its cached parsed data if its content is unchanged.
+
+        Args:
+            path: YAML file to load
+
+        Returns:
+            Any: The parsed data; each call returns a new object that callers may modify
+
+        Raises:
+            FileNotFoundError: If path does not exist
+            yaml.YAMLError: If the file is not valid YAML
+        """
+        if not self.use_cache:
+            return load_yaml(path)
+        with span("yaml_load", card_of(path)):
+            return self._load(path)
+
+    def _load(self, path: PathLike) -> Any:
+        raw = Path(path).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        root = cache_root(path).resolve()
+        key = Path(path).resolve().relative_to(root).as_posix()
+        entries = self._entries(root)
+        cached = entries.get(key)
+        if cached is not None and cached[0] == digest:
+            try:
+                data = json.loads(cached[1])
+            except ValueError:
+                pass
+            else:
+                self.hits += 1
+                return data
+        self.misses += 1
+        data = yaml.load(raw, Loader=SafeLoader)
+        try:
+            text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+        except (TypeError, ValueError):
+            return data
+        if json.loads(text) == data:
+            entries[key] = (digest, text)
+            self.changed.add(root)
+        return data
+
+    def save(self) -> None:
+        """Write the caches that gained entries in this run, merging entries saved meanwhile."""
+        for root in self.changed:
+            cache_file = self._cache_file(root)
+            entries = self.entries[root]
+            try:
+                entries = dict(self._read(cache_file), **entries)
+            except Exception:
+                pass
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_file.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': __version__, 'entries': entries}, f, ensure_ascii=False)
+                os.replace(tmp_path, cache_file)
+            except OSError as e:
+                logger.warning("Could not save YAML cache %s: %s", cache_file, e)
+        self.changed = set()
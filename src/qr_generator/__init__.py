@@ -1,3 +1,3 @@
-from .generator import generate_qr_code, generate_question_qr_code
+from .generator import QREncoder, generate_qr_code, generate_question_qr_code, get_encoder
 
-__all__ = ['generate_qr_code', 'generate_question_qr_code'] 
\ No newline at end of file
+__all__ = ['QREncoder', 'generate_qr_code', 'generate_question_qr_code', 'get_encoder'] 
\ No newline at end of file
@@ -1,50 +1,168 @@
 #!/usr/bin/env python3
 
 import argparse
-from .generator import generate_question_qr_code
-from src.file_utils import get_question_folders, get_deck_folders, extract_deck_and_card_id
+import logging
+import os
+from .generator import DEFAULT_URL_PREFIX, QREncoder, generate_question_qr_code, get_encoder, question_url
+from src.file_utils import CacheRegistry, DeckIndex, extract_deck_and_card_id
+from src.file_utils.log import add_logging_arguments, configure_logging
+from src.file_utils.profiling import add_profile_arguments, profile_session
 from typing import Callable, List, Tuple, Optional
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def log_progress(done: int, total: int) -> None:
+    """Default progress reporter: one log line per tenth of the batch."""
+    step = max(1, total // 10)
+    if done == total or done % step == 0:
+        logger.info("QR codes: %d/%d done", done, total)
+
+
 def process_questions(
     questionFolders: List[str],
-    generate_question_qr_code: Callable[[str, str, str, str], Optional[str]],
-    url_prefix: str
+    url_prefix: str,
+    *,
+    cache: Optional[CacheRegistry] = None,
+    encoder: Optional[QREncoder] = None,
+    jobs: int = 1,
+    progress: Optional[ProgressCallback] = log_progress
 ) -> Tuple[List[str], List[str]]:
-    generated = []
+    """
+    Generate the QR codes of a batch of cards with one shared encoder.
+    
+    Codes whose URL and encoder settings are unchanged since the last run, per
+    the build cache, are neither encoded nor written. The others are generated
+    in this process or, with jobs > 1, in chunks on a process pool; results are
+    collected in card order either way.
+    
+    Args:
+        questionFolders: Card folders (<deck>/cards/<id>)
+        url_prefix: The prefix for the card URLs
+        cache: Build caches to check and update (default: regenerate every code)
+        encoder: Encoder to use (default: the shared default encoder)
+        jobs: Number of worker processes (1 generates in this process, 0 uses all CPUs)
+        progress: Called with (codes done, codes to generate) as codes complete
+        
+    Returns:
+        Tuple[List[str], List[str]]: Paths of the QR codes generated in this run,
+        and the card folders that failed, both in card order
+        
+    Raises:
+        TypeError: If called the old way, with a QR generator function before url_prefix
+    """
+    if callable(url_prefix):
+        raise TypeError(
+            "process_questions(questionFolders, generate_question_qr_code, url_prefix) is no longer "
+            "supported: call process_questions(questionFolders, url_prefix) and pass an encoder instead"
+        )
+    encoder = encoder or get_encoder()
     errors = []
+    pending = []
+    skipped = 0
     for questionFolder in questionFolders:
         deck_name, card_id = extract_deck_and_card_id(questionFolder)
-        print(f"Processing {questionFolder} for deck {deck_name} and card {card_id}")
         if not deck_name or not card_id:
-            print(f"Skipping {questionFolder}: could not extract deck_name/card_id")
+            logger.warning("Skipping %s: could not extract deck_name/card_id", questionFolder)
             errors.append(questionFolder)
             continue
-        result = generate_question_qr_code(
-            deck_name,
-            card_id,
-            questionFolder,
-            url_prefix
-        )
-        if result:
-            print(f"Generated QR code at: {result}")
-            generated.append(result)
+        url = question_url(deck_name, card_id, url_prefix)
+        qr_path = str(Path(questionFolder) / "qr.png")
+        digest = encoder.digest(url)
+        if cache is not None and cache.for_card(questionFolder).is_fresh(qr_path, digest):
+            skipped += 1
+            continue
+        pending.append((questionFolder, url, qr_path, digest))
+
+    workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+    tasks = [(url, qr_path) for _, url, qr_path, _ in pending]
+    outcomes: List[Optional[str]] = []
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            initializer=_init_worker,
+            initargs=(encoder.size, encoder.border, encoder.error_correction)
+        ) as executor:
+            for error in executor.map(_generate_in_worker, tasks, chunksize=max(1, len(tasks) // (workers * 4))):
+                outcomes.append(error)
+                if progress is not None:
+                    progress(len(outcomes), len(tasks))
+    else:
+        for url, qr_path in tasks:
+            outcomes.append(_generate_code(encoder, url, qr_path))
+            if progress is not None:
+                progress(len(outcomes), len(tasks))
+
+    generated = []
+    for (questionFolder, url, qr_path, digest), error in zip(pending, outcomes):
+        if error is None:
+            generated.append(qr_path)
+            if cache is not None:
+                cache.for_card(questionFolder).update(qr_path, digest)
         else:
-            print(f"Failed to generate QR code for {questionFolder}")
+            logger.error("Failed to generate QR code for %s: %s", questionFolder, error)
             errors.append(questionFolder)
-    print(f"\nSummary: {len(generated)} QR codes generated, {len(errors)} errors.")
+    if cache is not None:
+        cache.save()
+    # Folders with no deck/card id were collected first; report everything in card order
+    order = {folder: i for i, folder in enumerate(questionFolders)}
+    errors.sort(key=order.__getitem__)
+    logger.info("Summary: %d QR codes generated, %d unchanged, %d errors.", len(generated), skipped, len(errors))
     if errors:
-        print("Errors for files:")
+        logger.error("Errors for files:")
         for e in errors:
-            print(f"  {e}")
+            logger.error("  %s", e)
     return generated, errors 
 
+
+def _generate_code(encoder: QREncoder, url: str, qr_path: str) -> Optional[str]:
+    """Generate one code, returning an error message on failure instead of raising."""
+    try:
+        if encoder.save(url, qr_path):
+            return None
+        return "QR code generation failed"
+    except Exception as e:
+        return str(e)
+
+
+# Per-process encoder, built once by the pool initializer so every worker
+# reuses the same QRCode instance for all the codes it is handed.
+_worker_encoder: Optional[QREncoder] = None
+
+
+def _init_worker(size: int, border: int, error_correction: int) -> None:
+    global _worker_encoder
+    _worker_encoder = QREncoder(size, border, error_correction)
+
+
+def _generate_in_worker(task: Tuple[str, str]) -> Optional[str]:
+    if _worker_encoder is None:
+        return "Worker encoder not initialized"
+    return _generate_code(_worker_encoder, *task)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate QR codes for quiz questions.")
     parser.add_argument("input_paths", nargs="+", help="Paths to deck folders or content.yaml files")
-    parser.add_argument("--url-prefix", default="https://blog.session.it/quiz/decks", help="URL prefix for QR codes")
+    parser.add_argument("--url-prefix", default=DEFAULT_URL_PREFIX, help="URL prefix for QR codes")
+    parser.add_argument("--force", action="store_true", help="Regenerate every QR code, ignoring the build cache")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of parallel generation processes (default: 1, 0 = all CPUs)")
+    add_profile_arguments(parser)
+    add_logging_arguments(parser)
     args = parser.parse_args()
+    configure_logging(args.quiet, args.verbose)
+    with profile_session(args.profile_out, args.profile_format):
+        generate(args)
 
+def generate(args: argparse.Namespace) -> None:
+    """Generate the QR codes requested on the command line."""
     # If input is a content.yaml file, extract deck_name and card_id from the path
     if len(args.input_paths) == 1 and args.input_paths[0].endswith("content.yaml"):
         content_path = Path(args.input_paths[0])
@@ -55,15 +173,15 @@ def main() -> None:
         return
 
     # Otherwise, treat as batch deck processing
-    decks = get_deck_folders(args.input_paths)
-    questions = get_question_folders(decks)
+    questions = DeckIndex.discover(args.input_paths, use_cache=not args.force).question_folders()
     if not questions:
-        print("No question folders found in the provided input paths.")
+        logger.warning("No question folders found in the provided input paths.")
         return
     process_questions(
         questions,
-        generate_question_qr_code,
-        url_prefix=args.url_prefix)
+        url_prefix=args.url_prefix,
+        cache=None if args.force else CacheRegistry(),
+        jobs=args.jobs)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
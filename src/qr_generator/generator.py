@@ -1,13 +1,231 @@
+import io
+import logging
 import os
-from typing import Optional
-import qrcode
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+from src.file_utils import CacheRegistry, hash_inputs
+from src.file_utils.profiling import card_of, span
+
+if TYPE_CHECKING:
+    import qrcode
+
+logger = logging.getLogger(__name__)
+
+# qrcode.constants.ERROR_CORRECT_L; qrcode (and PIL) are imported on first
+# use so that importing this module, e.g. for --help, stays fast
+ERROR_CORRECT_L = 1
+
+DEFAULT_URL_PREFIX = "https://blog.session.it/quiz/decks"
+
+
+@lru_cache(maxsize=256)
+def version_for_length(length: int, error_correction: int) -> int:
+    """
+    Smallest QR version that holds a byte-mode payload of the given length.
+    
+    Args:
+        length (int): Payload length in bytes
+        error_correction (int): The error correction level
+        
+    Returns:
+        int: The QR version (1-40)
+        
+    Raises:
+        ValueError: If the payload does not fit in any version
+    """
+    from qrcode import util as qr_util
+
+    limits = qr_util.BIT_LIMIT_TABLE[error_correction]
+    for version in range(1, 41):
+        needed_bits = 4 + qr_util.length_in_bits(qr_util.MODE_8BIT_BYTE, version) + 8 * length
+        if needed_bits <= limits[version]:
+            return version
+    raise ValueError(f"Data of {length} bytes does not fit in a QR code")
+
+
+class QREncoder:
+    """
+    Encode many URLs with one QR encoder.
+    
+    The QRCode instance is reused across URLs and its version is pinned from the
+    URL length instead of being searched for each code. Generated files are
+    recorded in the build cache under a digest of the URL and the encoder
+    settings, so unchanged codes are not encoded or written again.
+    """
+    
+    def __init__(
+        self,
+        size: int = 10,
+        border: int = 4,
+        error_correction: int = ERROR_CORRECT_L
+    ) -> None:
+        self.size = size
+        self.border = border
+        self.error_correction = error_correction
+        import qrcode
+
+        self.qr = qrcode.QRCode(
+            version=1,
+            error_correction=error_correction,
+            box_size=size,
+            border=border,
+        )
+    
+    def digest(self, url: str) -> str:
+        """Cache digest of a code: the URL and every setting that affects the image."""
+        return hash_inputs([], {
+            'url': url,
+            'size': self.size,
+            'border': self.border,
+            'error_correction': self.error_correction,
+        })
+    
+    def make(self, url: str) -> "qrcode.QRCode":
+        """Encode url into the shared QRCode instance and return it."""
+        from qrcode.exceptions import DataOverflowError
+
+        qr = self.qr
+        qr.clear()
+        qr.add_data(url)
+        try:
+            qr.version = version_for_length(len(url.encode('utf-8')), self.error_correction)
+            qr.make(fit=False)
+        except (ValueError, DataOverflowError):
+            # Segment optimization can change the payload size; let qrcode search
+            qr.make(fit=True)
+        return qr
+    
+    def svg_path(self, url: str) -> Tuple[int, str]:
+        """
+        Encode url as the path data of a single SVG <path>.
+        
+        Each horizontal run of dark modules becomes one rectangle subpath, in
+        module units with the border included, so the code can be drawn at any
+        size with one scale transform.
+        
+        Args:
+            url (str): The URL to encode in the QR code
+            
+        Returns:
+            Tuple[int, str]: The width of the code in modules, and the path data
+        """
+        matrix = self.make(url).get_matrix()
+        commands = []
+        for y, row in enumerate(matrix):
+            x = 0
+            while x < len(row):
+                if not row[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                commands.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+        return len(matrix), ''.join(commands)
+    
+    def svg_fragment(self, url: str, x: float, y: float, size: float) -> str:
+        """
+        Render the QR code of url as an SVG fragment that can be inlined into a document.
+        
+        Args:
+            url (str): The URL to encode in the QR code
+            x (float): Left edge of the code, in user units of the target document
+            y (float): Top edge of the code
+            size (float): Width and height of the code, quiet zone included
+            
+        Returns:
+            str: A <g> holding a white background and one black <path> for the modules
+        """
+        modules, path_data = self.svg_path(url)
+        return (
+            f'<g transform="translate({x:g} {y:g}) scale({size / modules:.4g})">'
+            f'<rect fill="white" height="{modules}" width="{modules}"/>'
+            f'<path d="{path_data}" fill="black" shape-rendering="crispEdges"/></g>'
+        )
+    
+    def png(self, url: str) -> bytes:
+        """Encode url and return the code as PNG bytes, as save would write them."""
+        buffer = io.BytesIO()
+        self.make(url).make_image(fill_color="black", back_color="white").save(buffer)
+        return buffer.getvalue()
+    
+    def save(self, url: str, output_path: str) -> Optional[str]:
+        """
+        Generate the QR code of url and save it as a PNG.
+        
+        Args:
+            url (str): The URL to encode in the QR code
+            output_path (str): The path where to save the QR code image
+            
+        Returns:
+            Optional[str]: The path to the generated QR code if successful, None otherwise
+        """
+        try:
+            with span("qr", card_of(output_path)):
+                img = self.make(url).make_image(fill_color="black", back_color="white")
+                output_dir = os.path.dirname(output_path)
+                os.makedirs(output_dir, exist_ok=True)
+                img.save(output_path)
+            return output_path
+        except Exception as e:
+            logger.error("Error generating QR code %s: %s", output_path, e)
+            return None
+    
+    def generate(self, url: str, output_path: str, cache: Optional[CacheRegistry] = None) -> Tuple[Optional[str], bool]:
+        """
+        Save the QR code of url unless the build cache shows an identical one exists.
+        
+        Args:
+            url (str): The URL to encode in the QR code
+            output_path (str): qr.png in a card folder (<deck>/cards/<id>/qr.png)
+            cache (Optional[CacheRegistry]): Build caches to check and update (default: always generate)
+            
+        Returns:
+            Tuple[Optional[str], bool]: The path to the QR code (None on failure), and
+            whether it was unchanged and left as is
+        """
+        if cache is None:
+            return self.save(url, output_path), False
+        card_cache = cache.for_card(Path(output_path).parent)
+        digest = self.digest(url)
+        if card_cache.is_fresh(output_path, digest):
+            return output_path, True
+        result = self.save(url, output_path)
+        if result:
+            card_cache.update(result, digest)
+        return result, False
+
+
+@lru_cache(maxsize=8)
+def get_encoder(size: int = 10, border: int = 4,
+                error_correction: int = ERROR_CORRECT_L) -> QREncoder:
+    """Return the shared encoder for these settings."""
+    return QREncoder(size, border, error_correction)
+
+
+def question_url(deck_name: str, card_id: str, url_prefix: str = DEFAULT_URL_PREFIX) -> str:
+    """URL of a card's page, encoded in its QR code."""
+    return f"{url_prefix}/{deck_name}/cards/{card_id}"
+
+
+def question_qr_path(deck_name: str, card_id: str, output_dir: str) -> str:
+    """Path of a card's qr.png, under output_dir unless output_dir already is the card folder."""
+    # If output_dir already ends with deck_name/cards/card_id, use as is
+    expected_suffix = os.path.join(deck_name, "cards", card_id)
+    if output_dir.endswith(expected_suffix):
+        qr_dir = output_dir
+    else:
+        qr_dir = os.path.join(output_dir, deck_name, "cards", card_id)
+    return os.path.join(qr_dir, "qr.png")
+
 
 def generate_qr_code(
     url: str,
     output_path: str,
     size: int = 10,
     border: int = 4,
-    error_correction: int = qrcode.constants.ERROR_CORRECT_L
+    error_correction: int = ERROR_CORRECT_L
 ) -> Optional[str]:
     """
     Generate a QR code for the given URL and save it to the specified path.
@@ -22,39 +240,14 @@ def generate_qr_code(
     Returns:
         Optional[str]: The path to the generated QR code if successful, None otherwise
     """
-    try:
-        # Create QR code instance
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=error_correction,
-            box_size=size,
-            border=border,
-        )
-        
-        # Add data
-        qr.add_data(url)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Ensure output directory exists
-        output_dir = os.path.dirname(output_path)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Save image
-        img.save(output_path)
-        
-        return output_path
-    except Exception as e:
-        print(f"Error generating QR code: {str(e)}")
-        return None
+    return get_encoder(size, border, error_correction).save(url, output_path)
 
 def generate_question_qr_code(
     deck_name: str,
     card_id: str,
     output_dir: str,
-    url_prefix: str = "https://blog.session.it/quiz/decks"
+    url_prefix: str = DEFAULT_URL_PREFIX,
+    encoder: Optional[QREncoder] = None
 ) -> Optional[str]:
     """
     Generate a QR code for a quiz question.
@@ -64,17 +257,13 @@ def generate_question_qr_code(
         card_id (str): The question ID
         url_prefix (str): The prefix for the URL (default: "https://blog.session.it/quiz/decks")
         output_dir (str): The directory where the QR code PNG should be saved.
+        encoder (Optional[QREncoder]): Encoder to reuse (default: the shared default encoder)
         
     Returns:
         Optional[str]: The path to the generated QR code if successful, None otherwise
     """
-    url = f"{url_prefix}/{deck_name}/cards/{card_id}"
-
-    # If output_dir already ends with deck_name/cards/card_id, use as is
-    expected_suffix = os.path.join(deck_name, "cards", card_id)
-    if output_dir.endswith(expected_suffix):
-        qr_dir = output_dir
-    else:
-        qr_dir = os.path.join(output_dir, deck_name, "cards", card_id)
-    output_path = os.path.join(qr_dir, "qr.png")
-    return generate_qr_code(url, output_path) 
\ No newline at end of file
+    url = question_url(deck_name, card_id, url_prefix)
+    output_path = question_qr_path(deck_name, card_id, output_dir)
+    if encoder is not None:
+        return encoder.save(url, output_path)
+    return generate_qr_code(url, output_path)
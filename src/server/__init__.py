@@ -0,0 +1,12 @@
+"""
+Long-running render daemon.
+
+Keeps the SVG renderer, the PDF converter and the QR encoder warm across
+requests, so editors and CI jobs can render single cards without paying for
+interpreter startup and library initialization each time.
+"""
+
+from src.server.handler import DEFAULT_HOST, DEFAULT_PORT, make_server
+from src.server.service import CardNotFoundError, RenderService
+
+__all__ = ["DEFAULT_HOST", "DEFAULT_PORT", "CardNotFoundError", "RenderService", "make_server"]
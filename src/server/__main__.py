@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import signal
+import sys
+from types import FrameType
+from typing import Optional
+
+from src.file_utils.log import add_logging_arguments, configure_logging
+from src.qr_generator.generator import DEFAULT_URL_PREFIX
+from src.server.handler import DEFAULT_HOST, DEFAULT_PORT, RenderHTTPServer, make_server
+from src.server.service import RenderService
+
+logger = logging.getLogger(__name__)
+
+
+def _terminate(signum: int, frame: Optional[FrameType]) -> None:
+    # Shut down on SIGTERM like on Ctrl-C, so the Unix socket file is removed
+    raise KeyboardInterrupt
+
+
+def main() -> int:
+    """
+    Command-line interface for the render daemon.
+
+    Returns:
+        int: Exit code (0 after a clean shutdown, 1 if the daemon could not start)
+    """
+    parser = argparse.ArgumentParser(description="Serve SVG, PDF and QR code renders of quiz cards.")
+    parser.add_argument("input_paths", nargs="+", help="Paths to deck folders or folders containing decks")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--url-prefix", default=DEFAULT_URL_PREFIX, help="URL prefix for QR codes")
+    parser.add_argument("--card-width", type=float, default=210, help="Card width in millimeters (default: 210)")
+    parser.add_argument("--card-height", type=float, default=297, help="Card height in millimeters (default: 297)")
+    parser.add_argument("--font-size", type=int, default=12, help="Font size for card text (default: 12)")
+    parser.add_argument("--font-family", default="Arial", help="Font family for card text (default: Arial)")
+    parser.add_argument("--dpi", type=int, default=254,
+                        help="DPI for PDF generation (default: 254, which is ~100px per cm)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write minified SVG with shared CSS styles and no hidden option text")
+    parser.add_argument("--embed-qr", action="store_true",
+                        help="Draw each card's QR code into its SVG as a vector path")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging(args.quiet, args.verbose)
+
+    try:
+        service = RenderService(
+            args.input_paths,
+            card_size=(args.card_width, args.card_height),
+            font_size=args.font_size,
+            font_family=args.font_family,
+            dpi=args.dpi,
+            compact=args.compact,
+            embed_qr=args.embed_qr,
+            url_prefix=args.url_prefix,
+        )
+        service.warm_up()
+        server = make_server(service, args.host, args.port, args.socket)
+    except (OSError, ValueError) as e:
+        logger.error("Could not start the render server: %s", e)
+        return 1
+
+    where = f"http://{args.host}:{server.server_port}" if isinstance(server, RenderHTTPServer) else args.socket
+    logger.info("Serving %d decks on %s", len(service.decks), where)
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down after %d renders", service.rendered)
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+HTTP API of the render daemon, served on localhost or on a Unix socket.
+
+    GET  /health                                  {"status": "ok", "decks": [...], "rendered": N}
+    GET  /decks/<deck>/cards/<id>/content.svg     the card as SVG
+    GET  /decks/<deck>/cards/<id>/content.pdf     the card as PDF
+    GET  /decks/<deck>/cards/<id>/qr.png          the card's QR code
+    POST /render?format=svg|pdf[&id=<id>]         a card sent as content.yaml text (answers under 'answers')
+
+Card paths mirror the files the build writes, so a client can fetch
+``content.svg`` instead of rebuilding it. Errors are returned as plain text
+with status 400 (bad request), 404 (unknown deck, card or path) or 500
+(rendering failed).
+"""
+
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from src.server.service import FORMATS, PNG_CONTENT_TYPE, CardNotFoundError, RenderService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Largest card YAML accepted by POST /render
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Answer render requests from the RenderService of the server."""
+
+    server: Union["RenderHTTPServer", "RenderUnixServer"]
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/health":
+            service = self.server.service
+            self.respond(200, "application/json", json.dumps({
+                'status': 'ok', 'decks': sorted(service.decks), 'rendered': service.rendered,
+            }).encode('utf-8'))
+            return
+        parts = path.strip("/").split("/")
+        if len(parts) != 5 or parts[0] != "decks" or parts[2] != "cards":
+            self.respond_error(404, f"Unknown path: {path}")
+            return
+        _, deck, _, card_id, name = parts
+        if name == "qr.png":
+            self.render(PNG_CONTENT_TYPE, self.server.service.qr_code, deck, card_id)
+        elif name.startswith("content.") and name[len("content."):] in FORMATS:
+            format = name[len("content."):]
+            self.render(FORMATS[format], self.server.service.render_card, deck, card_id, format)
+        else:
+            self.respond_error(404, f"Unknown file: {name}")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self.respond_error(404, f"Unknown path: {url.path}")
+            return
+        query = parse_qs(url.query)
+        format = query.get('format', ['svg'])[0]
+        card_id = query.get('id', [None])[0]
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.respond_error(411, "Content-Length required")
+            return
+        if length < 0:
+            self.respond_error(400, "Invalid Content-Length")
+            return
+        if length > MAX_BODY_SIZE:
+            self.respond_error(413, f"Card YAML larger than {MAX_BODY_SIZE} bytes")
+            return
+        body = self.rfile.read(length)
+        self.render(FORMATS.get(format, ''), self.server.service.render_yaml, body, format, card_id)
+
+    def render(self, content_type: str, function: Any, *args: Any) -> None:
+        """Call a RenderService method and send its bytes, or the error it raised."""
+        try:
+            data = function(*args)
+        except CardNotFoundError as e:
+            self.respond_error(404, str(e))
+        except ValueError as e:
+            self.respond_error(400, str(e))
+        except Exception as e:
+            logger.error("Failed to render %s: %s", self.path, e)
+            self.respond_error(500, str(e))
+        else:
+            self.respond(200, content_type, data)
+
+    def respond(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # e.g. curl --fail hangs up on error statuses without reading the body
+            logger.debug("Client of %s disconnected before the response was sent", self.path)
+            self.close_connection = True
+
+    def respond_error(self, status: int, message: str) -> None:
+        self.respond(status, "text/plain; charset=utf-8", (message + "\n").encode('utf-8'))
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return str(self.client_address[0]) if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class RenderHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the RenderService its handlers use."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: RenderService) -> None:
+        self.service = service
+        super().__init__(address, RenderRequestHandler)
+
+
+class RenderUnixServer(ThreadingMixIn, UnixStreamServer):
+    """Threaded HTTP server on a Unix socket, only reachable by local users allowed to open it."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, service: RenderService) -> None:
+        self.service = service
+        if socket_in_use(path):
+            raise OSError(errno.EADDRINUSE, f"Another server is listening on {path}")
+        remove_stale_socket(path)
+        super().__init__(path, RenderRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        remove_stale_socket(self.server_address)
+
+
+def socket_in_use(path: str) -> bool:
+    """Return whether a server accepts connections on the Unix socket at path."""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+
+def remove_stale_socket(path: Any) -> None:
+    """Remove a socket file left behind at path; other files are left alone."""
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except (FileNotFoundError, TypeError):
+        pass
+
+
+def make_server(
+    service: RenderService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None
+) -> Union[RenderHTTPServer, RenderUnixServer]:
+    """
+    Bind the render API to a Unix socket if socket_path is given, or else to host:port.
+
+    Args:
+        service: Renderers answering the requests
+        host: Address to listen on (default: localhost only)
+        port: Port to listen on, 0 for any free port
+        socket_path: Unix socket to listen on instead of TCP
+
+    Raises:
+        OSError: If the address is in use or the platform has no Unix sockets
+    """
+    if socket_path is not None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not supported on this platform")
+        return RenderUnixServer(socket_path, service)
+    return RenderHTTPServer((host, port), service)
@@ -0,0 +1,199 @@
+"""
+Warm rendering state shared by the requests of the render daemon.
+
+A ``RenderService`` is built once per daemon: it keeps the SVG renderer (with
+its layout templates and measured fonts), the PDF converter (with cairosvg
+imported), the QR encoder and the parsed YAML of every card it has rendered,
+so a request only pays for the card it renders.
+"""
+
+import logging
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from src.file_utils import Card, DeckIndex, YAMLLoader
+from src.file_utils.yaml_loader import SafeLoader
+from src.qr_generator.generator import DEFAULT_URL_PREFIX, get_encoder, question_url
+from src.svg_to_pdf.converter import SVGToPDFConverter
+from src.yaml_to_svg.generate_svg import YAMLToSVG
+from src.yaml_to_svg.text_layout import get_measurer
+
+logger = logging.getLogger(__name__)
+
+# Rendered formats: content type of the response
+FORMATS = {
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+}
+PNG_CONTENT_TYPE = 'image/png'
+
+# Requests for unknown decks rescan the input paths at most this often (seconds)
+REFRESH_INTERVAL = 5.0
+# Deck and card folder names that can be requested
+NAME_PATTERN = re.compile(r'[A-Za-z0-9._-]+')
+
+WARM_UP_SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10"/></svg>'
+
+
+class CardNotFoundError(LookupError):
+    """The requested deck or card does not exist under the served paths."""
+
+
+class RenderService:
+    """Render cards of the served decks to SVG, PDF or QR code PNG bytes."""
+
+    def __init__(
+        self,
+        input_paths: List[str],
+        card_size: Tuple[float, float] = (210, 297),
+        font_size: int = 12,
+        font_family: str = 'Arial',
+        dpi: int = 254,
+        compact: bool = False,
+        embed_qr: bool = False,
+        url_prefix: str = DEFAULT_URL_PREFIX,
+    ) -> None:
+        """
+        Discover the decks under input_paths and build the renderers.
+
+        Raises:
+            ValueError: If no deck is found under input_paths
+        """
+        self.input_paths = input_paths
+        self.url_prefix = url_prefix
+        self.decks: Dict[str, str] = {}
+        self.index: Optional[DeckIndex] = None
+        self.refreshed = 0.0
+        self.refresh_lock = threading.Lock()
+        self.refresh()
+        if not self.decks:
+            raise ValueError(f"No deck folders found in {input_paths}")
+        self.svg_generator = YAMLToSVG(
+            input_paths=list(self.decks.values()),
+            card_size=card_size,
+            font_size=font_size,
+            font_family=font_family,
+            compact=compact,
+            embed_qr=embed_qr,
+            url_prefix=url_prefix,
+        )
+        self.pdf_converter = SVGToPDFConverter(dpi=dpi)
+        self.qr_encoder = get_encoder()
+        self.yaml_loader = YAMLLoader()
+        # The renderers share mutable state (the QR code, the YAML cache); one request renders at a time
+        self.lock = threading.Lock()
+        self.rendered = 0
+
+    def refresh(self) -> None:
+        """Discover the served decks again, e.g. after a deck was added, unless done in the last REFRESH_INTERVAL."""
+        with self.refresh_lock:
+            now = time.monotonic()
+            if self.index is not None and now - self.refreshed < REFRESH_INTERVAL:
+                return
+            # The index is kept in memory only: the daemon writes nothing to the deck tree
+            index = DeckIndex.scan(self.input_paths, self.index)
+            self.index = index
+            self.decks = {Path(deck).name: deck for deck in index.decks}
+            self.refreshed = now
+
+    def warm_up(self) -> None:
+        """Load the font metrics and import the QR and PDF libraries before the first request."""
+        get_measurer(self.svg_generator.font_family)
+        self.qr_encoder.png(question_url("warm-up", "000", self.url_prefix))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if not self.pdf_converter.convert_svg(WARM_UP_SVG, str(Path(temp_dir) / "warm-up.pdf")):
+                logger.warning("PDF conversion is not available; only SVG and QR code requests will succeed")
+
+    def card_folder(self, deck: str, card_id: str) -> str:
+        """
+        Return the folder of a card of a served deck.
+
+        Raises:
+            CardNotFoundError: If the deck or the card does not exist
+        """
+        if any(not NAME_PATTERN.fullmatch(name) or name in ('.', '..') for name in (deck, card_id)):
+            raise CardNotFoundError(f"Unknown card: {deck}/{card_id}")
+        if deck not in self.decks:
+            self.refresh()
+        if deck not in self.decks:
+            raise CardNotFoundError(f"Unknown card: {deck}/{card_id}")
+        folder = Path(self.decks[deck]) / "cards" / card_id
+        if not (folder / "content.yaml").is_file():
+            raise CardNotFoundError(f"Unknown card: {deck}/{card_id}")
+        return str(folder)
+
+    def render_card(self, deck: str, card_id: str, format: str) -> bytes:
+        """
+        Render a card of a served deck from its current YAML files.
+
+        Args:
+            deck: Deck folder name
+            card_id: Card folder name
+            format: "svg" or "pdf"
+
+        Raises:
+            CardNotFoundError: If the deck or the card does not exist
+            ValueError: If format is unknown or the card YAML is invalid
+            RuntimeError: If the PDF conversion fails
+        """
+        folder = self.card_folder(deck, card_id)
+        with self.lock:
+            try:
+                card = Card.load(folder, self.yaml_loader)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML in card {deck}/{card_id}: {e}") from e
+            return self._render(card, format)
+
+    def render_yaml(self, text: bytes, format: str, card_id: Optional[str] = None) -> bytes:
+        """
+        Render a card from the text of a content.yaml, with its answers under an 'answers' key.
+
+        Args:
+            text: content.yaml document
+            format: "svg" or "pdf"
+            card_id: Card identifier (default: the document's card_id, or "card")
+
+        Raises:
+            ValueError: If format is unknown or text is not a YAML mapping
+            RuntimeError: If the PDF conversion fails
+        """
+        try:
+            content: Any = yaml.load(text, Loader=SafeLoader)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid card YAML: {e}") from e
+        if not isinstance(content, dict):
+            raise ValueError("Card YAML must be a mapping")
+        card_id = card_id or str(content.get('card_id') or 'card')
+        with self.lock:
+            return self._render(Card(card_id, content), format)
+
+    def qr_code(self, deck: str, card_id: str) -> bytes:
+        """
+        Return a served card's QR code as PNG bytes, identical to its qr.png.
+
+        Raises:
+            CardNotFoundError: If the deck or the card does not exist
+        """
+        self.card_folder(deck, card_id)
+        with self.lock:
+            self.rendered += 1
+            return self.qr_encoder.png(question_url(deck, card_id, self.url_prefix))
+
+    def _render(self, card: Card, format: str) -> bytes:
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format} (expected one of {', '.join(FORMATS)})")
+        svg = self.svg_generator.create_svg_card(card, card.id, write_svg=False)
+        self.rendered += 1
+        if format == 'svg':
+            return svg.encode('utf-8')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file = Path(temp_dir) / "content.pdf"
+            if not self.pdf_converter.convert_svg(svg, str(output_file), base_dir=card.folder):
+                raise RuntimeError(f"PDF conversion of card {card.id} failed")
+            return output_file.read_bytes()
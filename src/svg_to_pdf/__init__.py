@@ -6,5 +6,15 @@ with support for embedded images and proper scaling.
 """
 
 from src.svg_to_pdf.converter import SVGToPDFConverter
+from src.svg_to_pdf.image_handler import ImageHandler, clear_image_cache, configure_image_cache
+from src.svg_to_pdf.imposition import DeckImposer, ImposedCard, SheetLayout
 
-__all__ = ["SVGToPDFConverter"] 
\ No newline at end of file
+__all__ = [
+    "SVGToPDFConverter",
+    "ImageHandler",
+    "clear_image_cache",
+    "configure_image_cache",
+    "DeckImposer",
+    "ImposedCard",
+    "SheetLayout",
+] 
\ No newline at end of file
@@ -11,21 +11,25 @@ import os
 import sys
 import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
 
+from src.file_utils import BuildCache, hash_inputs
+from src.file_utils.log import add_logging_arguments, configure_logging
+from src.file_utils.profiling import add_profile_arguments, card_of, profile_session, span
 from src.svg_to_pdf.converters.cairo_converter import CairoConverter
 from src.svg_to_pdf.image_handler import ImageHandler
 
-# Configure logging
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-logging.basicConfig(
-    level=logging.INFO,
-    stream=sys.stdout,
-    format='%(levelname)s: %(message)s'
-)
+if TYPE_CHECKING:
+    import svgwrite
+
 logger = logging.getLogger(__name__)
 
+# SVG files are read and rewritten in chunks of this many characters
+READ_CHUNK_SIZE = 64 * 1024
+
+# Rewritten SVG is buffered in memory up to this size before spilling to disk
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
 
 class SVGToPDFConverter:
     """
@@ -46,7 +50,7 @@ class SVGToPDFConverter:
         self.dpi = dpi
         self.converter = CairoConverter(self.dpi)
         
-    def convert_svg_to_pdf(self, svg_file: str, output_file: str) -> None:
+    def convert_svg_to_pdf(self, svg_file: str, output_file: str) -> bool:
         """
         Convert SVG file to PDF with proper image handling.
         
@@ -54,51 +58,156 @@ class SVGToPDFConverter:
             svg_file: Path to the SVG file
             output_file: Path to the output PDF file
             
+        Returns:
+            bool: True if the PDF was written, False if the conversion failed
+            
         Raises:
-            Exception: If conversion fails
+            Exception: If the SVG file cannot be read
         """
         svg_path = Path(svg_file)
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            chunks = iter(lambda: f.read(READ_CHUNK_SIZE), '')
+            return self._convert_chunks(chunks, output_file, base_dir=str(svg_path.parent))
+
+    def convert_svg(
+        self,
+        svg: Union[bytes, str, "svgwrite.Drawing"],
+        output_file: str,
+        base_dir: Optional[str] = None
+    ) -> bool:
+        """
+        Convert in-memory SVG content to PDF with proper image handling.
         
-        # Create a temporary file for the modified SVG
-        with tempfile.NamedTemporaryFile(suffix='.svg', delete=False) as temp_svg:
-            temp_svg_path = temp_svg.name
-            
-            # Read the SVG content
-            with open(svg_path, 'r', encoding='utf-8') as f:
-                svg_content = f.read()
-            
-            # Fix image references
-            image_handler = ImageHandler(base_dir=str(svg_path.parent))
-            modified_svg = image_handler.fix_image_references(svg_content)
-            
-            # Write the modified SVG to the temporary file
-            temp_svg.write(modified_svg.encode('utf-8'))
+        This lets callers that already hold the SVG, such as YAMLToSVG, render
+        the PDF without writing the SVG to disk first.
         
-        try:
-            # Convert SVG to PDF
-            logger.info(f"Converting {svg_file} to {output_file} at {self.dpi} DPI")
+        Args:
+            svg: SVG document as bytes, text or an svgwrite Drawing
+            output_file: Path to the output PDF file
+            base_dir: Directory used to resolve image references (default: cwd)
             
-            with open(temp_svg_path, 'rb') as f:
-                svg_bytes = f.read()
+        Returns:
+            bool: True if the PDF was written, False if the conversion failed
+        """
+        if isinstance(svg, bytes):
+            svg_content = svg.decode('utf-8')
+        elif isinstance(svg, str):
+            svg_content = svg
+        else:
+            svg_content = svg.tostring()
+        return self._convert_chunks([svg_content], output_file, base_dir)
+
+    def _convert_chunks(self, chunks: Iterable[str], output_file: str, base_dir: Optional[str]) -> bool:
+        """Stream SVG text through the image rewriter into the converter input."""
+        image_handler = ImageHandler(base_dir=base_dir)
+        card = card_of(output_file)
+        try:
+            # Small documents stay in memory; only very large ones spill to disk
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as svg_buffer:
+                with span("image_embed", card):
+                    for fragment in image_handler.iter_fixed_image_references(chunks):
+                        svg_buffer.write(fragment.encode('utf-8'))
+                svg_buffer.seek(0)
                 
-            if not self.converter.convert(svg_bytes, output_file):
-                raise Exception("Conversion failed")
+                # Convert SVG to PDF
+                logger.debug("Converting SVG to %s at %d DPI", output_file, self.dpi)
+                with span("pdf", card):
+                    converted = self.converter.convert_file(svg_buffer, output_file)
+                if not converted:
+                    raise Exception("Conversion failed")
                 
-            logger.info(f"Successfully created PDF: {output_file}")
+            logger.debug("Successfully created PDF: %s", output_file)
+            return True
         except Exception as e:
-            logger.error(f"Conversion failed: {e}")
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_svg_path):
-                os.unlink(temp_svg_path)
+            logger.error("Conversion of %s failed: %s", output_file, e)
+            return False
+
+    def process_directory(
+        self,
+        input_path: Path,
+        output_path: Path,
+        use_cache: bool = True,
+        jobs: int = 1
+    ) -> List[Tuple[str, str]]:
+        """
+        Convert every SVG file under input_path, skipping those unchanged since the last run.
+        
+        Args:
+            input_path: Directory searched recursively for SVG files
+            output_path: Directory where the PDF files are written, mirroring input_path
+            use_cache: Skip SVGs whose PDF is up to date according to the build cache
+            jobs: Number of worker processes (1 converts in this process, 0 uses all CPUs)
+            
+        Returns:
+            List[Tuple[str, str]]: (SVG file, error message) for every failed conversion
+        """
+        cache = BuildCache(output_path)
+        pending = []
+        skipped = 0
+        for svg_path in sorted(input_path.rglob("*.svg")):
+            pdf_path = output_path / svg_path.relative_to(input_path).with_suffix('.pdf')
+            # Images are inlined into the PDF, so they are inputs as much as the SVG
+            images = ImageHandler(base_dir=str(svg_path.parent)).referenced_files(
+                svg_path.read_text(encoding='utf-8'))
+            digest = hash_inputs([svg_path, *images], {'dpi': self.dpi})
+            if use_cache and cache.is_fresh(pdf_path, digest):
+                skipped += 1
+                continue
+            pending.append((str(svg_path), str(pdf_path), digest))
+
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+        tasks = [(svg_file, output_file) for svg_file, output_file, _ in pending]
+        if workers > 1 and len(tasks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)),
+                initializer=_init_worker,
+                initargs=(self.dpi,)
+            ) as executor:
+                outcomes = list(executor.map(
+                    _convert_in_worker, tasks, chunksize=max(1, len(tasks) // (workers * 4))
+                ))
+        else:
+            outcomes = [_convert_file(self, svg_file, output_file) for svg_file, output_file in tasks]
+
+        failures = []
+        for (svg_file, output_file, digest), error in zip(pending, outcomes):
+            if error is None:
+                cache.update(output_file, digest)
+            else:
+                logger.error("Failed to process %s: %s", svg_file, error)
+                failures.append((svg_file, error))
+        cache.save()
+        logger.info("Converted %d SVG files, %d unchanged, %d failed",
+                    len(pending) - len(failures), skipped, len(failures))
+        return failures
+
 
-    def process_directory(self, input_path: Path, output_path: Path) -> None:
-        for svg_file in input_path.glob("*.svg"):
-            try:
-                output_file = str(output_path / svg_file.with_suffix('.pdf').name)
-                self.convert_svg_to_pdf(str(svg_file), output_file)
-            except Exception as e:
-                logger.error(f"Failed to process {svg_file}: {e}")
+def _convert_file(converter: SVGToPDFConverter, svg_file: str, output_file: str) -> Optional[str]:
+    """Convert one file, returning an error message on failure instead of raising."""
+    try:
+        if converter.convert_svg_to_pdf(svg_file, output_file):
+            return None
+        return "Conversion failed"
+    except Exception as e:
+        return str(e)
+
+
+# Per-process converter, built once by the pool initializer so every worker
+# reuses the same CairoConverter for all the files it is handed.
+_worker_converter: Optional[SVGToPDFConverter] = None
+
+
+def _init_worker(dpi: int) -> None:
+    global _worker_converter
+    _worker_converter = SVGToPDFConverter(dpi=dpi)
+
+
+def _convert_in_worker(task: Tuple[str, str]) -> Optional[str]:
+    if _worker_converter is None:
+        return "Worker converter not initialized"
+    return _convert_file(_worker_converter, *task)
 
 
 def main() -> int:
@@ -109,43 +218,56 @@ def main() -> int:
         int: Exit code (0 for success, 1 for failure)
     """
     parser = argparse.ArgumentParser(description='Convert SVG files to PDF with proper image support')
-    parser.add_argument('input', help='Path to the SVG file or directory to convert')
-    parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
+    parser.add_argument('input', help='Path to the SVG file or directory (searched recursively) to convert')
     parser.add_argument('--dpi', type=int, default=254, 
                       help='DPI for PDF generation (default: 254, which is ~100px per cm)')
+    parser.add_argument('--force', action='store_true',
+                      help='Convert every SVG, ignoring the build cache')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                      help='Number of parallel conversion processes for directories (default: 1, 0 = all CPUs)')
+    add_profile_arguments(parser)
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    configure_logging(args.quiet, args.verbose, stream=sys.stdout)
     
-    # Set logging level
-    if args.verbose:
-        logger.setLevel(logging.DEBUG)
-        # Set all loggers to DEBUG
-        for name in logging.root.manager.loggerDict:
-            logging.getLogger(name).setLevel(logging.DEBUG)
-    
-    logger.info(f"Processing {args.input}")
+    logger.info("Processing %s", args.input)
     
+    with profile_session(args.profile_out, args.profile_format):
+        return convert(args)
+
+
+def convert(args: argparse.Namespace) -> int:
+    """Convert the SVG file or directory given on the command line."""
     try:
         input_path = Path(args.input)
         
         if input_path.is_dir():
             # Process directory
             converter = SVGToPDFConverter(dpi=args.dpi)
-            converter.process_directory(input_path, input_path)
+            failures = converter.process_directory(
+                input_path, input_path, use_cache=not args.force, jobs=args.jobs
+            )
+            if failures:
+                logger.error("Failed to convert the following files:")
+                for svg_file, error in failures:
+                    logger.error("  %s: %s", svg_file, error)
+                return 1
             return 0
         elif input_path.suffix.lower() == '.svg':
             # Process single file
             converter = SVGToPDFConverter(dpi=args.dpi)
             output_file = str(input_path.with_suffix('.pdf'))
-            converter.convert_svg_to_pdf(str(input_path), output_file)
-            logger.info(f"Conversion complete: {output_file}")
+            if not converter.convert_svg_to_pdf(str(input_path), output_file):
+                return 1
+            logger.info("Conversion complete: %s", output_file)
             return 0
         else:
-            logger.error(f"Input must be either a directory or an SVG file: {args.input}")
+            logger.error("Input must be either a directory or an SVG file: %s", args.input)
             return 1
             
     except Exception as e:
-        logger.error(f"Conversion failed: {e}")
+        logger.error("Conversion failed: %s", e)
         return 1
 
 
@@ -3,7 +3,7 @@ Base class for SVG to PDF converters.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import IO, Optional
 
 
 class BaseConverter(ABC):
@@ -35,4 +35,20 @@ class BaseConverter(ABC):
         Returns:
             bool: True if conversion was successful, False otherwise
         """
-        pass 
\ No newline at end of file
+        pass
+
+    def convert_file(self, svg_file: IO[bytes], output_file: str) -> bool:
+        """
+        Convert SVG read from a binary file object to PDF file.
+        
+        Converters that can parse directly from a stream should override this;
+        the default reads the whole stream and calls convert.
+        
+        Args:
+            svg_file: Binary file object positioned at the start of the SVG
+            output_file: Path to the output PDF file
+            
+        Returns:
+            bool: True if conversion was successful, False otherwise
+        """
+        return self.convert(svg_file.read(), output_file)
@@ -2,13 +2,14 @@
 Cairo-based SVG to PDF converter.
 """
 
+import logging
 import os
-from typing import Optional
-
-import cairosvg
+from typing import IO, Optional
 
 from .base import BaseConverter
 
+logger = logging.getLogger(__name__)
+
 
 class CairoConverter(BaseConverter):
     """
@@ -27,6 +28,9 @@ class CairoConverter(BaseConverter):
             bool: True if conversion was successful, False otherwise
         """
         try:
+            # cairosvg (with cairocffi and tinycss2) is imported on first use to keep startup fast
+            import cairosvg
+
             # Create output directory if it doesn't exist
             os.makedirs(os.path.dirname(output_file), exist_ok=True)
             
@@ -38,5 +42,30 @@ class CairoConverter(BaseConverter):
             )
             return True
         except Exception as e:
-            print(f"Cairo conversion failed: {e}")
-            return False 
\ No newline at end of file
+            logger.error("Cairo conversion failed: %s", e)
+            return False
+
+    def convert_file(self, svg_file: IO[bytes], output_file: str) -> bool:
+        """
+        Convert SVG read from a binary file object to PDF using CairoSVG.
+        
+        Args:
+            svg_file: Binary file object positioned at the start of the SVG
+            output_file: Path to the output PDF file
+            
+        Returns:
+            bool: True if conversion was successful, False otherwise
+        """
+        try:
+            import cairosvg
+
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            cairosvg.svg2pdf(
+                file_obj=svg_file,
+                write_to=output_file,
+                dpi=self.dpi
+            )
+            return True
+        except Exception as e:
+            logger.error("Cairo conversion failed: %s", e)
+            return False
@@ -5,15 +5,135 @@ Image handling utilities for SVG to PDF conversion.
 import base64
 import logging
 import os
+from collections import OrderedDict
 from pathlib import Path
 import re
-from typing import Optional
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
-from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Images smaller than this are embedded as data URIs, larger ones are linked with file://
+MAX_EMBED_SIZE = 1000000  # < 1MB
+
+MIME_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.svg': 'image/svg+xml'
+}
+
+# Base64-encode streamed images in blocks that are a multiple of 3 bytes
+ENCODE_BLOCK_SIZE = 3 * 16384
+
+# Image references in the SVG; the tag ending is kept so self-closing tags stay closed
+IMAGE_PATTERN = re.compile(r'<image([^>]*?)xlink:href="([^"]+)"([^>]*?)(/?>)')
+
+# Seconds a missing image path is remembered, and how many are remembered at most
+MISSING_TTL = 1.0
+MAX_MISSING = 4096
+
+CacheKey = Tuple[str, int, int]
+
+
+class DataURICache:
+    """
+    Process-wide LRU cache of image data URIs.
+    
+    Entries are keyed on (absolute path, mtime, size), so an image that changes
+    on disk is re-encoded, and evicted least-recently-used first once the total
+    size of the cached URIs exceeds max_bytes. Paths that do not exist are
+    remembered for missing_ttl seconds (at most max_missing of them), so the
+    repeated lookups of a build cost no stat calls while a long-running process
+    still picks up images created later; clear() forgets them at once.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        missing_ttl: float = MISSING_TTL,
+        max_missing: int = MAX_MISSING,
+    ):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.missing_ttl = missing_ttl
+        self.max_missing = max_missing
+        self._entries: "OrderedDict[CacheKey, str]" = OrderedDict()
+        # Missing path -> time.monotonic() after which it is checked again
+        self._missing: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """Stat path, returning None (and remembering it for a while) if it does not exist."""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._missing.get(path)
+            if expires is not None:
+                if now < expires:
+                    return None
+                del self._missing[path]
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._missing.pop(path, None)
+                self._missing[path] = now + self.missing_ttl
+                while len(self._missing) > self.max_missing:
+                    self._missing.popitem(last=False)
+            return None
+    
+    def get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            data_uri = self._entries.get(key)
+            if data_uri is not None:
+                self._entries.move_to_end(key)
+            return data_uri
+    
+    def put(self, key: CacheKey, data_uri: str) -> None:
+        if len(data_uri) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data_uri
+            self.size += len(data_uri)
+            self._evict()
+    
+    def resize(self, max_bytes: int) -> None:
+        """Change the byte budget, evicting least-recently-used entries if needed."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+    
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+            self.size = 0
+
+
+_data_uri_cache = DataURICache()
+
+
+def configure_image_cache(max_bytes: int) -> None:
+    """Set the byte budget of the process-wide data URI cache, evicting entries if needed."""
+    _data_uri_cache.resize(max_bytes)
+
+
+def clear_image_cache() -> None:
+    """Drop all cached data URIs and missing-path lookups."""
+    _data_uri_cache.clear()
+
 
 class ImageHandler:
     """
@@ -25,15 +145,46 @@ class ImageHandler:
     - Handle case-sensitive file systems
     """
     
-    def __init__(self, base_dir: Optional[str] = None):
+    def __init__(self, base_dir: Optional[str] = None, cache: Optional[DataURICache] = None):
         """
         Initialize the image handler.
         
         Args:
             base_dir: Base directory for image resolution
+            cache: Data URI cache to use (default: the process-wide cache)
         """
         self.base_dir = base_dir or os.getcwd()
+        self.cache = cache if cache is not None else _data_uri_cache
+    
+    def data_uri(self, path: str, st: os.stat_result) -> str:
+        """Return the base64 data URI of an image file, reusing a cached encoding if unchanged."""
+        return ''.join(self.iter_data_uri(path, st))
+    
+    def iter_data_uri(self, path: str, st: os.stat_result) -> Iterator[str]:
+        """
+        Yield the base64 data URI of an image file.
         
+        Encodings that fit the cache budget are cached and yielded whole; larger
+        ones are streamed in blocks straight from the file without being kept.
+        """
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        data_uri = self.cache.get(key)
+        if data_uri is not None:
+            yield data_uri
+            return
+        mime_type = MIME_TYPES.get(os.path.splitext(path)[1].lower(), 'image/png')
+        prefix = f"data:{mime_type};base64,"
+        if len(prefix) + 4 * ((st.st_size + 2) // 3) <= self.cache.max_bytes:
+            with open(path, 'rb') as img_file:
+                data_uri = prefix + base64.b64encode(img_file.read()).decode('utf-8')
+            self.cache.put(key, data_uri)
+            yield data_uri
+            return
+        with open(path, 'rb') as img_file:
+            yield prefix
+            for block in iter(lambda: img_file.read(ENCODE_BLOCK_SIZE), b''):
+                yield base64.b64encode(block).decode('utf-8')
+    
     def fix_image_references(self, svg_content: str) -> str:
         """
         Replace remote image references with local file paths and embed small images.
@@ -44,75 +195,124 @@ class ImageHandler:
         Returns:
             Modified SVG content with fixed image references
         """
-        # Regular expression to find image references in the SVG
-        image_pattern = r'<image([^>]*?)xlink:href="([^"]+)"([^>]*?)/?>'
+        return ''.join(self.iter_fixed_image_references([svg_content]))
+    
+    def iter_fixed_image_references(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Streaming version of fix_image_references.
         
-        # Define a replacement function for each matched image
-        def replace_image_ref(match: re.Match[str]) -> str:
-            before_url = match.group(1)
-            url = match.group(2)
-            after_url = match.group(3)
+        Consumes the SVG as a sequence of text chunks and yields output fragments
+        as soon as they are complete. Only an unterminated tag at the end of a
+        chunk is held back, so peak memory stays bounded by the chunk size and a
+        single image payload, however many images the SVG references.
+        
+        Args:
+            chunks: SVG content split into chunks of any size
             
+        Yields:
+            str: Fragments of the modified SVG content
+        """
+        # Chunks of a tag that has not been closed yet, joined once it is, so a
+        # tag spanning many chunks (e.g. a large data URI) is copied only once
+        pending: List[str] = []
+        for chunk in chunks:
+            if pending and '>' not in chunk:
+                pending.append(chunk)
+                continue
+            pending.append(chunk)
+            text = ''.join(pending)
+            # Hold back a trailing tag that has not been closed yet
+            tag_start = text.rfind('<')
+            if tag_start != -1 and text.find('>', tag_start) == -1:
+                complete, pending = text[:tag_start], [text[tag_start:]]
+            else:
+                complete, pending = text, []
+            yield from self._rewrite(complete)
+        yield from self._rewrite(''.join(pending))
+    
+    def _rewrite(self, svg_content: str) -> Iterator[str]:
+        position = 0
+        for match in IMAGE_PATTERN.finditer(svg_content):
+            if match.start() > position:
+                yield svg_content[position:match.start()]
+            yield from self._replace_image_ref(match)
+            position = match.end()
+        if position < len(svg_content):
+            yield svg_content[position:]
+    
+    def candidate_paths(self, url: str) -> List[str]:
+        """Local files an image reference may resolve to, in the order they are tried."""
+        parsed_url = urlparse(url)
+        filename = os.path.basename(parsed_url.path)
+        # Try the exact filename from the path, then the card folder of a
+        # <card>-qr.png name (important for case-sensitive filesystems)
+        base_name = os.path.splitext(filename)[0]
+        if base_name.endswith('-qr'):
+            base_name = base_name[:-3]  # Remove -qr suffix
+        return [os.path.join(self.base_dir, filename), os.path.join(self.base_dir, base_name, 'qr.png')]
+    
+    def referenced_files(self, svg_content: str) -> List[str]:
+        """
+        Return the local files whose content ends up in the PDF of svg_content.
+        
+        For each image reference this lists the candidate paths up to the one
+        that exists (all of them if none does), so that hashing the list also
+        notices an image appearing where an earlier candidate was missing.
+        """
+        files = []
+        for match in IMAGE_PATTERN.finditer(svg_content):
+            url = match.group(2)
+            if url.startswith('data:'):
+                continue
             parsed_url = urlparse(url)
-            
-            # If it's already a local file or data URI, no need to change
-            if parsed_url.scheme == 'file' or url.startswith('data:'):
-                return match.group(0)
-            
-            # If it's a remote URL or any other type of URL, try to find a local file
-            filename = os.path.basename(parsed_url.path)
-            
-            # First, try the exact filename from the path
-            local_path = os.path.join(self.base_dir, filename)
-            
-            # If not found, try with different case patterns (important for case-sensitive filesystems)
-            if not os.path.exists(local_path):
-                # Try with the base name without any suffixes
-                base_name = os.path.splitext(filename)[0]
-                if base_name.endswith('-qr'):
-                    base_name = base_name[:-3]  # Remove -qr suffix
-                local_path = os.path.join(self.base_dir, base_name, 'qr.png')
-            
-            # If we found a local file, use it
-            if os.path.exists(local_path):
-                abs_path = os.path.abspath(local_path)
-                logger.info(f"Found local file for {url} at {abs_path}")
-                
-                # For small images like QR codes, embed them directly as data URIs
-                if os.path.getsize(local_path) < 1000000:  # < 1MB
-                    try:
-                        # Determine the MIME type
-                        ext = os.path.splitext(local_path)[1].lower()
-                        mime_type = {
-                            '.png': 'image/png',
-                            '.jpg': 'image/jpeg',
-                            '.jpeg': 'image/jpeg',
-                            '.gif': 'image/gif',
-                            '.svg': 'image/svg+xml'
-                        }.get(ext, 'image/png')
-                        
-                        # Read the image file and encode as base64
-                        with open(local_path, 'rb') as img_file:
-                            img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                        
-                        # Create a data URI
-                        data_uri = f"data:{mime_type};base64,{img_data}"
-                        logger.info("Embedded image as data URI")
-                        
-                        # Return the updated image tag with the data URI
-                        return f'<image{before_url}xlink:href="{data_uri}"{after_url}>'
-                    except Exception as e:
-                        logger.warning(f"Could not embed image as data URI: {e}")
-                        # Fall back to file URL if embedding fails
-                        return f'<image{before_url}xlink:href="file://{abs_path}"{after_url}>'
-                else:
-                    # For larger images, just use file:// URL
-                    return f'<image{before_url}xlink:href="file://{abs_path}"{after_url}>'
-            
-            logger.warning(f"Could not find local file for {url}")
+            if parsed_url.scheme == 'file':
+                files.append(parsed_url.path)
+                continue
+            for local_path in self.candidate_paths(url):
+                files.append(local_path)
+                if self.cache.stat(local_path) is not None:
+                    break
+        return files
+    
+    def _replace_image_ref(self, match: "re.Match[str]") -> Iterator[str]:
+        before_url, url, after_url, tag_end = match.groups()
+        
+        parsed_url = urlparse(url)
+        
+        # If it's already a local file or data URI, no need to change
+        if parsed_url.scheme == 'file' or url.startswith('data:'):
+            yield match.group(0)
+            return
+        
+        # If it's a remote URL or any other type of URL, try to find a local file
+        st = None
+        for local_path in self.candidate_paths(url):
+            st = self.cache.stat(local_path)
+            if st is not None:
+                break
+        
+        if st is None:
+            logger.warning("Could not find local file for %s", url)
             # If no local file found, return unchanged
-            return match.group(0)
+            yield match.group(0)
+            return
+        
+        abs_path = os.path.abspath(local_path)
+        logger.debug("Found local file for %s at %s", url, abs_path)
+        
+        # For small images like QR codes, embed them directly as data URIs
+        if st.st_size < MAX_EMBED_SIZE:
+            try:
+                data_uri = self.iter_data_uri(local_path, st)
+                first = next(data_uri)
+            except Exception as e:
+                logger.warning("Could not embed image as data URI: %s", e)
+            else:
+                logger.debug("Embedded image as data URI")
+                yield f'<image{before_url}xlink:href="{first}'
+                yield from data_uri
+                yield f'"{after_url}{tag_end}'
+                return
         
-        # Replace all image references
-        modified_content = re.sub(image_pattern, replace_image_ref, svg_content)
-        return modified_content 
\ No newline at end of file
+        # For larger images (or if embedding fails), just use file:// URL
+        yield f'<image{before_url}xlink:href="file://{abs_path}"{after_url}{tag_end}'
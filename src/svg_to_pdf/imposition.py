@@ -0,0 +1,164 @@
+"""
+Print-sheet imposition.
+
+Renders a whole deck into one multi-page PDF with N-up imposition: several
+cards per sheet, optionally followed by a sheet of answer backs laid out so
+that each back lands behind its front when printed duplex (long-edge flip).
+All cards are drawn onto a single cairo PDF surface, so fonts and other shared
+resources are emitted once per document rather than once per card.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from src.svg_to_pdf.image_handler import ImageHandler
+
+logger = logging.getLogger(__name__)
+
+POINTS_PER_MM = 72 / 25.4
+
+PAGE_SIZES = {
+    'A4': (210.0, 297.0),
+    'A3': (297.0, 420.0),
+    'Letter': (215.9, 279.4),
+}
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """Grid of card slots on a sheet, in millimeters."""
+    page_size: Tuple[float, float] = PAGE_SIZES['A4']
+    columns: int = 2
+    rows: int = 2
+    margin: float = 10.0
+    gutter: float = 5.0
+
+    @classmethod
+    def parse(cls, grid: str, page: str = 'A4') -> "SheetLayout":
+        """Build a layout from a 'COLUMNSxROWS' grid such as '2x2' and a page size name."""
+        try:
+            columns, rows = (int(value) for value in grid.lower().split('x'))
+        except ValueError:
+            raise ValueError(f"Invalid sheet grid '{grid}', expected COLUMNSxROWS such as 2x2")
+        if columns < 1 or rows < 1:
+            raise ValueError(f"Invalid sheet grid '{grid}', expected at least 1x1")
+        if page not in PAGE_SIZES:
+            raise ValueError(f"Unknown page size '{page}', expected one of {', '.join(PAGE_SIZES)}")
+        return cls(page_size=PAGE_SIZES[page], columns=columns, rows=rows)
+
+    @property
+    def cards_per_sheet(self) -> int:
+        return self.columns * self.rows
+
+    @property
+    def slot_size(self) -> Tuple[float, float]:
+        width = (self.page_size[0] - 2 * self.margin - (self.columns - 1) * self.gutter) / self.columns
+        height = (self.page_size[1] - 2 * self.margin - (self.rows - 1) * self.gutter) / self.rows
+        return width, height
+
+    def slot(self, index: int, back: bool = False) -> Tuple[float, float, float, float]:
+        """
+        Return the (x, y, width, height) rectangle of a slot, in millimeters.
+
+        Args:
+            index: Position of the card on its sheet (0 .. cards_per_sheet - 1)
+            back: Mirror the column so the slot lines up with its front when
+                the sheet is flipped along its long edge
+        """
+        row, column = divmod(index % self.cards_per_sheet, self.columns)
+        if back:
+            column = self.columns - 1 - column
+        width, height = self.slot_size
+        x = self.margin + column * (width + self.gutter)
+        y = self.margin + row * (height + self.gutter)
+        return x, y, width, height
+
+
+@dataclass
+class ImposedCard:
+    """SVG content of one card to place on a sheet."""
+    front: str
+    back: Optional[str] = None
+    base_dir: Optional[str] = None
+
+
+class DeckImposer:
+    """Render a sequence of card SVGs into a single N-up multi-page PDF."""
+
+    def __init__(self, layout: Optional[SheetLayout] = None, dpi: int = 254):
+        """
+        Initialize the imposer.
+
+        Args:
+            layout: Sheet grid to place cards on (default: 2x2 on A4)
+            dpi: DPI the card SVGs are designed for (default: 254 which gives 100px per cm)
+        """
+        self.layout = layout or SheetLayout()
+        self.dpi = dpi
+
+    def impose(self, cards: Sequence[ImposedCard], output_file: str, duplex: bool = True) -> int:
+        """
+        Write all cards to output_file, cards_per_sheet cards per page.
+
+        Args:
+            cards: Cards in deck order
+            output_file: Path to the multi-page PDF to write
+            duplex: After each sheet of fronts, add a sheet with the cards' backs
+
+        Returns:
+            int: Number of pages written (0, and no file, if there are no cards)
+        """
+        if not cards:
+            return 0
+
+        # cairo is imported on use so that layouts can be computed without the native library
+        import cairocffi
+        from cairosvg.parser import Tree
+        from cairosvg.surface import PDFSurface
+
+        class SlotSurface(PDFSurface):
+            """cairosvg surface that draws into one slot of a shared PDF page."""
+
+            def __init__(self, slot: "cairocffi.Surface", tree: Tree, dpi: int,
+                         width: float, height: float) -> None:
+                self.slot = slot
+                super().__init__(tree, None, dpi, output_width=width, output_height=height)
+
+            def _create_surface(self, width: float, height: float) -> Tuple["cairocffi.Surface", float, float]:
+                return self.slot, width, height
+
+        page_width, page_height = (size * POINTS_PER_MM for size in self.layout.page_size)
+        # cairosvg output sizes are in pixels at self.dpi, cairo PDF units are points
+        pixels_per_point = self.dpi / 72
+
+        def draw(sheet: "cairocffi.PDFSurface", svg: str, base_dir: Optional[str],
+                 rect: Tuple[float, float, float, float]) -> None:
+            x, y, width, height = (value * POINTS_PER_MM for value in rect)
+            svg_content = ImageHandler(base_dir=base_dir).fix_image_references(svg)
+            tree = Tree(bytestring=svg_content.encode('utf-8'))
+            slot = sheet.create_for_rectangle(x, y, width, height)
+            SlotSurface(slot, tree, self.dpi, width * pixels_per_point, height * pixels_per_point)
+            slot.finish()
+
+        per_sheet = self.layout.cards_per_sheet
+        pages = 0
+        sheet = cairocffi.PDFSurface(output_file, page_width, page_height)
+        try:
+            for start in range(0, len(cards), per_sheet):
+                batch = cards[start:start + per_sheet]
+                for index, card in enumerate(batch):
+                    draw(sheet, card.front, card.base_dir, self.layout.slot(index))
+                sheet.show_page()
+                pages += 1
+                if duplex:
+                    for index, card in enumerate(batch):
+                        if card.back:
+                            draw(sheet, card.back, card.base_dir, self.layout.slot(index, back=True))
+                    sheet.show_page()
+                    pages += 1
+        finally:
+            sheet.finish()
+        logger.info("Imposed %d cards on %d pages: %s", len(cards), pages, output_file)
+        return pages
+
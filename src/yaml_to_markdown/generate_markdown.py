@@ -5,50 +5,35 @@ Converts YAML card files to Markdown format for GitHub Pages.
 Creates individual card pages and an index page for navigation.
 """
 
+import json
 import logging
 import os
-from dataclasses import dataclass
+import re
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Union
 
-import yaml
-from src.file_utils import get_question_folders, get_deck_folders
+from src.file_utils import BuildCache, Card, DeckIndex, YAMLLoader, hash_inputs, load_yaml, write_if_changed
+from src.file_utils.log import add_logging_arguments, configure_logging
+from src.file_utils.profiling import add_profile_arguments, profile_session, span
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
-class Card:
-    """Represents a quiz card with its content and metadata."""
-    id: str
-    content: Dict[str, Any]
-    
-    @property
-    def question_text(self) -> str:
-        value = self.content.get('question_content', 
-                  self.content.get('question', 
-                  self.content.get('content', 'No question content')))
-        return str(value)
+# Cards listed per index page; 0 (the default) lists every card on index.md,
+# large decks opt in to continuation pages with --index-page-size
+DEFAULT_PAGE_SIZE = 0
+SEARCH_INDEX_NAME = "search-index.json"
+# Continuation pages of the deck index: index-2.md, index-3.md, ...
+INDEX_PAGE_PATTERN = re.compile(r'index-(\d+)\.md')
 
 class CardLoader:
-    """Handles loading card data from YAML files in question folders."""
-    def __init__(self, question_folders: list[str]):
+    """Loads the cards of question folders; a thin wrapper over Card.load."""
+    def __init__(self, question_folders: list[str], loader: Optional[YAMLLoader] = None):
         self.question_folders = question_folders
+        self.loader = loader
 
-    def load_card(self, folder: str) -> dict:
-        """Load a card from its YAML file in the corresponding question folder."""
-        card_file = Path(folder) / "content.yaml"
-        with open(card_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-            if not isinstance(data, dict):  
-                raise ValueError(f"YAML file {card_file} did not return a dict")
-            answers_file = Path(folder) / "answers.yaml"
-            with open(answers_file, 'r', encoding='utf-8') as f:
-                data['answers'] = yaml.safe_load(f)
-            data['question_folder'] = folder
-            data['id'] = Path(folder).name
-            return data
+    def load_card(self, folder: str) -> Card:
+        """Load the card in a question folder."""
+        return Card.load(folder, self.loader)
 
 class MarkdownGenerator:
     """Handles generation of markdown content."""
@@ -67,7 +52,7 @@ class MarkdownGenerator:
         if 'options' in card.content:
             lines.extend([
                 "## Options",
-                *[f"{i}. {opt}" for i, opt in enumerate(card.content['options'], 1)],
+                *[f"{i}. {opt}" for i, opt in enumerate(card.options, 1)],
                 ""
             ])
             
@@ -85,31 +70,77 @@ class MarkdownGenerator:
                     ""
                 ])
                 
-        if 'sources' in card.content and card.content['sources']:
+        if card.sources:
             lines.extend([
                 "## Sources",
-                *[f"- {source}" for source in card.content['sources']]
+                *[f"- {source}" for source in card.sources]
             ])
             
         return "\n".join(lines)
     
     @staticmethod
-    def create_index_content(deck_meta: Dict, cards: List[Card]) -> str:
-        """Create index markdown content."""
+    def create_index_content(deck_meta: Dict, cards: List[Card], page: int = 1, page_count: int = 1) -> str:
+        """Create index markdown content, for one page of the index if it has several."""
         lines = [
             f"# {deck_meta['title']}",
             ""
         ]
         
-        if 'introduction' in deck_meta:
+        if 'introduction' in deck_meta and page == 1:
             lines.extend([deck_meta['introduction'], ""])
             
         lines.extend([
             "## Questions",
             *[MarkdownGenerator.get_card_item(card.id) for card in cards]
         ])
+        if page_count > 1:
+            links = [f"Page {page} of {page_count}"]
+            if page > 1:
+                links.append(f"[Previous]({MarkdownGenerator.page_name(page - 1)})")
+            if page < page_count:
+                links.append(f"[Next]({MarkdownGenerator.page_name(page + 1)})")
+            lines.extend(["", " - ".join(links)])
         return "\n".join(lines)
     
+    @staticmethod
+    def page_name(page: int) -> str:
+        """Link target of an index page: index for the first page, index-<n> for the others."""
+        return "index" if page == 1 else f"index-{page}"
+    
+    @staticmethod
+    def paginate(cards: List[Card], page_size: int) -> List[List[Card]]:
+        """Split cards into index pages of page_size cards (a single page if page_size is 0)."""
+        if page_size <= 0 or len(cards) <= page_size:
+            return [cards]
+        return [cards[i:i + page_size] for i in range(0, len(cards), page_size)]
+    
+    @staticmethod
+    def create_index_pages(deck_meta: Dict, cards: List[Card], page_size: int = DEFAULT_PAGE_SIZE) -> List[str]:
+        """Create the markdown of every index page, first page first."""
+        pages = MarkdownGenerator.paginate(cards, page_size)
+        return [MarkdownGenerator.create_index_content(deck_meta, page_cards, page, len(pages))
+                for page, page_cards in enumerate(pages, 1)]
+    
+    @staticmethod
+    def create_search_index(cards: List[Card], page_size: int = DEFAULT_PAGE_SIZE) -> str:
+        """
+        Create the JSON search index of a deck.
+        
+        Lists every card's id, question text and question type, with the index
+        page that links to it, so that clients can filter cards without
+        loading every index page.
+        """
+        entries = []
+        for page, page_cards in enumerate(MarkdownGenerator.paginate(cards, page_size), 1):
+            for card in page_cards:
+                entries.append({
+                    'id': card.id,
+                    'question': card.question_text,
+                    'type': card.content.get('question_type'),
+                    'page': MarkdownGenerator.page_name(page),
+                })
+        return json.dumps({'cards': entries}, ensure_ascii=False, indent=1) + "\n"
+    
     @staticmethod
     def get_card_item(card_id: str) -> str:
         return (
@@ -120,74 +151,180 @@ class MarkdownGenerator:
     
 class YAMLToMarkdown:
     """Main YAML to Markdown conversion class."""
-    def __init__(self, input_paths: list[str]):
+    def __init__(
+        self,
+        input_paths: list[str],
+        use_cache: bool = True,
+        deck_index: Optional[DeckIndex] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        search_index: bool = False
+    ):
         self.input_paths = input_paths
-        logger.info(f"Input paths: {self.input_paths}")
-        self.deck_folders = get_deck_folders(self.input_paths)
-        logger.info(f"Deck folders: {self.deck_folders}")
+        self.use_cache = use_cache
+        self.page_size = page_size
+        self.search_index = search_index
+        logger.debug("Input paths: %s", self.input_paths)
+        self.deck_index = (deck_index if deck_index is not None
+                           else DeckIndex.discover(self.input_paths, use_cache=use_cache))
+        self.deck_folders = self.deck_index.decks
+        logger.debug("Deck folders: %s", self.deck_folders)
         self.markdown_gen = MarkdownGenerator()
+        # Files rewritten, and files left as is because the cache or their content showed no change
+        self.written = 0
+        self.skipped = 0
+
+    def write(self, output_file: Path, content: str) -> bool:
+        """Atomically write content unless output_file already holds it, counting the outcome."""
+        if write_if_changed(output_file, content):
+            self.written += 1
+            return True
+        self.skipped += 1
+        return False
+
+    @staticmethod
+    def card_digest(question_folder: str) -> str:
+        """Build cache digest of the files a card's markdown is generated from."""
+        folder = Path(question_folder)
+        return hash_inputs([folder / "content.yaml", folder / "answers.yaml"])
+
+    def index_digest(self, folder: str, cards: List[Card]) -> str:
+        """Build cache digest of the files and options a deck's index pages are generated from."""
+        inputs = [Path(folder) / "index.yaml"]
+        if self.search_index:
+            # The search index holds the question text and type of every card
+            inputs.extend(Path(str(card.folder)) / "content.yaml" for card in cards)
+        return hash_inputs(inputs, {
+            'cards': [card.id for card in cards],
+            'page_size': self.page_size,
+            'search_index': self.search_index,
+        })
 
-    def process_card(self, card_data: dict) -> None:
-        if not isinstance(card_data, dict):
-            logger.error(f"Invalid card_data: {card_data}")
-            return
+    def process_card(self, card_data: Union[Card, dict]) -> bool:
+        """
+        Write content.md for a loaded card (or card dict), unless it is already up to date.
+
+        Returns:
+            bool: True if content.md holds the card's markdown, False on failure
+        """
+        if not isinstance(card_data, (Card, dict)):
+            logger.error("Invalid card_data: %s", card_data)
+            return False
         try:
-            card_id = card_data['id']
-            logger.info(f"Processing card: {card_id} -> Output: {Path(card_data['question_folder']) / f'content.md'}")
-            card = Card(card_id, card_data)
-            content = self.markdown_gen.card_to_markdown(card)
-            output_file = Path(card_data['question_folder']) / f"content.md"
-            output_file.write_text(content, encoding='utf-8')
-            logger.info(f"Created markdown file for card {card_id}")
+            card = card_data if isinstance(card_data, Card) else Card(card_data['id'], card_data)
+            card_id = card.id
+            with span("markdown", card_id):
+                content = self.markdown_gen.card_to_markdown(card)
+                output_file = Path(str(card.folder)) / f"content.md"
+                written = self.write(output_file, content)
+            if written:
+                logger.debug("Created markdown file for card %s: %s", card_id, output_file)
+            else:
+                logger.debug("Markdown file for card %s is unchanged", card_id)
+            return True
         except Exception as e:
-            logger.error(f"Failed to process card: {e}")
+            logger.error("Failed to process card: %s", e)
+            return False
 
     def process_deck(self) -> None:
         try:
             if not self.deck_folders:
-                logger.warning(f"No deck folders found in the provided input paths.")
+                logger.warning("No deck folders found in the provided input paths.")
                 return
-            logger.info(f"Processing {len(self.deck_folders)} decks")
+            logger.info("Processing %d decks", len(self.deck_folders))
             for folder in self.deck_folders:
                 # Process cards
                 cards = []
-                logger.info(f"Processing deck: {folder}")
-                question_folders = get_question_folders([folder])
-                card_loader = CardLoader(question_folders)
-                logger.info(f"Processing {len(question_folders)} cards")
+                logger.debug("Processing deck: %s", folder)
+                question_folders = self.deck_index.question_folders([folder])
+                cache = BuildCache(folder)
+                yaml_loader = YAMLLoader()
+                skipped = 0
                 for question_folder in question_folders:
                     card_id = Path(question_folder).name
                     try:
-                        card_data = card_loader.load_card(question_folder)
-                        cards.append(Card(card_id, card_data))
-                        self.process_card(card_data)
+                        card = Card.load(question_folder, yaml_loader)
+                        cards.append(card)
+                        output_file = Path(question_folder) / "content.md"
+                        digest = self.card_digest(question_folder)
+                        if self.use_cache and cache.is_fresh(output_file, digest):
+                            skipped += 1
+                            self.skipped += 1
+                            continue
+                        if self.process_card(card):
+                            cache.update(output_file, digest)
                     except Exception as e:
-                        logger.error(f"Failed to process card {card_id}: {e}")
-                # Create index.md deck page
-                logger.info(f"Processing deck index: {folder}")
-                index_path = Path(folder) / "index.yaml"
-                deck_meta = yaml.safe_load(index_path.read_text(encoding='utf-8'))
-                index_content = self.markdown_gen.create_index_content(deck_meta, cards)
-                index_path = Path(folder) / "index.md"
-                logger.info(f"Writing deck index to: {index_path}")
-                index_path.write_text(index_content, encoding='utf-8')
+                        logger.error("Failed to process card %s: %s", card_id, e)
+                logger.info("Deck %s: %d cards, %d unchanged", folder, len(question_folders), skipped)
+                index_file = Path(folder) / "index.md"
+                index_digest = self.index_digest(folder, cards)
+                if not (self.use_cache and cache.is_fresh(index_file, index_digest)):
+                    self.process_index(folder, cards)
+                    cache.update(index_file, index_digest)
+                else:
+                    self.skipped += 1
+                cache.save()
+                yaml_loader.save()
+            logger.info("Markdown files: %d written, %d unchanged", self.written, self.skipped)
         except Exception as e:
-            logger.error(f"Failed to process deck: {e}")
+            logger.error("Failed to process deck: %s", e)
             raise
 
+    def process_index(self, folder: str, cards: List[Card]) -> None:
+        """
+        Create the deck index pages from index.yaml and the loaded cards.
+        
+        Writes index.md, plus index-<n>.md continuation pages when the deck
+        has more than page_size cards, and the JSON search index if enabled.
+        Continuation pages left over from a larger deck, and a search index
+        left over from a build that enabled it, are removed.
+        """
+        with span("markdown"):
+            self._process_index(folder, cards)
+
+    def _process_index(self, folder: str, cards: List[Card]) -> None:
+        logger.debug("Processing deck index: %s", folder)
+        index_path = Path(folder) / "index.yaml"
+        deck_meta = load_yaml(index_path)
+        pages = self.markdown_gen.create_index_pages(deck_meta, cards, self.page_size)
+        for page, index_content in enumerate(pages, 1):
+            index_path = Path(folder) / f"{self.markdown_gen.page_name(page)}.md"
+            logger.debug("Writing deck index to: %s", index_path)
+            self.write(index_path, index_content)
+        for entry in os.scandir(folder):
+            match = INDEX_PAGE_PATTERN.fullmatch(entry.name)
+            if match and int(match.group(1)) > len(pages):
+                logger.info("Removing stale index page: %s", entry.path)
+                os.unlink(entry.path)
+        search_index_path = Path(folder) / SEARCH_INDEX_NAME
+        if self.search_index:
+            self.write(search_index_path, self.markdown_gen.create_search_index(cards, self.page_size))
+        elif search_index_path.exists():
+            logger.info("Removing stale search index: %s", search_index_path)
+            search_index_path.unlink()
+
 def main() -> int:
     """Main entry point for the script."""
     import argparse
     parser = argparse.ArgumentParser(description='Convert YAML cards to Markdown')
     parser.add_argument('input_paths', nargs='+', help='List of folders or content.yaml files to process')
+    parser.add_argument('--force', action='store_true', help='Regenerate every card, ignoring the build cache')
+    parser.add_argument('--index-page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'Cards per deck index page (default: {DEFAULT_PAGE_SIZE}; 0 lists every card on index.md)')
+    parser.add_argument('--search-index', action='store_true',
+                        help=f'Also write a JSON search index ({SEARCH_INDEX_NAME}) next to each index.md')
+    add_profile_arguments(parser)
+    add_logging_arguments(parser)
     args = parser.parse_args()
+    configure_logging(args.quiet, args.verbose)
     try:
-        converter = YAMLToMarkdown(args.input_paths)
-        converter.process_deck()
+        with profile_session(args.profile_out, args.profile_format):
+            converter = YAMLToMarkdown(args.input_paths, use_cache=not args.force,
+                                       page_size=args.index_page_size, search_index=args.search_index)
+            converter.process_deck()
         logger.info("Conversion completed successfully")
         return 0
     except Exception as e:
-        logger.error(f"Conversion failed: {e}")
+        logger.error("Conversion failed: %s", e)
         return 1
 
 if __name__ == "__main__":
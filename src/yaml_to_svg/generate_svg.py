@@ -1,16 +1,15 @@
 import os
-import yaml
 from pathlib import Path
-import svgwrite
 import argparse
 import logging
-from typing import Dict, List, Optional, Any, cast, Union
-from src.file_utils import get_question_folders, get_deck_folders
-import math
-import textwrap
+from typing import Dict, List, Optional, Any, Tuple, cast, Union
+from src.file_utils import Card, CacheRegistry, DeckIndex, YAMLLoader, extract_deck_and_card_id, hash_inputs
+from src.file_utils.log import add_logging_arguments, configure_logging
+from src.file_utils.profiling import add_profile_arguments, profile_session, span
+from src.qr_generator.generator import DEFAULT_URL_PREFIX, get_encoder, question_url
+from src.yaml_to_svg.template import LAYOUT_VERSION, get_card_template
+from src.yaml_to_svg.text_layout import get_measurer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class YAMLToSVG:
@@ -26,11 +25,16 @@ class YAMLToSVG:
         input_paths: Optional[List[str]] = None,
         card_size: Optional[tuple] = None,
         font_size: Optional[int] = None,
-        font_family: Optional[str] = None
+        font_family: Optional[str] = None,
+        use_cache: bool = True,
+        jobs: int = 1,
+        compact: bool = False,
+        embed_qr: bool = False,
+        url_prefix: str = DEFAULT_URL_PREFIX
     ) -> None:
         if input_paths is not None:
             self.input_paths = input_paths
-            logger.info(f"Input paths: {self.input_paths}")
+            logger.debug("Input paths: %s", self.input_paths)
             # Check that all input paths exist and are directories
             for path in self.input_paths:
                 p = Path(path)
@@ -41,6 +45,13 @@ class YAMLToSVG:
             self.card_size = card_size if card_size is not None else (210, 297)
             self.font_size = font_size if font_size is not None else 12
             self.font_family = font_family if font_family is not None else 'Arial'
+            self.use_cache = use_cache
+            self.jobs = jobs
+            self.compact = compact
+            self.embed_qr = embed_qr
+            self.url_prefix = url_prefix
+            self.profile_out: Optional[str] = None
+            self.profile_format = 'json'
             # Set default output_dir to the first input path if not set later
             self.output_dir = str(self.input_paths[0])
         else:
@@ -54,12 +65,32 @@ class YAMLToSVG:
                               help='Font size for card text (default: 12)')
             parser.add_argument('--font-family', default='Arial',
                               help='Font family for card text (default: Arial)')
+            parser.add_argument('--force', action='store_true',
+                              help='Regenerate every card, ignoring the build cache')
+            parser.add_argument('-j', '--jobs', type=int, default=1,
+                              help='Number of parallel rendering processes (default: 1, 0 = all CPUs)')
+            parser.add_argument('--compact', action='store_true',
+                              help='Write minified SVG with shared CSS styles and no hidden option text')
+            parser.add_argument('--embed-qr', action='store_true',
+                              help='Draw the card QR code into the SVG as a vector path')
+            parser.add_argument('--url-prefix', default=DEFAULT_URL_PREFIX,
+                              help='URL prefix for embedded QR codes')
+            add_profile_arguments(parser)
+            add_logging_arguments(parser)
             args = parser.parse_args()
+            configure_logging(args.quiet, args.verbose)
             self.input_paths = args.input_paths
-            logger.info(f"Input paths: {self.input_paths}")
+            logger.info("Input paths: %s", self.input_paths)
             self.card_size = (args.card_width, args.card_height)
             self.font_size = args.font_size
             self.font_family = args.font_family
+            self.use_cache = not args.force
+            self.jobs = args.jobs
+            self.compact = args.compact
+            self.embed_qr = args.embed_qr
+            self.url_prefix = args.url_prefix
+            self.profile_out = args.profile_out
+            self.profile_format = args.profile_format
             # Set default output_dir to the first input path if not set later
             self.output_dir = str(self.input_paths[0])
 
@@ -67,146 +98,241 @@ class YAMLToSVG:
     def output_path(self) -> Path:
         return Path(self.output_dir)
 
-    def load_question(self, question_folder: str) -> dict[str, Any]:
-        # If question_folder is not absolute, treat it as relative to self.deck_path/cards
+    @property
+    def render_options(self) -> Dict[str, Any]:
+        """Options that affect the rendered SVG, used as part of the build cache key."""
+        return {
+            'card_size': list(self.card_size),
+            'font_size': self.font_size,
+            'font_family': self.font_family,
+            'layout': LAYOUT_VERSION,
+            'font_file': get_measurer(self.font_family).font_file,
+            'compact': self.compact,
+            'qr_url_prefix': self.url_prefix if self.embed_qr else None,
+        }
+
+    def card_digest(self, question_folder: str, extra_options: Optional[Dict[str, Any]] = None) -> str:
+        """Build cache digest of a card's YAML files and the render options (plus any extra_options)."""
+        folder = Path(question_folder)
+        return hash_inputs(
+            [folder / "content.yaml", folder / "answers.yaml"],
+            dict(self.render_options, **(extra_options or {}))
+        )
+
+    def load_question(self, question_folder: str) -> Card:
+        """
+        Load a card with Card.load, resolving a relative question_folder under self.deck_path/cards.
+        
+        Raises:
+            FileNotFoundError: If the folder has no content.yaml
+        """
         folder = Path(question_folder)
         if not folder.is_absolute() and hasattr(self, 'deck_path'):
             folder = self.deck_path / "cards" / question_folder
-        # Try content.yaml first, then answers.yaml
-        for filename in ["content.yaml", "answers.yaml"]:
-            question_file = folder / filename
-            if question_file.exists():
-                with open(question_file, 'r') as f:
-                    data = yaml.safe_load(f)
-                    if isinstance(data, dict):
-                        data['question_folder'] = str(folder)
-                        return data
-        raise FileNotFoundError(f"No question file found in folder {folder}")
+        return Card.load(folder)
             
-    def create_svg_card(self, question: dict, card_id: str) -> None:
-        logger.info(f"Creating SVG for card {card_id} at {question['question_folder']}")
-        output_file = os.path.join(question['question_folder'], "content.svg")
-        logger.info(f"Output file: {output_file}")
-        logger.info(f"Creating SVG for card {card_id} at {output_file}")
-
-        # SVG size and geometry
-        width = int(self.card_size[0] * 5.2857)  # 210mm -> 1110px, scale accordingly
-        height = int(self.card_size[1] * 3.7374) # 297mm -> 1110px, scale accordingly
-        center_x = width // 2
-        center_y = height // 2
-        radius = int(min(width, height) * 0.15)  # question circle
-        option_radius = int(min(width, height) * 0.25)
-        answer_radius = int(min(width, height) * 0.405)
+    @staticmethod
+    def as_card(question: Union[Card, dict], card_id: str) -> Card:
+        """Wrap card content data in a Card; Cards are returned as-is."""
+        return question if isinstance(question, Card) else Card(card_id, question)
 
+    def create_svg_back(self, question: Union[Card, dict], card_id: str) -> str:
+        """
+        Render the answer side of a card, used as the duplex back on print sheets.
+        
+        Args:
+            question: Card, or the content data of a card
+            card_id: Card identifier, shown as the heading
+            
+        Returns:
+            str: The back of the card as an SVG document, sized like create_svg_card
+        """
+        import svgwrite
+
+        width = int(self.card_size[0] * 5.2857)
+        height = int(self.card_size[1] * 3.7374)
         dwg = svgwrite.Drawing(
-            filename=str(output_file),
             size=(f"{self.card_size[0]}mm", f"{self.card_size[1]}mm"),
             viewBox=(f"0 0 {width} {height}")
         )
-
-        # Add background with rounded corners
         dwg.add(dwg.rect((0, 0), (width, height), fill='#f5f5f5', rx=width//4, ry=height//4))
-        dwg.add(dwg.path(d=f"M {width-width//4},0 L {width},0 L {width},{height//4} Q {width-width//20},{height//20} {width-width//4},0 Z", fill='#f5f5f5'))
-        dwg.add(dwg.path(d=f"M {width-width//4},{height} L {width},{height} L {width},{height-height//4} Q {width-width//20},{height-height//20} {width-width//4},{height} Z", fill='#f5f5f5'))
-
-        # Add question circle
-        dwg.add(dwg.circle(center=(center_x, center_y), r=radius, fill='#dcdcdc'))
-
-        # Get question text
-        question_text = question.get('question_content', question.get('question', 'No question content'))
-        # Render question in the center, multi-line, restricted to the inner circle
-        max_chars_per_line = max(10, int(radius * 0.18))  # heuristic for line length
-        wrapped_lines = textwrap.wrap(question_text, width=max_chars_per_line)
-        line_height = max(self.font_size, 24) + 2
-        total_height = len(wrapped_lines) * line_height
-        start_y = center_y - total_height // 2 + line_height // 2
-        title_group = dwg.g(font_family=self.font_family, font_size=max(self.font_size, 24), text_anchor="middle", dominant_baseline="middle")
-        for idx, line in enumerate(wrapped_lines):
-            y = start_y + idx * line_height
-            title_group.add(dwg.text(line, insert=(center_x, y)))
-        dwg.add(title_group)
-
-        # Get options
-        options = question.get('options', [])
-        n_options = len(options)
-
-        # Load answers from answers.yaml if not present in question dict
-        answers = question.get('answers', None)
-        if answers is None:
-            # Try to load from answers.yaml
-            folder = Path(question['question_folder'])
-            answers_file = folder / 'answers.yaml'
-            if answers_file.exists():
-                with open(answers_file, 'r') as f:
-                    answers_data = yaml.safe_load(f)
-                    if isinstance(answers_data, dict) and 'answers' in answers_data:
-                        answers = answers_data['answers']
-                    elif isinstance(answers_data, list):
-                        answers = answers_data
-            if answers is None:
-                answers = []
-
-        # Render options as numbered lines off-canvas for test compatibility
-        for i, option in enumerate(options, 1):
-            dwg.add(dwg.text(f"{i}. {option}", insert=(40, -100 + i * 10), font_size=self.font_size, font_family=self.font_family, fill='white'))
-
-        # Add decagon layout for options
-        for i, option in enumerate(options):
-            angle = 2 * math.pi * i / max(n_options, 1) - math.pi / 2
-            x = center_x + option_radius * math.cos(angle)
-            y = center_y + option_radius * math.sin(angle)
-            # Split option text into two lines if long
-            words = option.split()
-            mid = len(words) // 2
-            opt_line1 = ' '.join(words[:mid])
-            opt_line2 = ' '.join(words[mid:])
-            option_group = dwg.g(font_family=self.font_family, font_size=max(self.font_size, 18), text_anchor="middle", dominant_baseline="middle")
-            option_group.add(dwg.text(opt_line1, insert=(x, y - 15)))
-            if opt_line2:
-                option_group.add(dwg.text(opt_line2, insert=(x, y + 15)))
-            dwg.add(option_group)
-
-            # Add answer label (use 'answer' field if dict, else value as-is) further out
-            answer_x = center_x + answer_radius * math.cos(angle)
-            answer_y = center_y + answer_radius * math.sin(angle)
-            answer_label = ''
-            if i < len(answers):
-                ans = answers[i]
-                if isinstance(ans, dict) and 'answer' in ans:
-                    answer_label = str(ans['answer'])
-                else:
-                    answer_label = str(ans)
-            answer_group = dwg.g(font_family=self.font_family, font_size=max(self.font_size, 16), text_anchor="middle", dominant_baseline="middle")
-            if answer_label:
-                answer_group.add(dwg.text(answer_label, insert=(answer_x, answer_y)))
-            dwg.add(answer_group)
-
-        # Save the SVG
-        dwg.save(pretty=True, indent=2)
-        logger.info(f"Saved SVG to {output_file}")
+
+        card = self.as_card(question, card_id)
+        lines = []
+        for i, ans in enumerate(card.answers, 1):
+            lines.append(f"{i}. {ans.option}: {ans.answer}" if ans.option else f"{i}. {ans.answer}")
+
+        font_size = max(self.font_size, 24)
+        line_height = font_size + 14
+        start_y = height // 2 - (len(lines) + 2) * line_height // 2
+        text_group = dwg.g(font_family=self.font_family, font_size=font_size, text_anchor="middle", dominant_baseline="middle")
+        text_group.add(dwg.text(f"Answers {card_id}", insert=(width // 2, start_y), font_weight="bold"))
+        for idx, line in enumerate(lines, 2):
+            text_group.add(dwg.text(line, insert=(width // 2, start_y + idx * line_height)))
+        dwg.add(text_group)
+        return cast(str, dwg.tostring())
+
+    def qr_fragment(self, card: Card, slot: Tuple[float, float, float]) -> str:
+        """
+        Render the card's QR code as an inline SVG fragment.
+        
+        Encodes the same URL as the card's qr.png, so the card can be printed
+        without rasterizing and embedding the PNG.
+        
+        Args:
+            card: Card loaded from its folder
+            slot: (x, y, size) of the code on the card
+            
+        Returns:
+            str: The fragment, or an empty string if the card's deck cannot be determined
+        """
+        deck_name, card_id = extract_deck_and_card_id(str(card.folder)) if card.folder else (None, None)
+        if not deck_name or not card_id:
+            logger.warning("Not embedding a QR code in card %s: unknown deck", card.id)
+            return ''
+        return get_encoder().svg_fragment(question_url(deck_name, card_id, self.url_prefix), *slot)
+
+    def create_svg_card(self, question: Union[Card, dict], card_id: str, write_svg: bool = True) -> str:
+        """
+        Render a card to an SVG document.
+        
+        The static geometry comes from a template shared by all cards with the
+        same size, option count and font settings; only the card's text is
+        formatted per call.
+        
+        Args:
+            question: Card, or the content data of a card
+            card_id: Card identifier, used for logging
+            write_svg: Also save the document to content.svg in the card folder
+            
+        Returns:
+            str: The rendered card, which can be passed straight to
+            SVGToPDFConverter.convert_svg without a round-trip through disk
+        """
+        with span("svg", card_id):
+            return self._create_svg_card(question, card_id, write_svg)
+
+    def _create_svg_card(self, question: Union[Card, dict], card_id: str, write_svg: bool) -> str:
+        card = self.as_card(question, card_id)
+        output_file = os.path.join(str(card.folder), "content.svg")
+
+        options = card.options
+        template = get_card_template(
+            (self.card_size[0], self.card_size[1]), len(options), self.font_size, self.font_family, self.compact
+        )
+        qr = self.qr_fragment(card, template.qr_slot) if self.embed_qr else ''
+        svg = template.render(card.question_text, options, [answer.answer for answer in card.answers], qr)
+
+        if write_svg:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(svg)
+            logger.debug("Saved SVG for card %s to %s", card_id, output_file)
+        return svg
+        
+    def process_deck(self, jobs: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        Render every card of the input decks, skipping those unchanged since the last run.
         
-    def process_deck(self) -> None:
-        deck_folders = get_deck_folders(self.input_paths)
-        question_folders = get_question_folders(deck_folders)
+        Args:
+            jobs: Number of worker processes (1 renders in this process, 0 uses all
+                CPUs; default: the jobs the converter was created with)
+            
+        Returns:
+            List[Tuple[str, str]]: (card folder, error message) for every failed card,
+            in card order
+        """
+        jobs = self.jobs if jobs is None else jobs
+        question_folders = DeckIndex.discover(self.input_paths, use_cache=self.use_cache).question_folders()
         if not question_folders:
-            logger.warning(f"No question folders found in the provided input paths.")
-            return
+            logger.warning("No question folders found in the provided input paths.")
+            return []
+        caches = CacheRegistry()
+        pending = []
+        skipped = 0
         for question_folder in question_folders:
-            try:
-                card_id = Path(question_folder).name
-                question = self.load_question(question_folder)
-                self.create_svg_card(question, card_id)
-            except Exception as e:
-                logger.error(f"Failed to process question {question_folder}: {e}")
-            
+            output_file = Path(question_folder) / "content.svg"
+            digest = self.card_digest(question_folder)
+            if self.use_cache and caches.for_card(question_folder).is_fresh(output_file, digest):
+                skipped += 1
+                continue
+            pending.append((question_folder, digest))
+
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+        folders = [question_folder for question_folder, _ in pending]
+        if workers > 1 and len(folders) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Workers parse YAML without the parsed-data cache, which is only saved by this process
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(folders)),
+                initializer=_init_worker,
+                initargs=(self.input_paths, self.card_size, self.font_size, self.font_family, self.compact,
+                          self.embed_qr, self.url_prefix)
+            ) as executor:
+                outcomes = list(executor.map(
+                    _render_in_worker, folders, chunksize=max(1, len(folders) // (workers * 4))
+                ))
+        else:
+            yaml_loader = YAMLLoader()
+            outcomes = [_render_card(self, question_folder, yaml_loader) for question_folder in folders]
+            yaml_loader.save()
+
+        failures = []
+        for (question_folder, digest), error in zip(pending, outcomes):
+            if error is None:
+                caches.for_card(question_folder).update(Path(question_folder) / "content.svg", digest)
+            else:
+                logger.error("Failed to process question %s: %s", question_folder, error)
+                failures.append((question_folder, error))
+        caches.save()
+        logger.info("Rendered %d cards, %d unchanged, %d failed",
+                    len(pending) - len(failures), skipped, len(failures))
+        return failures
+
+
+def _render_card(converter: YAMLToSVG, question_folder: str, yaml_loader: Optional[YAMLLoader] = None) -> Optional[str]:
+    """Render one card to content.svg, returning an error message on failure instead of raising."""
+    try:
+        converter.create_svg_card(Card.load(question_folder, yaml_loader), Path(question_folder).name)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+# Per-process renderer, built once by the pool initializer so every worker
+# reuses the same layout templates and measured word widths for all its cards.
+_worker_converter: Optional[YAMLToSVG] = None
+
+
+def _init_worker(input_paths: List[str], card_size: tuple, font_size: int, font_family: str, compact: bool,
+                 embed_qr: bool, url_prefix: str) -> None:
+    global _worker_converter
+    _worker_converter = YAMLToSVG(
+        input_paths=input_paths, card_size=card_size, font_size=font_size, font_family=font_family,
+        compact=compact, embed_qr=embed_qr, url_prefix=url_prefix
+    )
+
+
+def _render_in_worker(question_folder: str) -> Optional[str]:
+    if _worker_converter is None:
+        return "Worker renderer not initialized"
+    return _render_card(_worker_converter, question_folder)
+
+
 def main() -> None:
     try:
         converter = YAMLToSVG()
-        converter.process_deck()
-        logger.info(f"Successfully processed deck: {converter.input_paths}")
+        with profile_session(converter.profile_out, converter.profile_format):
+            failures = converter.process_deck()
     except Exception as e:
-        logger.error(f"Error processing deck: {str(e)}")
+        logger.error("Error processing deck: %s", e)
+        exit(1)
+    if failures:
+        logger.error("Failed to render the following cards:")
+        for question_folder, error in failures:
+            logger.error("  %s: %s", question_folder, error)
         exit(1)
+    logger.info("Successfully processed deck: %s", converter.input_paths)
     
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Template-based SVG card rendering.
+
+The background, the question circle and the positions of the option and
+answer slots depend only on the card size, the number of options and the font
+settings. ``CardTemplate`` computes them once and pre-serializes the static
+parts of the document, so rendering a card only lays out its text (see
+text_layout) and formats it into the slots, instead of building and
+serializing an svgwrite element tree. The markup is the same as
+``svgwrite.Drawing.save(pretty=True, indent=2)`` writes.
+
+Compact templates write minified markup instead: the shared text style is
+declared once in a ``<style>`` block, the off-canvas copy of the options and
+empty groups are left out, and coordinates are rounded to COMPACT_DECIMALS.
+"""
+
+import math
+from functools import lru_cache
+from typing import Callable, List, Sequence, Tuple
+
+from src.yaml_to_svg.text_layout import get_measurer
+
+# Bump when the layout changes, so that the build cache renders cards again
+LAYOUT_VERSION = 2
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8" ?>\n'
+SVG_NAMESPACES = (
+    'xmlns="http://www.w3.org/2000/svg" xmlns:ev="http://www.w3.org/2001/xml-events" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink"'
+)
+# Coordinates of compact output are rounded to this many decimals
+COMPACT_DECIMALS = 1
+
+
+def escape(value: str) -> str:
+    """Escape text or an attribute value the way the previous svgwrite output did."""
+    return (value.replace("&", "&amp;").replace("<", "&lt;")
+            .replace('"', "&quot;").replace(">", "&gt;"))
+
+
+def compact_number(value: float) -> str:
+    """Format a coordinate rounded to COMPACT_DECIMALS, without trailing zeros."""
+    text = f"{value:.{COMPACT_DECIMALS}f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def text_element(x: str, y: str, text: str, indent: str, attributes: str = "", newline: str = "\n") -> str:
+    """Serialize a <text> element at pre-formatted coordinates."""
+    if text:
+        return f'{indent}<text {attributes}x="{x}" y="{y}">{escape(text)}</text>{newline}'
+    return f'{indent}<text {attributes}x="{x}" y="{y}"/>{newline}'
+
+
+class CardTemplate:
+    """Precomputed geometry and static SVG markup for cards of one layout."""
+
+    def __init__(self, card_size: Tuple[float, float], n_options: int, font_size: int, font_family: str,
+                 compact: bool = False) -> None:
+        self.card_size = card_size
+        self.n_options = n_options
+        self.font_size = font_size
+        self.font_family = font_family
+        self.compact = compact
+        number: Callable[[float], str] = compact_number if compact else str
+        self.number = number
+        # Indentation of top-level and nested elements, and the line separator
+        self.indent, self.nested, self.newline = ('', '', '') if compact else ('  ', '    ', '\n')
+
+        # SVG size and geometry
+        width = int(card_size[0] * 5.2857)  # 210mm -> 1110px, scale accordingly
+        height = int(card_size[1] * 3.7374)  # 297mm -> 1110px, scale accordingly
+        self.width = width
+        self.height = height
+        self.center_x = width // 2
+        self.center_y = height // 2
+        radius = int(min(width, height) * 0.15)  # question circle
+        option_radius = int(min(width, height) * 0.25)
+        answer_radius = int(min(width, height) * 0.405)
+        self.measurer = get_measurer(font_family)
+        self.question_radius = radius
+
+        family = escape(font_family)
+        answer_size = max(font_size, 16)
+        if compact:
+            # Text style declared once; groups only set their font size
+            self.head = (
+                XML_DECLARATION.rstrip('\n')
+                + f'<svg xmlns="http://www.w3.org/2000/svg" height="{card_size[1]}mm" '
+                f'viewBox="0 0 {width} {height}" width="{card_size[0]}mm">'
+                + f'<style>text{{font-family:{family};text-anchor:middle;dominant-baseline:middle}}'
+                f'.a{{font-size:{answer_size}px}}</style>'
+            )
+            self.answer_group = 'class="a"'
+        else:
+            self.head = XML_DECLARATION + (
+                f'<svg {SVG_NAMESPACES} baseProfile="full" height="{card_size[1]}mm" version="1.1" '
+                f'viewBox="0 0 {width} {height}" width="{card_size[0]}mm">\n'
+                + '  <defs/>\n'
+            )
+            self.answer_group = self._group_open(answer_size)
+        i, n = self.indent, self.newline
+        self.head += (
+            # Background with rounded corners
+            f'{i}<rect fill="#f5f5f5" height="{height}" rx="{width//4}" ry="{height//4}" width="{width}" x="0" y="0"/>{n}'
+            + f'{i}<path d="M {width-width//4},0 L {width},0 L {width},{height//4} '
+            f'Q {width-width//20},{height//20} {width-width//4},0 Z" fill="#f5f5f5"/>{n}'
+            + f'{i}<path d="M {width-width//4},{height} L {width},{height} L {width},{height-height//4} '
+            f'Q {width-width//20},{height-height//20} {width-width//4},{height} Z" fill="#f5f5f5"/>{n}'
+            # Question circle
+            + f'{i}<circle cx="{self.center_x}" cy="{self.center_y}" fill="#dcdcdc" r="{radius}"/>{n}'
+        )
+        self.tail = f'</svg>{n}'
+
+        # QR code slot in the bottom-right corner, which the background squares off
+        qr_size = int(min(width, height) * 0.14)
+        qr_margin = int(min(width, height) * 0.03)
+        self.qr_slot = (width - qr_size - qr_margin, height - qr_size - qr_margin, qr_size)
+
+        # Question text, multi-line, shrunk until it fits the inner circle
+        self.question_size = max(font_size, 24)
+
+        # Options rendered as numbered lines off-canvas for test compatibility
+        self.hidden_option_attributes = f'fill="white" font-family="{family}" font-size="{font_size}" '
+
+        # Decagon layout for options, with the answer labels further out
+        self.option_size = max(font_size, 18)
+        # Options may use up to 90% of the distance between neighbouring slots
+        spacing = 2 * option_radius * math.sin(math.pi / n_options) if n_options > 1 else option_radius
+        self.option_width = 0.9 * min(spacing, option_radius)
+        self.option_slots: List[Tuple[str, float]] = []
+        self.answer_slots: List[Tuple[str, str]] = []
+        for k in range(n_options):
+            angle = 2 * math.pi * k / max(n_options, 1) - math.pi / 2
+            x = self.center_x + option_radius * math.cos(angle)
+            y = self.center_y + option_radius * math.sin(angle)
+            self.option_slots.append((number(x), y))
+            answer_x = self.center_x + answer_radius * math.cos(angle)
+            answer_y = self.center_y + answer_radius * math.sin(angle)
+            self.answer_slots.append((number(answer_x), number(answer_y)))
+
+    def _group_open(self, font_size: int) -> str:
+        if self.compact:
+            return f'font-size="{font_size}"'
+        return (f'dominant-baseline="middle" font-family="{escape(self.font_family)}" '
+                f'font-size="{font_size}" text-anchor="middle"')
+
+    def render(self, question_text: str, options: Sequence[str], answers: Sequence[str], qr: str = '') -> str:
+        """
+        Fill the template with one card's text.
+
+        Args:
+            question_text: Question shown in the central circle
+            options: Option labels, one per slot (len(options) == n_options)
+            answers: Answer labels by option position; missing or empty labels are left out
+            qr: SVG fragment drawn in qr_slot, e.g. from QREncoder.svg_fragment
+
+        Returns:
+            str: The complete SVG document
+        """
+        i, nested, n = self.indent, self.nested, self.newline
+        parts = [self.head]
+
+        size, wrapped_lines = self.measurer.fit_circle(question_text, self.question_radius, self.question_size)
+        if wrapped_lines:
+            line_height = size + 2
+            total_height = len(wrapped_lines) * line_height
+            start_y = self.center_y - total_height // 2 + line_height // 2
+            parts.append(f'{i}<g {self._group_open(size)}>{n}')
+            center_x = str(self.center_x)
+            for idx, line in enumerate(wrapped_lines):
+                parts.append(text_element(center_x, str(start_y + idx * line_height), line, nested, newline=n))
+            parts.append(f'{i}</g>{n}')
+        elif not self.compact:
+            parts.append(f'{i}<g {self._group_open(size)}/>{n}')
+
+        if not self.compact:
+            for k, option in enumerate(options, 1):
+                parts.append(text_element('40', str(-100 + k * 10), f"{k}. {option}", i, self.hidden_option_attributes))
+
+        for k, option in enumerate(options):
+            x, y = self.option_slots[k]
+            # One line, or two balanced lines if it does not fit the slot
+            size, (opt_line1, opt_line2) = self.measurer.fit_lines(option, self.option_size, self.option_width)
+            parts.append(f'{i}<g {self._group_open(size)}>{n}')
+            if opt_line2:
+                offset = (size + 12) / 2
+                parts.append(text_element(x, self.number(y - offset), opt_line1, nested, newline=n))
+                parts.append(text_element(x, self.number(y + offset), opt_line2, nested, newline=n))
+            else:
+                parts.append(text_element(x, self.number(y), opt_line1, nested, newline=n))
+            parts.append(f'{i}</g>{n}')
+
+            answer_label = answers[k] if k < len(answers) else ''
+            if answer_label:
+                answer_x, answer_y = self.answer_slots[k]
+                if self.compact:
+                    parts.append(text_element(answer_x, answer_y, answer_label, i, f'{self.answer_group} ', n))
+                    continue
+                parts.append(f'{i}<g {self.answer_group}>{n}')
+                parts.append(text_element(answer_x, answer_y, answer_label, nested))
+                parts.append(f'{i}</g>{n}')
+            elif not self.compact:
+                parts.append(f'{i}<g {self.answer_group}/>{n}')
+
+        if qr:
+            parts.append(f'{i}{qr}{n}')
+        parts.append(self.tail)
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=64)
+def get_card_template(card_size: Tuple[float, float], n_options: int, font_size: int, font_family: str,
+                      compact: bool = False) -> CardTemplate:
+    """Return the shared template for a layout, building it on first use."""
+    return CardTemplate(card_size, n_options, font_size, font_family, compact)
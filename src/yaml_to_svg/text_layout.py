@@ -0,0 +1,189 @@
+"""
+Font-metric text layout for SVG cards.
+
+Measures text with the glyph advances of a TrueType font loaded through PIL,
+instead of counting characters, so that question text can be wrapped and the
+font shrunk until it fits the question circle, and options split into two
+balanced lines. Word widths are measured once at a reference size, memoized
+in an LRU cache and scaled linearly, which keeps layout cheap over thousands
+of cards.
+"""
+
+import logging
+import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Widths are measured at this size and scaled linearly to the rendered size
+REFERENCE_SIZE = 100
+WORD_CACHE_SIZE = 65536
+MIN_FONT_SIZE = 10
+# Shrink the font by up to this factor before wrapping text onto another line
+SHRINK_BEFORE_WRAP = 0.75
+
+# Font files to measure a font family with, preferring metric-compatible substitutes
+FONT_FILES = {
+    'arial': ('Arial.ttf', 'arial.ttf', 'LiberationSans-Regular.ttf', 'Arimo-Regular.ttf'),
+    'helvetica': ('Helvetica.ttf', 'LiberationSans-Regular.ttf', 'Arimo-Regular.ttf'),
+    'times new roman': ('Times New Roman.ttf', 'times.ttf', 'LiberationSerif-Regular.ttf', 'Tinos-Regular.ttf'),
+    'courier new': ('Courier New.ttf', 'cour.ttf', 'LiberationMono-Regular.ttf', 'Cousine-Regular.ttf'),
+}
+FALLBACK_FONT_FILES = ('DejaVuSans.ttf', 'LiberationSans-Regular.ttf')
+
+
+def _load_font(font_family: str) -> Tuple[Union["ImageFont.FreeTypeFont", "ImageFont.ImageFont"], str]:
+    # PIL is imported when the first font is measured, not when cards are only discovered or loaded
+    from PIL import ImageFont
+
+    family = font_family.split(',')[0].strip().strip('"\'')
+    candidates = FONT_FILES.get(family.lower(), (f"{family}.ttf", f"{family.replace(' ', '')}.ttf"))
+    for name in candidates + FALLBACK_FONT_FILES:
+        try:
+            return ImageFont.truetype(name, REFERENCE_SIZE), name
+        except OSError:
+            continue
+    logger.warning("No TrueType font found for '%s', measuring with the PIL default font", font_family)
+    return ImageFont.load_default(size=REFERENCE_SIZE), "<default>"
+
+
+class TextMeasurer:
+    """Measure rendered text widths in one font family."""
+
+    def __init__(self, font_family: str) -> None:
+        self.font_family = font_family
+        self.font, self.font_file = _load_font(font_family)
+        self.word_width = lru_cache(maxsize=WORD_CACHE_SIZE)(self._measure)
+        self.space_width = self._measure(' ')
+
+    def _measure(self, word: str) -> float:
+        return float(self.font.getlength(word))
+
+    def width(self, text: str, size: float) -> float:
+        """Return the advance width of text at the given font size."""
+        words = text.split()
+        if not words:
+            return 0.0
+        units = sum(self.word_width(word) for word in words) + self.space_width * (len(words) - 1)
+        return units * size / REFERENCE_SIZE
+
+    def wrap(self, text: str, size: float, max_width: float) -> List[str]:
+        """
+        Greedily wrap text into lines no wider than max_width.
+
+        A single word wider than max_width gets a line of its own.
+        """
+        scale = size / REFERENCE_SIZE
+        space = self.space_width * scale
+        lines: List[str] = []
+        line: List[str] = []
+        line_width = 0.0
+        for word in text.split():
+            word_width = self.word_width(word) * scale
+            if line and line_width + space + word_width > max_width:
+                lines.append(' '.join(line))
+                line, line_width = [word], word_width
+            elif line:
+                line.append(word)
+                line_width += space + word_width
+            else:
+                line, line_width = [word], word_width
+        if line:
+            lines.append(' '.join(line))
+        return lines
+
+    def fits(self, lines: List[str], size: float, max_width: float) -> bool:
+        return all(self.width(line, size) <= max_width for line in lines)
+
+    def _fit_chord(self, text: str, total_width: float, size: int, n_lines: int,
+                   usable: float) -> Optional[List[str]]:
+        """Wrap text at size into at most n_lines lines that fit the chord at the block's edge."""
+        half_height = n_lines * (size + 2) / 2
+        if half_height >= usable:
+            return None
+        chord = 2 * math.sqrt(usable * usable - half_height * half_height)
+        if total_width * size / REFERENCE_SIZE > n_lines * chord:
+            return None
+        lines = self.wrap(text, size, chord)
+        if len(lines) <= n_lines and self.fits(lines, size, chord):
+            return lines
+        return None
+
+    def fit_circle(self, text: str, radius: float, max_size: int, min_size: int = MIN_FONT_SIZE,
+                   padding: float = 0.9) -> Tuple[int, List[str]]:
+        """
+        Lay out text inside a circle, wrapping it and shrinking the font as needed.
+
+        The font is first shrunk by up to SHRINK_BEFORE_WRAP before an extra
+        line is added; text that does not fit even then keeps shrinking down
+        to min_size. Every line is given the width of the chord at the top
+        (or bottom) of the text block, so the whole block stays inside the circle.
+
+        Args:
+            text: Text to lay out
+            radius: Circle radius, in the same units as the font size
+            max_size: Preferred font size
+            min_size: Smallest font size to shrink to
+            padding: Fraction of the radius usable for text
+
+        Returns:
+            Tuple[int, List[str]]: The font size and the wrapped lines; at
+            min_size the lines may still overflow if the text is too long
+        """
+        usable = radius * padding
+        min_size = min(min_size, max_size)
+        floor = max(min_size, int(max_size * SHRINK_BEFORE_WRAP))
+        total_width = self.width(text, REFERENCE_SIZE)
+        n_lines = 1
+        while n_lines * (floor + 2) / 2 < usable:
+            for size in range(max_size, floor - 1, -1):
+                lines = self._fit_chord(text, total_width, size, n_lines, usable)
+                if lines is not None:
+                    return size, lines
+            n_lines += 1
+        for size in range(floor - 1, min_size - 1, -1):
+            n_lines = 1
+            while n_lines * (size + 2) / 2 < usable:
+                lines = self._fit_chord(text, total_width, size, n_lines, usable)
+                if lines is not None:
+                    return size, lines
+                n_lines += 1
+        logger.warning("Text does not fit in a circle of radius %s even at font size %d: %s",
+                       radius, min_size, text[:40])
+        return min_size, self.wrap(text, min_size, 2 * usable)
+
+    def split_balanced(self, text: str, size: float) -> Tuple[str, str]:
+        """Split text into two lines of as equal a width as possible; short text stays on one line."""
+        words = text.split()
+        if len(words) < 2:
+            return text.strip(), ''
+        k = min(range(1, len(words)),
+                key=lambda k: max(self.width(' '.join(words[:k]), size), self.width(' '.join(words[k:]), size)))
+        return ' '.join(words[:k]), ' '.join(words[k:])
+
+    def fit_lines(self, text: str, max_size: int, max_width: float,
+                  min_size: int = MIN_FONT_SIZE) -> Tuple[int, Tuple[str, str]]:
+        """
+        Lay out an option label on one line, or two balanced lines, shrinking the font to max_width.
+
+        Returns:
+            Tuple[int, Tuple[str, str]]: The font size and the lines (second one empty for a single line)
+        """
+        min_size = min(min_size, max_size)
+        for size in range(max_size, min_size - 1, -1):
+            if self.width(text, size) <= max_width:
+                return size, (text.strip(), '')
+            lines = self.split_balanced(text, size)
+            if self.fits([line for line in lines if line], size, max_width):
+                return size, lines
+        return min_size, self.split_balanced(text, min_size)
+
+
+@lru_cache(maxsize=16)
+def get_measurer(font_family: str) -> TextMeasurer:
+    """Return the shared measurer of a font family."""
+    return TextMeasurer(font_family)
@@ -0,0 +1,266 @@
+import json
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+import yaml
+import pytest
+from src.build import BuildPipeline
+from src.build.watch import DeckWatcher
+from src.file_utils.cache import CACHE_DIR
+from src.file_utils.deck_index import DECK_INDEX_NAME
+
+@pytest.fixture
+def tmp_path():
+    """Fixture to create a new temporary directory for each test"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+def create_test_deck(base_path, deck_name="build-deck", card_ids=("001", "002")):
+    """Helper to create a deck with valid cards under base_path/decks/<deck_name>."""
+    deck_path = base_path / "decks" / deck_name
+    (deck_path / "cards").mkdir(parents=True)
+    with open(deck_path / "index.yaml", 'w') as f:
+        yaml.dump({'title': 'Build Deck', 'introduction': 'A deck for build tests'}, f)
+    for card_id in card_ids:
+        card_dir = deck_path / "cards" / card_id
+        card_dir.mkdir()
+        with open(card_dir / "content.yaml", 'w') as f:
+            yaml.dump({
+                'card_id': card_id,
+                'question_type': 'short',
+                'question_content': f'Question {card_id}?',
+                'options': ['one', 'two', 'three'],
+            }, f)
+        with open(card_dir / "answers.yaml", 'w') as f:
+            yaml.dump([
+                {'order': 1, 'option': 'one', 'answer': 'uno'},
+                {'order': 2, 'option': 'two', 'answer': 'dos'},
+                {'order': 3, 'option': 'three', 'answer': 'tres'},
+            ], f)
+    return deck_path
+
+def test_pipeline_runs_all_stages_without_pdf(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    pipeline = BuildPipeline([str(deck_path)], stages=["qr", "svg", "markdown"])
+    result = pipeline.run()
+
+    assert result.ok, result.errors
+    assert result.decks == [str(deck_path)]
+    for card_id in ("001", "002"):
+        card_dir = deck_path / "cards" / card_id
+        assert (card_dir / "qr.png").exists()
+        assert (card_dir / "content.md").exists()
+        svg_content = (card_dir / "content.svg").read_text()
+        assert f'Question {card_id}?' in svg_content
+        assert 'uno' in svg_content
+        assert not (card_dir / "content.pdf").exists()
+    assert (deck_path / "index.md").exists()
+    assert len(result.generated["svg"]) == 2
+
+def test_pipeline_records_card_errors(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    (deck_path / "cards" / "002" / "content.yaml").write_text("invalid: yaml: content: [")
+    result = BuildPipeline([str(deck_path)], stages=["svg", "markdown"]).run()
+
+    assert not result.ok
+    assert [(Path(folder).name, stage) for folder, stage, _ in result.errors] == [("002", "load")]
+    assert (deck_path / "cards" / "001" / "content.svg").exists()
+    assert "Question 001" in (deck_path / "index.md").read_text()
+
+def test_pipeline_rejects_unknown_stage(tmp_path):
+    with pytest.raises(ValueError):
+        BuildPipeline([str(tmp_path)], stages=["svg", "html"])
+
+def test_pipeline_full_build(tmp_path):
+    deck_path = create_test_deck(tmp_path, card_ids=("001",))
+    result = BuildPipeline([str(deck_path)]).run()
+
+    assert result.ok, result.errors
+    assert (deck_path / "cards" / "001" / "content.pdf").exists()
+
+def test_pipeline_pdf_without_svg_output(tmp_path):
+    deck_path = create_test_deck(tmp_path, card_ids=("001",))
+    result = BuildPipeline([str(deck_path)], stages=["pdf"]).run()
+
+    assert result.ok, result.errors
+    assert (deck_path / "cards" / "001" / "content.pdf").exists()
+    assert not (deck_path / "cards" / "001" / "content.svg").exists()
+
+def test_build_cli(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    result = subprocess.run([
+        sys.executable, "-m", "src.build", str(deck_path), "--stages", "qr,svg,markdown"],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert (deck_path / "cards" / "001" / "content.svg").exists()
+    assert (deck_path / "index.md").exists()
+
+def test_build_cli_log_levels(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    logs = {}
+    for flag in ("--quiet", None, "--verbose"):
+        result = subprocess.run([
+            sys.executable, "-m", "src.build", str(deck_path), "--stages", "qr,svg,markdown", "--force"]
+            + ([flag] if flag else []),
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        logs[flag] = result.stderr
+    assert logs["--quiet"] == ""
+    # Per-deck summaries by default, per-card detail only when verbose
+    assert "INFO: Built deck" in logs[None]
+    assert "DEBUG" not in logs[None]
+    assert "DEBUG: Saved SVG for card 001" in logs["--verbose"]
+
+    # Card errors are logged to stderr, and --quiet keeps them
+    (deck_path / "cards" / "002" / "content.yaml").write_text("invalid: yaml: content: [")
+    result = subprocess.run(
+        [sys.executable, "-m", "src.build", str(deck_path), "--stages", "svg", "--quiet"],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout == ""
+    assert "ERROR:   [load]" in result.stderr
+
+def test_entry_points_import_heavy_packages_on_use():
+    entry_points = ["src.build.__main__", "src.qr_generator.__main__", "src.svg_to_pdf.converter",
+                    "src.yaml_to_svg.generate_svg", "src.yaml_to_markdown.generate_markdown"]
+    script = "; ".join([f"import {module}" for module in entry_points] + [
+        "import sys",
+        "print(sorted(m for m in ('cairosvg', 'cairocffi', 'PIL', 'qrcode', 'svgwrite') if m in sys.modules))",
+    ])
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=Path(__file__).parent.parent, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+def test_build_cli_profile_out(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    profile = tmp_path / "profile.json"
+    trace = tmp_path / "trace.json"
+    for out, fmt in ((profile, "json"), (trace, "chrome")):
+        result = subprocess.run([
+            sys.executable, "-m", "src.build", str(deck_path), "--stages", "qr,svg,markdown", "--force",
+            "--profile-out", str(out), "--profile-format", fmt],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+    stages = json.loads(profile.read_text())['stages']
+    for stage in ("discovery", "yaml_load", "qr", "svg", "markdown"):
+        assert stages[stage]['count'] > 0
+    assert stages['svg']['cards'] == 2
+    events = json.loads(trace.read_text())['traceEvents']
+    assert {'svg 001', 'svg 002'} <= {event['name'] for event in events}
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+
+def test_pipeline_skips_unchanged_cards(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    stages = ["qr", "svg", "markdown"]
+    BuildPipeline([str(deck_path)], stages=stages).run()
+
+    content = deck_path / "cards" / "002" / "content.yaml"
+    content.write_text(content.read_text().replace("Question 002?", "Edited question?"))
+    result = BuildPipeline([str(deck_path)], stages=stages).run()
+
+    assert result.ok, result.errors
+    assert result.generated["qr"] == []
+    assert result.generated["svg"] == [str(deck_path / "cards" / "002" / "content.svg")]
+    assert result.skipped["svg"] == 1
+    assert result.generated["markdown"] == [str(deck_path / "cards" / "002" / "content.md")]
+    assert "Edited question?" in (deck_path / "cards" / "002" / "content.svg").read_text()
+
+    forced = BuildPipeline([str(deck_path)], stages=stages, use_cache=False).run()
+    assert len(forced.generated["svg"]) == 2
+
+def test_pipeline_without_cache_skips_deck_index(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    result = BuildPipeline([str(deck_path)], stages=["svg"], use_cache=False).run()
+    assert result.ok, result.errors
+    assert not (deck_path / CACHE_DIR / DECK_INDEX_NAME).exists()
+
+def test_watcher_rebuilds_changed_cards(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    pipeline = BuildPipeline([str(deck_path)], stages=["qr", "svg", "markdown"])
+    pipeline.run()
+    watcher = DeckWatcher(pipeline, interval=0.05, debounce=0.05)
+    assert watcher.poll() == (set(), set())
+
+    card_dir = deck_path / "cards" / "002"
+    content = card_dir / "content.yaml"
+    content.write_text(content.read_text().replace("Question 002?", "Edited question?"))
+    cards, decks = watcher.poll()
+    assert (cards, decks) == ({str(card_dir)}, set())
+    result = watcher.rebuild(cards, decks)
+    assert result.ok, result.errors
+    assert result.generated["qr"] == []
+    assert result.generated["svg"] == [str(card_dir / "content.svg")]
+    assert result.generated["markdown"] == [str(card_dir / "content.md")]
+    assert "Edited question?" in (card_dir / "content.svg").read_text()
+
+    index = deck_path / "index.yaml"
+    index.write_text(index.read_text().replace("Build Deck", "Renamed Deck"))
+    assert watcher.poll() == (set(), {str(deck_path)})
+
+    new_card = deck_path / "cards" / "003"
+    new_card.mkdir()
+    for name in ("content.yaml", "answers.yaml"):
+        (new_card / name).write_text((card_dir / name).read_text())
+    cards, decks = watcher.poll()
+    assert (cards, decks) == ({str(new_card)}, {str(deck_path)})
+    result = watcher.rebuild(cards, decks)
+    assert result.ok, result.errors
+    assert result.generated["svg"] == [str(new_card / "content.svg")]
+    assert str(deck_path / "index.md") in result.generated["markdown"]
+    assert "Renamed Deck" in (deck_path / "index.md").read_text()
+
+def test_watcher_debounces_bursts_of_changes(tmp_path):
+    deck_path = create_test_deck(tmp_path)
+    pipeline = BuildPipeline([str(deck_path)], stages=["svg"])
+    pipeline.run()
+    watcher = DeckWatcher(pipeline, interval=0.02, debounce=0.1)
+    thread = threading.Thread(target=watcher.watch, kwargs={'max_rebuilds': 1}, daemon=True)
+    thread.start()
+
+    for card_id in ("001", "002"):
+        content = deck_path / "cards" / card_id / "content.yaml"
+        content.write_text(content.read_text().replace("?", "!"))
+        time.sleep(0.03)
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert watcher.rebuilds == 1
+    for card_id in ("001", "002"):
+        assert f"Question {card_id}!" in (deck_path / "cards" / card_id / "content.svg").read_text()
+
+def test_build_cli_watch_exit_code(tmp_path, monkeypatch):
+    from src.build.__main__ import main
+    deck_path = create_test_deck(tmp_path)
+    (deck_path / "cards" / "002" / "content.yaml").write_text("invalid: yaml: content: [")
+    monkeypatch.setattr(DeckWatcher, "watch", lambda self: None)
+    monkeypatch.setattr(sys, "argv", ["build", str(deck_path), "--stages", "svg", "--watch", "--quiet"])
+    assert main() == 1
+
+def test_pipeline_print_stage(tmp_path):
+    deck_path = create_test_deck(tmp_path, card_ids=("001", "002", "003"))
+    result = BuildPipeline([str(deck_path)], stages=["qr", "print"]).run()
+
+    assert result.ok, result.errors
+    print_file = deck_path / "print.pdf"
+    assert result.generated["print"] == [str(print_file)]
+    assert print_file.read_bytes().startswith(b"%PDF")
+
+    again = BuildPipeline([str(deck_path)], stages=["qr", "print"]).run()
+    assert again.generated["print"] == []
+    assert again.skipped["print"] == 1
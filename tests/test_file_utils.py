@@ -0,0 +1,237 @@
+import datetime
+import json
+import tempfile
+from pathlib import Path
+import pytest
+import yaml
+from src.file_utils import (Answer, BuildCache, CacheRegistry, Card, DeckIndex, YAMLLoader, get_deck_folders,
+                            get_question_folders, hash_inputs, load_yaml, write_if_changed)
+from src.file_utils.cache import CACHE_DIR, MANIFEST_NAME
+from src.file_utils.deck_index import DECK_INDEX_NAME
+from src.file_utils.yaml_loader import PARSED_CACHE_NAME
+
+@pytest.fixture
+def tmp_path():
+    """Fixture to create a new temporary directory for each test"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+def test_hash_inputs_changes_with_content_and_options(tmp_path):
+    content = tmp_path / "content.yaml"
+    content.write_text("question_content: one\n")
+    digest = hash_inputs([content], {'dpi': 254})
+
+    assert digest == hash_inputs([content], {'dpi': 254})
+    assert digest != hash_inputs([content], {'dpi': 300})
+    content.write_text("question_content: two\n")
+    assert digest != hash_inputs([content], {'dpi': 254})
+
+def test_hash_inputs_missing_file(tmp_path):
+    assert hash_inputs([tmp_path / "missing.yaml"]) != hash_inputs([])
+
+def test_build_cache_roundtrip(tmp_path):
+    output = tmp_path / "cards" / "001" / "content.svg"
+    output.parent.mkdir(parents=True)
+    cache = BuildCache(tmp_path)
+    assert not cache.is_fresh(output, "abc")
+
+    output.write_text("<svg/>")
+    cache.update(output, "abc")
+    cache.save()
+
+    manifest = json.loads((tmp_path / CACHE_DIR / MANIFEST_NAME).read_text())
+    assert manifest['entries'] == {'cards/001/content.svg': 'abc'}
+    reloaded = BuildCache(tmp_path)
+    assert reloaded.is_fresh(output, "abc")
+    assert not reloaded.is_fresh(output, "def")
+
+    output.unlink()
+    assert not reloaded.is_fresh(output, "abc")
+
+def test_build_cache_save_merges_concurrent_writers(tmp_path):
+    first = BuildCache(tmp_path)
+    second = BuildCache(tmp_path)
+    first.update(tmp_path / "a.pdf", "1")
+    second.update(tmp_path / "b.pdf", "2")
+    first.save()
+    second.save()
+
+    assert BuildCache(tmp_path).entries == {'a.pdf': '1', 'b.pdf': '2'}
+
+def test_cache_registry_for_card(tmp_path):
+    registry = CacheRegistry()
+    card_folder = tmp_path / "deck" / "cards" / "001"
+    assert registry.for_card(card_folder) is registry.for_root(tmp_path / "deck")
+
+def create_deck(path, card_ids=("001", "002")):
+    (path / "cards").mkdir(parents=True)
+    (path / "index.yaml").write_text("title: Deck\n")
+    for card_id in card_ids:
+        card_dir = path / "cards" / card_id
+        card_dir.mkdir()
+        (card_dir / "content.yaml").write_text("question_content: Q\n")
+        (card_dir / "answers.yaml").write_text("[]\n")
+    return path
+
+def test_get_deck_folders_recurses_into_subfolders(tmp_path):
+    first = create_deck(tmp_path / "decks" / "group" / "first")
+    second = create_deck(tmp_path / "decks" / "second")
+    (tmp_path / "decks" / "empty" / "cards").mkdir(parents=True)
+    (tmp_path / "decks" / "empty" / "index.yaml").write_text("title: Empty\n")
+    create_deck(tmp_path / "decks" / ".hidden")
+
+    assert get_deck_folders([str(tmp_path / "decks")]) == [str(first), str(second)]
+    assert get_deck_folders([str(second), str(second)]) == [str(second)]
+
+def test_get_question_folders(tmp_path):
+    deck = create_deck(tmp_path / "deck", card_ids=("002", "001"))
+    (deck / "cards" / "003").mkdir()
+    (deck / "cards" / "003" / "content.yaml").write_text("question_content: Q\n")
+
+    assert get_question_folders([str(deck)]) == [str(deck / "cards" / "001"), str(deck / "cards" / "002")]
+
+def test_deck_index_reuses_unchanged_directories(tmp_path):
+    decks = tmp_path / "decks"
+    deck = create_deck(decks / "deck")
+    index = DeckIndex.discover([str(decks)])
+    assert index.decks == [str(deck)]
+    assert (decks / CACHE_DIR / DECK_INDEX_NAME).exists()
+
+    # The first save creates .quiz-cache in the input path, changing its mtime once
+    DeckIndex.discover([str(decks)])
+    index = DeckIndex.discover([str(decks)])
+    assert index.listed == 0
+    assert index.reused == 5
+    assert index.question_folders() == [str(deck / "cards" / "001"), str(deck / "cards" / "002")]
+
+    new_card = deck / "cards" / "003"
+    new_card.mkdir()
+    (new_card / "content.yaml").write_text("question_content: Q\n")
+    (new_card / "answers.yaml").write_text("[]\n")
+    index = DeckIndex.discover([str(decks)])
+    assert index.listed == 2
+    assert index.question_folders([str(deck)])[-1] == str(new_card)
+    assert index.file_mtime(new_card / "content.yaml") == (new_card / "content.yaml").stat().st_mtime_ns
+
+def test_deck_index_serialization(tmp_path):
+    deck = create_deck(tmp_path / "deck")
+    index = DeckIndex.scan([str(deck)])
+    index.save(tmp_path / "index.json")
+
+    loaded = DeckIndex.load(tmp_path / "index.json")
+    assert loaded.trees == index.trees
+    assert loaded.decks == [str(deck)]
+    assert DeckIndex.load(tmp_path / "missing.json").trees == {}
+    (tmp_path / "bad.json").write_text("{not json")
+    assert DeckIndex.load(tmp_path / "bad.json").trees == {}
+
+def test_card_load_and_lazy_fields(tmp_path):
+    card_dir = tmp_path / "deck" / "cards" / "001"
+    card_dir.mkdir(parents=True)
+    (card_dir / "content.yaml").write_text(
+        "question_content: What is 2+2?\n"
+        "options: ['3', '4']\n"
+        "sources: ['https://example.com']\n"
+        "embedded_contents:\n- type: iframe\n  url: https://example.com/embed\n"
+    )
+    (card_dir / "answers.yaml").write_text("- {order: 1, option: '3', answer: 'no'}\n- {order: 2, option: '4', answer: 'yes'}\n")
+
+    card = Card.load(str(card_dir))
+    assert card.id == "001"
+    assert card.folder == str(card_dir)
+    assert card.question_text == "What is 2+2?"
+    assert card.options == ["3", "4"]
+    assert card.sources == ("https://example.com",)
+    assert card.embedded_contents[0]["type"] == "iframe"
+    assert card.answers == (Answer(1, "3", "no"), Answer(2, "4", "yes"))
+    assert not hasattr(card, "__dict__")
+
+    # answers.yaml is read on first access only
+    (card_dir / "answers.yaml").write_text("[]\n")
+    assert len(card.answers) == 2
+    assert Card.load(str(card_dir)).answers == ()
+
+def test_card_answers_formats():
+    wrapped = Card("001", {'options': ['a', 'b'], 'answers': {'answers': [{'answer': 'x'}, 'y']}})
+    assert wrapped.answers == (Answer(1, "a", "x"), Answer(2, "b", "y"))
+    assert Card("002", {}).answers == ()
+
+def test_card_load_rejects_non_mapping(tmp_path):
+    (tmp_path / "content.yaml").write_text("- not a mapping\n")
+    with pytest.raises(ValueError):
+        Card.load(str(tmp_path))
+
+def test_yaml_loader_reuses_parsed_data(tmp_path):
+    deck = create_deck(tmp_path / "deck", card_ids=("001",))
+    content = deck / "cards" / "001" / "content.yaml"
+    loader = YAMLLoader()
+    data = loader.load(content)
+    data['question_content'] = 'modified in memory'
+    assert loader.load(content) == {'question_content': 'Q'}
+    assert (loader.hits, loader.misses) == (1, 1)
+    loader.save()
+    assert (deck / CACHE_DIR / PARSED_CACHE_NAME).exists()
+
+    warm = YAMLLoader()
+    assert warm.load(content) == {'question_content': 'Q'}
+    assert (warm.hits, warm.misses) == (1, 0)
+
+    content.write_text("question_content: Changed\n")
+    assert YAMLLoader().load(content) == {'question_content': 'Changed'}
+
+def test_yaml_loader_cache_is_plain_json(tmp_path):
+    deck = create_deck(tmp_path / "deck", card_ids=("001",))
+    content = deck / "cards" / "001" / "content.yaml"
+    answers = deck / "cards" / "001" / "answers.yaml"
+    answers.write_text("- answer: 2024-01-02\n")
+    loader = YAMLLoader()
+    loader.load(content)
+    assert loader.load(answers) == [{'answer': datetime.date(2024, 1, 2)}]
+    loader.save()
+
+    saved = json.loads((deck / CACHE_DIR / PARSED_CACHE_NAME).read_text())
+    assert list(saved['entries']) == ["cards/001/content.yaml"]
+    warm = YAMLLoader()
+    assert warm.load(answers) == [{'answer': datetime.date(2024, 1, 2)}]
+    assert (warm.hits, warm.misses) == (0, 1)
+
+def test_yaml_loader_invalid_yaml(tmp_path):
+    deck = create_deck(tmp_path / "deck", card_ids=("001",))
+    content = deck / "cards" / "001" / "content.yaml"
+    content.write_text("invalid: yaml: content: [")
+    with pytest.raises(yaml.YAMLError):
+        YAMLLoader().load(content)
+    assert load_yaml(deck / "index.yaml") == {'title': 'Deck'}
+
+def test_write_if_changed(tmp_path):
+    target = tmp_path / "page.md"
+    assert write_if_changed(target, "# Title\n")
+    target.chmod(0o640)
+    mtime = target.stat().st_mtime_ns
+    assert not write_if_changed(target, "# Title\n")
+    assert target.stat().st_mtime_ns == mtime
+
+    assert write_if_changed(target, "# Other title\n")
+    assert target.read_text() == "# Other title\n"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["page.md"]
+
+def test_profiler_records_spans_only_when_enabled(tmp_path):
+    from src.file_utils import profiling
+    with profiling.span("svg", "001"):
+        pass
+    assert profiling.PROFILER.spans == []
+
+    out = tmp_path / "profile.json"
+    with profiling.profile_session(str(out)) as profiler:
+        with profiling.span("svg", "001"):
+            (tmp_path / "content.svg").write_text("x" * 1000)
+        with profiling.span("svg", "002"):
+            pass
+    assert not profiler.enabled
+
+    stages = json.loads(out.read_text())['stages']
+    assert stages['svg']['count'] == 2 and stages['svg']['cards'] == 2
+    if profiler.track_io:
+        assert stages['svg']['bytes_written'] >= 1000
+    assert profiling.card_of(tmp_path / "deck" / "cards" / "007" / "content.yaml") == "007"
@@ -3,7 +3,10 @@ import pytest
 import shutil
 import tempfile
 from pathlib import Path
-from src.qr_generator import generate_qr_code, generate_question_qr_code
+from src.qr_generator import QREncoder, generate_qr_code, generate_question_qr_code
+from src.qr_generator.__main__ import process_questions
+from src.file_utils import CacheRegistry
+import qrcode
 import subprocess
 import sys
 import logging
@@ -118,6 +121,50 @@ def test_generate_question_qr_code_default_prefixes(tmp_path, monkeypatch):
     expected_path = os.path.join(tmp_path, deck_name, "cards", card_id, "qr.png")
     assert result == expected_path
 
+def test_encoder_pins_version_and_matches_fitted_codes():
+    """The reused encoder produces the same codes as a fresh fitted QRCode"""
+    encoder = QREncoder()
+    for url in ["https://example.com", "https://blog.session.it/quiz/decks/" + "x" * 300 + "/cards/001"]:
+        fitted = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+        fitted.add_data(url)
+        fitted.make(fit=True)
+        encoded = encoder.make(url)
+        assert encoded.version == fitted.version
+        assert encoded.get_matrix() == fitted.get_matrix()
+
+def test_encoder_svg_path_covers_dark_modules():
+    encoder = QREncoder()
+    modules, path_data = encoder.svg_path("https://example.com")
+    matrix = encoder.make("https://example.com").get_matrix()
+    assert modules == len(matrix)
+    # Every subpath is a one-module-high run: M<x> <y>h<n>v1h-<n>z
+    runs = [int(cmd.split('h')[1].split('v')[0]) for cmd in path_data.split('z') if cmd]
+    assert sum(runs) == sum(sum(row) for row in matrix)
+    assert encoder.svg_fragment("https://example.com", 0, 0, 100).count('<path') == 1
+
+def test_process_questions_skips_unchanged_codes(tmp_path):
+    create_content_yaml_structure(tmp_path, "cached-deck", ["001", "002"])
+    folders = [str(tmp_path / "decks" / "cached-deck" / "cards" / card_id) for card_id in ["001", "002"]]
+
+    generated, errors = process_questions(folders, "https://example.com", cache=CacheRegistry())
+    assert len(generated) == 2 and errors == []
+    qr_path = Path(folders[0]) / "qr.png"
+    mtime = qr_path.stat().st_mtime_ns
+
+    generated, errors = process_questions(folders, "https://example.com", cache=CacheRegistry())
+    assert generated == [] and errors == []
+    assert qr_path.stat().st_mtime_ns == mtime
+
+    generated, errors = process_questions(folders, "https://example.org", cache=CacheRegistry())
+    assert len(generated) == 2
+
+def test_process_questions_rejects_the_old_signature(tmp_path):
+    from src.qr_generator.generator import generate_question_qr_code
+    with pytest.raises(TypeError):
+        process_questions([], generate_question_qr_code, "https://example.com")
+    with pytest.raises(TypeError, match="no longer supported"):
+        process_questions([], generate_question_qr_code)
+
 def create_content_yaml_structure(base_dir, deck_name, card_ids):
     deck_root = Path(base_dir) / "decks" / deck_name
     deck_root.mkdir(parents=True, exist_ok=True)
@@ -139,6 +186,23 @@ def create_content_yaml_structure(base_dir, deck_name, card_ids):
     logger.info(f"Paths: {paths}")
     return paths
 
+def test_process_questions_in_parallel_keeps_card_order(tmp_path):
+    card_ids = ["001", "002", "003", "004"]
+    create_content_yaml_structure(tmp_path, "parallel-deck", card_ids)
+    folders = [str(tmp_path / "decks" / "parallel-deck" / "cards" / card_id) for card_id in card_ids]
+    folders.insert(2, "not-a-card")
+    reported = []
+
+    generated, errors = process_questions(folders, "https://example.com", jobs=2,
+                                          progress=lambda done, total: reported.append((done, total)))
+
+    assert generated == [str(Path(folder) / "qr.png") for folder in folders if "not-a-card" not in folder]
+    assert errors == ["not-a-card"]
+    assert reported[-1] == (4, 4)
+    serial = tmp_path / "serial.png"
+    generate_qr_code("https://example.com/parallel-deck/cards/003", str(serial))
+    assert (Path(folders[3]) / "qr.png").read_bytes() == serial.read_bytes()
+
 def test_batch_qr_generation(tmp_path):
     # Create a mock deck with two cards
     deck_name = "batch-deck"
@@ -0,0 +1,180 @@
+import http.client
+import json
+import socket
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+import yaml
+import pytest
+from src.qr_generator import get_encoder
+from src.qr_generator.generator import question_url
+from src.server import CardNotFoundError, RenderService, make_server
+from src.server.service import REFRESH_INTERVAL
+from src.yaml_to_svg.generate_svg import YAMLToSVG
+from src.file_utils import Card
+
+@pytest.fixture
+def tmp_path():
+    """Fixture to create a new temporary directory for each test"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+def create_test_deck(base_path, deck_name="server-deck", card_ids=("001", "002")):
+    """Helper to create a deck with valid cards under base_path/decks/<deck_name>."""
+    deck_path = base_path / "decks" / deck_name
+    (deck_path / "cards").mkdir(parents=True)
+    with open(deck_path / "index.yaml", 'w') as f:
+        yaml.dump({'title': 'Server Deck', 'introduction': 'A deck for server tests'}, f)
+    for card_id in card_ids:
+        card_dir = deck_path / "cards" / card_id
+        card_dir.mkdir()
+        with open(card_dir / "content.yaml", 'w') as f:
+            yaml.dump({
+                'card_id': card_id,
+                'question_type': 'short',
+                'question_content': f'Question {card_id}?',
+                'options': ['one', 'two'],
+            }, f)
+        with open(card_dir / "answers.yaml", 'w') as f:
+            yaml.dump([{'order': 1, 'option': 'one', 'answer': 'uno'},
+                       {'order': 2, 'option': 'two', 'answer': 'dos'}], f)
+    return deck_path
+
+@pytest.fixture
+def server(tmp_path):
+    """A render server on a free localhost port, serving the test deck."""
+    create_test_deck(tmp_path)
+    server = make_server(RenderService([str(tmp_path / "decks")]), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def fetch(server, path, data=None):
+    """Return (status, content type, body) of a request to the test server."""
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}", data=data)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers['Content-Type'], response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers['Content-Type'], e.read()
+
+def test_server_renders_deck_cards(server, tmp_path):
+    card_dir = tmp_path / "decks" / "server-deck" / "cards" / "001"
+    status, content_type, body = fetch(server, "/decks/server-deck/cards/001/content.svg")
+    assert (status, content_type) == (200, "image/svg+xml")
+    expected = YAMLToSVG(input_paths=[str(card_dir.parent.parent)]).create_svg_card(
+        Card.load(card_dir), "001", write_svg=False)
+    assert body.decode('utf-8') == expected
+    assert not (card_dir / "content.svg").exists()
+
+    # Edits are picked up by the next request
+    content = card_dir / "content.yaml"
+    content.write_text(content.read_text().replace("Question 001?", "Edited question?"))
+    assert b"Edited question?" in fetch(server, "/decks/server-deck/cards/001/content.svg")[2]
+
+    status, content_type, body = fetch(server, "/decks/server-deck/cards/001/qr.png")
+    assert (status, content_type) == (200, "image/png")
+    assert body == get_encoder().png(question_url("server-deck", "001"))
+
+    status, content_type, body = fetch(server, "/decks/server-deck/cards/002/content.pdf")
+    assert (status, content_type) == (200, "application/pdf")
+    assert body.startswith(b"%PDF")
+
+    health = json.loads(fetch(server, "/health")[2])
+    assert health['decks'] == ["server-deck"]
+    assert health['rendered'] == 4
+
+def test_server_renders_posted_yaml(server):
+    card = yaml.dump({'question_content': 'Posted question?', 'options': ['a', 'b'], 'answers': ['x', 'y']})
+    status, content_type, body = fetch(server, "/render?format=svg&id=new", card.encode('utf-8'))
+    assert (status, content_type) == (200, "image/svg+xml")
+    assert b"Posted question?" in body and b">y</text>" in body
+
+    assert fetch(server, "/render?format=svg", b"just a string")[0] == 400
+    assert fetch(server, "/render?format=gif", card.encode('utf-8'))[0] == 400
+
+def test_server_errors(server):
+    for path in ("/decks/server-deck/cards/999/content.svg", "/decks/other/cards/001/content.svg",
+                 "/decks/server-deck/cards/../content.svg", "/decks/server-deck/cards/001/content.gif",
+                 "/unknown"):
+        status, content_type, body = fetch(server, path)
+        assert status == 404, path
+        assert content_type.startswith("text/plain")
+    with pytest.raises(CardNotFoundError):
+        server.service.card_folder("server-deck", "..")
+
+def test_service_rescans_for_unknown_decks_at_most_every_interval(tmp_path, monkeypatch):
+    from src.file_utils import DeckIndex
+    create_test_deck(tmp_path)
+    service = RenderService([str(tmp_path / "decks")])
+    scans = []
+    real_scan = DeckIndex.scan
+    monkeypatch.setattr(DeckIndex, "scan", lambda *args, **kwargs: scans.append(args) or real_scan(*args, **kwargs))
+
+    for deck in ("bad name", "../server-deck", "..", "other", "other", "another"):
+        with pytest.raises(CardNotFoundError):
+            service.card_folder(deck, "001")
+    assert len(scans) == 0
+
+    service.refreshed -= REFRESH_INTERVAL
+    create_test_deck(tmp_path, deck_name="new-deck")
+    assert service.card_folder("new-deck", "001").endswith("001")
+    with pytest.raises(CardNotFoundError):
+        service.card_folder("other", "001")
+    assert len(scans) == 1
+
+def test_server_rejects_negative_content_length(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+    connection.putrequest("POST", "/render?format=svg")
+    connection.putheader("Content-Length", "-1")
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    connection.close()
+
+def test_server_leaves_deck_tree_unchanged(tmp_path):
+    create_test_deck(tmp_path)
+    decks = tmp_path / "decks"
+
+    def tree():
+        return {str(path): path.stat().st_mtime_ns for path in decks.rglob("*")}
+
+    before = tree()
+    server = make_server(RenderService([str(decks)]), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for path in ("/decks/server-deck/cards/001/content.svg", "/decks/server-deck/cards/002/content.pdf",
+                     "/decks/server-deck/cards/001/qr.png", "/decks/other/cards/001/content.svg", "/health"):
+            fetch(server, path)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert tree() == before
+
+def test_server_on_unix_socket(tmp_path):
+    create_test_deck(tmp_path)
+    socket_path = str(tmp_path / "render.sock")
+    server = make_server(RenderService([str(tmp_path / "decks")]), socket_path=socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(OSError):
+            make_server(server.service, socket_path=socket_path)
+
+        connection = http.client.HTTPConnection("localhost")
+        connection.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.sock.connect(socket_path)
+        connection.request("GET", "/decks/server-deck/cards/002/content.svg")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert b"Question 002?" in response.read()
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not Path(socket_path).exists()
@@ -4,6 +4,7 @@ import sys
 import tempfile
 from pathlib import Path
 from src.svg_to_pdf.converter import SVGToPDFConverter
+from src.svg_to_pdf.imposition import DeckImposer, SheetLayout
 from unittest.mock import patch
 
 @pytest.fixture
@@ -70,4 +71,184 @@ def test_cli_interface(tmp_path):
     
     # Test that non-SVG files are rejected
     with patch.object(sys, 'argv', ['converter.py', str(non_svg_file)]):
-        assert main() == 1  # Should fail with error code 1 
\ No newline at end of file
+        assert main() == 1  # Should fail with error code 1 
+
+    # Test that a failed conversion is reported in the exit code
+    with patch.object(sys, 'argv', ['converter.py', str(svg_file)]), \
+            patch.object(SVGToPDFConverter, 'convert_svg_to_pdf', return_value=False):
+        assert main() == 1
+
+def test_process_directory_parallel(tmp_path):
+    svg_content = """
+    <svg width="100" height="100" xmlns="http://www.w3.org/2000/svg">
+        <rect width="100" height="100" fill="red"/>
+    </svg>
+    """
+    for card_id in ("001", "002", "003"):
+        card_dir = tmp_path / "cards" / card_id
+        card_dir.mkdir(parents=True)
+        (card_dir / "content.svg").write_text(svg_content)
+    (tmp_path / "cards" / "003" / "content.svg").write_text("not a valid svg content")
+
+    converter = SVGToPDFConverter()
+    failures = converter.process_directory(tmp_path, tmp_path, jobs=2)
+
+    assert [Path(svg_file).parent.name for svg_file, _ in failures] == ["003"]
+    assert (tmp_path / "cards" / "001" / "content.pdf").exists()
+    assert (tmp_path / "cards" / "002" / "content.pdf").exists()
+
+    # Converted files are skipped on the next run, failed ones are retried
+    assert len(converter.process_directory(tmp_path, tmp_path, jobs=2)) == 1
+
+def test_process_directory_rebuilds_when_an_image_changes(tmp_path):
+    from src.qr_generator import get_encoder
+    card_dir = tmp_path / "cards" / "001"
+    card_dir.mkdir(parents=True)
+    (card_dir / "content.svg").write_text(
+        '<svg width="100" height="100" xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink">'
+        '<image x="0" y="0" width="50" height="50" xlink:href="https://example.com/qr.png"/></svg>'
+    )
+    (card_dir / "qr.png").write_bytes(get_encoder().png("https://example.com/first"))
+    pdf_file = card_dir / "content.pdf"
+    converter = SVGToPDFConverter()
+
+    def convert():
+        if pdf_file.exists():
+            os.utime(pdf_file, ns=(0, 0))
+        assert converter.process_directory(tmp_path, tmp_path) == []
+        return pdf_file.stat().st_mtime_ns != 0
+
+    assert convert()
+    assert not convert()
+    # Only the referenced image changes
+    (card_dir / "qr.png").write_bytes(get_encoder().png("https://example.com/second"))
+    assert convert()
+
+def test_cli_directory_reports_failures(tmp_path):
+    (tmp_path / "broken.svg").write_text("not a valid svg content")
+    with patch.object(sys, 'argv', ['converter.py', str(tmp_path), '--jobs', '2']):
+        from src.svg_to_pdf.converter import main
+        assert main() == 1
+
+def test_convert_svg_from_memory(tmp_path):
+    converter = SVGToPDFConverter()
+    svg_content = '<svg width="100" height="100" xmlns="http://www.w3.org/2000/svg"><rect width="100" height="100" fill="red"/></svg>'
+    output_path = tmp_path / "bytes.pdf"
+
+    assert converter.convert_svg(svg_content.encode('utf-8'), str(output_path))
+    assert output_path.exists()
+    assert list(tmp_path.glob("*.svg")) == []
+
+def test_convert_svg_from_drawing(tmp_path):
+    import svgwrite
+    drawing = svgwrite.Drawing(size=("100px", "100px"))
+    drawing.add(drawing.rect((0, 0), (100, 100), fill='red'))
+    output_path = tmp_path / "drawing.pdf"
+
+    assert SVGToPDFConverter().convert_svg(drawing, str(output_path), base_dir=str(tmp_path))
+    assert output_path.exists()
+
+def test_image_handler_embeds_and_caches_images(tmp_path, monkeypatch):
+    from src.svg_to_pdf.image_handler import DataURICache, ImageHandler
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG fake image")
+    svg_content = '<svg><image x="0" xlink:href="https://example.com/logo.png" width="10"/></svg>'
+    cache = DataURICache()
+    handler = ImageHandler(base_dir=str(tmp_path), cache=cache)
+
+    first = handler.fix_image_references(svg_content)
+    assert 'xlink:href="data:image/png;base64,' in first
+
+    import base64
+    encoded = []
+    real_b64encode = base64.b64encode
+    monkeypatch.setattr(base64, "b64encode", lambda data: encoded.append(data) or real_b64encode(data))
+    assert handler.fix_image_references(svg_content) == first
+    assert encoded == []
+
+def test_image_handler_cache_budget_and_missing_paths(tmp_path):
+    from src.svg_to_pdf.image_handler import DataURICache
+    cache = DataURICache(max_bytes=10)
+    cache.put(("a", 1, 1), "12345")
+    cache.put(("b", 1, 1), "12345")
+    cache.get(("a", 1, 1))
+    cache.put(("c", 1, 1), "123")
+    assert cache.get(("b", 1, 1)) is None
+    assert cache.get(("a", 1, 1)) == "12345"
+    assert cache.size <= 10
+
+    missing = tmp_path / "qr.png"
+    assert cache.stat(str(missing)) is None
+    missing.write_bytes(b"png")
+    assert cache.stat(str(missing)) is None
+    cache.clear()
+    assert cache.stat(str(missing)) is not None
+
+    # Missing paths are checked again once their entry expires, and only the latest are kept
+    expiring = DataURICache(missing_ttl=0, max_missing=2)
+    other = tmp_path / "other.png"
+    assert expiring.stat(str(other)) is None
+    other.write_bytes(b"png")
+    assert expiring.stat(str(other)) is not None
+    for name in ("a.png", "b.png", "c.png"):
+        expiring.stat(str(tmp_path / name))
+    assert list(expiring._missing) == [str(tmp_path / "b.png"), str(tmp_path / "c.png")]
+
+def test_image_handler_streaming_matches_full_rewrite(tmp_path):
+    from src.svg_to_pdf.image_handler import DataURICache, ImageHandler
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG fake image")
+    svg_content = (
+        '<svg xmlns:xlink="http://www.w3.org/1999/xlink">'
+        + '<image x="0" xlink:href="https://example.com/logo.png" width="10"/><text>hi</text>' * 20
+        + '<image xlink:href="missing.png"/></svg>'
+    )
+    handler = ImageHandler(base_dir=str(tmp_path), cache=DataURICache())
+    expected = handler.fix_image_references(svg_content)
+    assert expected.count('xlink:href="data:image/png;base64,') == 20
+    assert expected.count('"/>') == 21
+
+    for size in (1, 7, 64):
+        chunks = [svg_content[i:i + size] for i in range(0, len(svg_content), size)]
+        assert ''.join(handler.iter_fixed_image_references(chunks)) == expected
+
+    # A tag spanning many chunks is passed through whole
+    embedded = '<svg><image xlink:href="data:image/png;base64,' + 'A' * 100000 + '"/><text>hi</text></svg>'
+    chunks = [embedded[i:i + 100] for i in range(0, len(embedded), 100)]
+    assert ''.join(handler.iter_fixed_image_references(chunks)) == embedded
+
+def test_image_handler_streams_images_larger_than_cache(tmp_path):
+    import base64
+    from src.svg_to_pdf.image_handler import DataURICache, ImageHandler
+    payload = os.urandom(200000)
+    (tmp_path / "photo.png").write_bytes(payload)
+    cache = DataURICache(max_bytes=1024)
+    handler = ImageHandler(base_dir=str(tmp_path), cache=cache)
+
+    fragments = list(handler.iter_fixed_image_references(['<svg><image xlink:href="photo.png"/></svg>']))
+    assert max(len(fragment) for fragment in fragments) < 100000
+    assert base64.b64encode(payload).decode('utf-8') in ''.join(fragments)
+    assert cache.size == 0
+
+def test_sheet_layout_slots():
+    layout = SheetLayout(page_size=(210.0, 297.0), columns=2, rows=2, margin=10.0, gutter=5.0)
+    assert layout.cards_per_sheet == 4
+    assert layout.slot_size == (92.5, 136.0)
+    assert layout.slot(0) == (10.0, 10.0, 92.5, 136.0)
+    assert layout.slot(3) == (107.5, 151.0, 92.5, 136.0)
+    # Slots wrap around on the next sheet
+    assert layout.slot(4) == layout.slot(0)
+    # Backs mirror the column so they line up with their fronts after a long-edge flip
+    assert layout.slot(0, back=True) == layout.slot(1)
+    assert layout.slot(3, back=True) == layout.slot(2)
+
+def test_sheet_layout_parse():
+    layout = SheetLayout.parse("3x4", "A3")
+    assert (layout.columns, layout.rows, layout.page_size) == (3, 4, (297.0, 420.0))
+    for grid, page in (("2by2", "A4"), ("0x2", "A4"), ("2x2", "B5")):
+        with pytest.raises(ValueError):
+            SheetLayout.parse(grid, page)
+
+def test_impose_without_cards(tmp_path):
+    output = tmp_path / "print.pdf"
+    assert DeckImposer().impose([], str(output)) == 0
+    assert not output.exists()
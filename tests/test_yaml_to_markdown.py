@@ -1,3 +1,4 @@
+import json
 import os
 import tempfile
 import unittest
@@ -194,6 +195,32 @@ class TestYAMLToMarkdown(unittest.TestCase):
         self.assertIn('- [Question 001](cards/001/content) - [PDF](cards/001/content.pdf) - [SVG](cards/001/content.svg)', content)
         self.assertIn('- [Question 002](cards/002/content) - [PDF](cards/002/content.pdf) - [SVG](cards/002/content.svg)', content)
         
+    def test_create_index_pages(self):
+        cards = [Card(f'00{i}', {'question': f'Q{i}'}) for i in range(1, 6)]
+        pages = MarkdownGenerator.create_index_pages({'title': 'Test Deck', 'introduction': 'Intro'}, cards, 2)
+        
+        self.assertEqual(len(pages), 3)
+        self.assertIn('Intro', pages[0])
+        self.assertNotIn('Intro', pages[1])
+        self.assertIn('cards/003/content', pages[1])
+        self.assertIn('Page 2 of 3 - [Previous](index) - [Next](index-3)', pages[1])
+        self.assertEqual(MarkdownGenerator.create_index_pages({'title': 'Test Deck'}, cards, 0),
+                         [MarkdownGenerator.create_index_content({'title': 'Test Deck'}, cards)])
+        
+    def test_process_deck_writes_paginated_index_and_search_index(self):
+        converter = YAMLToMarkdown([str(self.input_path)], page_size=1, search_index=True)
+        converter.process_deck()
+        
+        self.assertTrue((self.input_path / "index-2.md").exists())
+        search_index = json.loads((self.input_path / "search-index.json").read_text())
+        self.assertEqual([entry['id'] for entry in search_index['cards']], ['001', '002'])
+        self.assertEqual(search_index['cards'][1]['page'], 'index-2')
+        
+        YAMLToMarkdown([str(self.input_path)]).process_deck()
+        self.assertFalse((self.input_path / "index-2.md").exists())
+        self.assertFalse((self.input_path / "search-index.json").exists())
+        self.assertIn('cards/002/content', (self.input_path / "index.md").read_text())
+        
     def test_yaml_to_markdown_error_handling(self):
         converter = YAMLToMarkdown([str(self.input_path)])
         
@@ -217,6 +244,20 @@ class TestYAMLToMarkdown(unittest.TestCase):
         self.assertTrue((self.input_path / "cards/002/content.md").exists())
         self.assertFalse((self.input_path / "cards/003/content.md").exists())  # Invalid card should not be created
         
+    def test_process_deck_skips_unchanged_files(self):
+        converter = YAMLToMarkdown([str(self.input_path)], use_cache=False)
+        converter.process_deck()
+        self.assertEqual(converter.skipped, 0)
+        written = converter.written
+        card_file = self.input_path / "cards/001/content.md"
+        mtime = card_file.stat().st_mtime_ns
+
+        converter = YAMLToMarkdown([str(self.input_path)], use_cache=False)
+        converter.process_deck()
+        self.assertEqual((converter.written, converter.skipped), (0, written))
+        self.assertEqual(card_file.stat().st_mtime_ns, mtime)
+        self.assertEqual(list(self.input_path.glob("**/*.tmp")), [])
+
     def tearDown(self):
         # Clean up temporary directory
         import shutil
@@ -1,3 +1,4 @@
+import math
 import os
 import tempfile
 import shutil
@@ -6,7 +7,10 @@ import yaml
 import svgwrite
 import logging
 import pytest
+import xml.etree.ElementTree as ET
 from src.yaml_to_svg.generate_svg import YAMLToSVG
+from src.yaml_to_svg.template import get_card_template
+from src.yaml_to_svg.text_layout import get_measurer
 
 @pytest.fixture
 def tmp_path():
@@ -148,15 +152,15 @@ def test_load_question(test_deck):
     converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
     converter.deck_path = Path(test_deck)
     question = converter.load_question('001')
-    assert question['question'] == 'What is 2+2?'
-    assert question['options'] == ['3', '4', '5']
+    assert question.content['question'] == 'What is 2+2?'
+    assert question.options == ['3', '4', '5']
 
 def test_load_question_with_content_yaml(test_deck):
     converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
     converter.deck_path = Path(test_deck)
     question = converter.load_question('003')
-    assert question['question_content'] == 'What is the capital of France?'
-    assert question['options'] == ['London', 'Paris', 'Berlin']
+    assert question.question_text == 'What is the capital of France?'
+    assert question.options == ['London', 'Paris', 'Berlin']
 
 def test_load_nonexistent_question(test_deck):
     converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
@@ -249,4 +253,112 @@ def test_process_deck_with_empty_metadata(tmp_path):
     # Optionally, check that SVGs are still created
     assert (deck_path / "cards" / "001" / "content.svg").exists()
     assert (deck_path / "cards" / "002" / "content.svg").exists()
-    assert (deck_path / "cards" / "003" / "content.svg").exists() 
\ No newline at end of file
+    assert (deck_path / "cards" / "003" / "content.svg").exists() 
+
+def test_process_deck_skips_unchanged_cards(test_deck):
+    converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
+    converter.process_deck()
+    unchanged = test_deck / "cards" / "001" / "content.svg"
+    unchanged.write_text("<svg>stale</svg>")
+
+    converter.process_deck()
+    assert unchanged.read_text() == "<svg>stale</svg>"
+
+    converter.font_size = 16
+    converter.process_deck()
+    assert 'What is 2+2?' in unchanged.read_text()
+
+def test_process_deck_in_parallel_matches_serial_output(test_deck):
+    converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
+    assert converter.process_deck() == []
+    serial = {p: p.read_text() for p in sorted(test_deck.glob("cards/*/content.svg"))}
+
+    assert YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14,
+                     font_family="Times New Roman", use_cache=False, jobs=2).process_deck() == []
+    assert {p: p.read_text() for p in sorted(test_deck.glob("cards/*/content.svg"))} == serial
+
+def test_process_deck_reports_failed_cards(test_deck):
+    (test_deck / "cards" / "002" / "content.yaml").write_text("- not\n- a mapping\n")
+    converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14,
+                          font_family="Times New Roman", jobs=2)
+    failures = converter.process_deck()
+
+    assert [Path(folder).name for folder, _ in failures] == ['002']
+    assert 'did not return a dict' in failures[0][1]
+    assert (test_deck / "cards" / "001" / "content.svg").exists()
+    assert (test_deck / "cards" / "003" / "content.svg").exists()
+
+def test_create_svg_card_without_writing(test_deck):
+    converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
+    converter.deck_path = Path(test_deck)
+    question = converter.load_question('001')
+    svg = converter.create_svg_card(question, '001', write_svg=False)
+
+    assert 'What is 2+2?' in svg
+    assert not (test_deck / "cards" / "001" / "content.svg").exists()
+
+def test_card_template_is_shared_and_escapes_text():
+    template = get_card_template((100, 150), 3, 14, "Times New Roman")
+    assert template is get_card_template((100, 150), 3, 14, "Times New Roman")
+    assert template is not get_card_template((100, 150), 4, 14, "Times New Roman")
+
+    svg = template.render('Is 1 < 2 & "true"?', ['3', 'four five', '5'], ['no', '', 'yes'])
+    root = ET.fromstring(svg.encode('utf-8'))
+    texts = [element.text for element in root.iter('{http://www.w3.org/2000/svg}text')]
+    assert 'Is 1 < 2 &' in texts and '"true"?' in texts
+    assert '2. four five' in texts
+    assert 'yes' in texts
+    assert root.get('width') == '100mm'
+
+def test_text_layout_fits_question_in_circle():
+    measurer = get_measurer("Arial")
+    radius = 166
+    size, lines = measurer.fit_circle("short question?", radius, 24)
+    assert (size, lines) == (24, ["short question?"])
+
+    size, lines = measurer.fit_circle("word " * 120, radius, 24)
+    assert size < 24
+    assert len(lines) > 1
+    half_height = len(lines) * (size + 2) / 2
+    chord = 2 * math.sqrt((radius * 0.9) ** 2 - half_height ** 2)
+    assert all(measurer.width(line, size) <= chord for line in lines)
+    assert " ".join(lines) == " ".join(["word"] * 120)
+
+def test_text_layout_splits_options_by_width():
+    measurer = get_measurer("Arial")
+    assert measurer.fit_lines("Paso 10", 18, 150) == (18, ("Paso 10", ""))
+    size, (first, second) = measurer.fit_lines("supercalifragilistic a b c", 18, 150)
+    assert (first, second) == ("supercalifragilistic", "a b c")
+    assert measurer.width(first, size) <= 150
+    assert measurer.word_width.cache_info().hits > 0
+
+def test_compact_svg_is_minified_and_smaller(test_deck):
+    converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14, font_family="Times New Roman")
+    question = converter.load_question(str(test_deck / "cards" / "003"))
+    pretty = converter.create_svg_card(question, '003', write_svg=False)
+    converter.compact = True
+    compact = converter.create_svg_card(question, '003', write_svg=False)
+
+    assert len(compact) < len(pretty)
+    assert '\n' not in compact
+    root = ET.fromstring(compact.split('?>', 1)[1])
+    ns = '{http://www.w3.org/2000/svg}'
+    assert 'font-family:Times New Roman' in root.find(f'{ns}style').text
+    texts = [t.text for t in root.iter(f'{ns}text')]
+    assert texts.count('Paris') == 1
+    assert not any(t and t.startswith('1. ') for t in texts)
+    for t in root.iter(f'{ns}text'):
+        assert len(t.get('x').partition('.')[2]) <= 1
+        assert len(t.get('y').partition('.')[2]) <= 1
+
+def test_create_svg_card_embeds_vector_qr(test_deck):
+    converter = YAMLToSVG(input_paths=[str(test_deck)], card_size=(100, 150), font_size=14,
+                          font_family="Times New Roman", embed_qr=True, url_prefix="https://example.com/decks")
+    question = converter.load_question(str(test_deck / "cards" / "001"))
+    svg = converter.create_svg_card(question, '001', write_svg=False)
+
+    root = ET.fromstring(svg.split('?>', 1)[1])
+    ns = '{http://www.w3.org/2000/svg}'
+    qr_paths = [p for p in root.iter(f'{ns}path') if p.get('shape-rendering') == 'crispEdges']
+    assert len(qr_paths) == 1
+    assert not list(root.iter(f'{ns}image'))